@@ -0,0 +1,172 @@
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Mapping, Optional
+
+from config import LoggerConfig
+from metrics import REGISTRY, ScraperStats
+
+# DuckDuckGo "anomaly" pagina: de lite/html frontends geven deze i.p.v. resultaten
+_DDG_CAPTCHA_RE = re.compile(
+    r'anomaly-modal|anomaly\.js|challenge-form|bots use DuckDuckGo too|complete the following challenge',
+    re.IGNORECASE
+)
+# yt-dlp meldingen bij bot detectie of rate limiting door YouTube
+_YTDLP_BLOCK_RE = re.compile(
+    r"confirm you.re not a bot|HTTP Error 429|Too Many Requests|rate-limited by YouTube",
+    re.IGNORECASE
+)
+
+
+class PlatformBlocked(Exception):
+    """Het platform blokkeert ons (CAPTCHA, bot-check, 429); de query moet later opnieuw"""
+
+    def __init__(self, platform: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(f"{platform} blocked: {reason}")
+        self.platform = platform
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def detect_ddg_captcha(html: str) -> Optional[str]:
+    """Reden als de pagina een DuckDuckGo CAPTCHA/anomaly pagina is, anders None"""
+    match = _DDG_CAPTCHA_RE.search(html or '')
+    return f"DuckDuckGo CAPTCHA ({match.group(0)})" if match else None
+
+
+def detect_ytdlp_block(message: str) -> Optional[str]:
+    """Reden als een yt-dlp foutmelding op bot detectie of rate limiting wijst, anders None"""
+    match = _YTDLP_BLOCK_RE.search(message or '')
+    return f"yt-dlp: {match.group(0)}" if match else None
+
+
+def ytdlp_extract(ydl, url: str, platform: str = 'youtube', download: bool = False) -> Optional[Dict]:
+    """ydl.extract_info, met bot-checks en 429's als PlatformBlocked"""
+    try:
+        return ydl.extract_info(url, download=download)
+    except Exception as e:
+        reason = detect_ytdlp_block(str(e))
+        if reason:
+            raise PlatformBlocked(platform, reason) from e
+        raise
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Wachttijd uit Retry-After (seconden) of X-Ratelimit-Reset (Unix timestamp, Pexels)
+
+    :return: Seconden, None als de headers niets zeggen
+    """
+    value = headers.get('Retry-After')
+    if value and value.strip().isdigit():
+        return float(value)
+    reset = headers.get('X-Ratelimit-Reset')
+    if reset and reset.strip().isdigit():
+        return max(float(reset) - time.time(), 0.0)
+    return None
+
+
+class CooldownTracker:
+    """
+    Cooldown per platform met exponentiële backoff
+
+    Elke blokkade verdubbelt de cooldown (base, 2x base, 4x base, ... tot max_cooldown, met jitter);
+    een geslaagde request zet de teller terug. Een Retry-After van het platform gaat voor als die langer is.
+    """
+
+    def __init__(self, base: float = 60.0, max_cooldown: float = 1800.0, jitter: float = 0.1,
+                 overrides: Optional[Dict[str, float]] = None):
+        """
+        :param base: Eerste cooldown in seconden
+        :param max_cooldown: Bovengrens van de backoff
+        :param jitter: Relatieve spreiding (0.1 = +-10%) zodat workers niet tegelijk terugkomen
+        :param overrides: Andere base per platform, bijv. {'vimeo': 120.0}
+        """
+        self.base = base
+        self.max_cooldown = max_cooldown
+        self.jitter = jitter
+        self.overrides = overrides or {}
+        self._logger = None
+        self._lock = threading.Lock()
+        self._strikes: Dict[str, int] = {}
+        self._until: Dict[str, float] = {}
+        self.stats = ScraperStats('cooldown', [])
+
+    @property
+    def logger(self):
+        # Lazy: de gedeelde tracker wordt bij import aangemaakt, de logger pas bij de eerste blokkade
+        if self._logger is None:
+            self._logger = LoggerConfig.setup_logger(__name__)
+        return self._logger
+
+    def block(self, platform: str, reason: str = '', retry_after: Optional[float] = None) -> float:
+        """
+        Registreer een blokkade
+
+        :return: Cooldown in seconden
+        """
+        with self._lock:
+            strikes = self._strikes.get(platform, 0) + 1
+            self._strikes[platform] = strikes
+            cooldown = min(self.overrides.get(platform, self.base) * 2 ** (strikes - 1), self.max_cooldown)
+            cooldown *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            if retry_after is not None:
+                cooldown = max(cooldown, retry_after)
+            self._until[platform] = max(self._until.get(platform, 0.0), time.monotonic() + cooldown)
+
+        self.stats.inc(f"{platform}_blocks")
+        self.logger.warning(f"{platform} blocked ({reason or 'unknown reason'}), strike {strikes}: "
+                            f"cooling down for {cooldown:.0f}s")
+        return cooldown
+
+    def success(self, platform: str):
+        """Geslaagde request: de backoff begint bij de volgende blokkade weer bij base"""
+        if self._strikes.get(platform):
+            with self._lock:
+                self._strikes[platform] = 0
+
+    def remaining(self, platform: str) -> float:
+        """Seconden tot het platform weer benaderd mag worden (0 = beschikbaar)"""
+        with self._lock:
+            return max(self._until.get(platform, 0.0) - time.monotonic(), 0.0)
+
+    def wait(self, platform: str):
+        """Wacht de cooldown uit (voor runs met maar één platform, waar geen ander werk is)"""
+        REGISTRY.sleep(self.remaining(platform), platform=platform)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                platform: {'strikes': self._strikes.get(platform, 0),
+                           'remaining_s': round(max(until - now, 0.0), 1)}
+                for platform, until in self._until.items()
+            }
+
+
+COOLDOWNS = CooldownTracker(overrides={'vimeo': 120.0, 'youtube': 300.0})
+
+
+def call_with_cooldown(platform: str, func: Callable, *args, max_attempts: int = 5,
+                       tracker: Optional[CooldownTracker] = None, **kwargs):
+    """
+    Roep func aan buiten de cooldown van het platform; bij PlatformBlocked cooldown registreren en opnieuw
+
+    Voor de scrapers die één platform afwerken: er is geen ander werk, dus wachten is het beste.
+    Meerdere platforms tegelijk: zie PlatformScraper.scrape_many, dat ander werk oppakt.
+
+    :raises PlatformBlocked: Nog steeds geblokkeerd na max_attempts pogingen
+    """
+    tracker = tracker if tracker is not None else COOLDOWNS
+    for attempt in range(1, max_attempts + 1):
+        tracker.wait(platform)
+        try:
+            result = func(*args, **kwargs)
+        except PlatformBlocked as e:
+            tracker.block(platform, e.reason, e.retry_after)
+            if attempt == max_attempts:
+                raise
+            continue
+        tracker.success(platform)
+        return result
@@ -0,0 +1,539 @@
+import argparse
+import csv
+import glob
+import heapq
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import LoggerConfig
+from metrics import ScraperStats
+from tools import read_terms
+from downloader import platform_for_url
+from transcripts import youtube_video_id
+from vimeo_metadata import vimeo_video_id
+
+# Alle outputs van de scrapers en de dataset builder (glob patronen, relatief t.o.v. de werkmap)
+DEFAULT_INPUTS = [
+    'data/results/results_batch_*.json',
+    'data/results/final_results.json',
+    'data/results/refresh_*.json',
+    'data/results/youtube_videos_scraped.csv',
+    'data/results/youtube_videos_scraped.xlsx',
+    'data/results/pexels_videos_scraped.csv',
+    'data/results/pexels_videos_scraped.xlsx',
+    'data/vimeo_videos_scraped.csv',
+    'data/vimeo_videos_backup.csv',
+]
+
+# Keywords CSV waaruit de scrapers hun queries "<emotion> <subject> <setting>" bouwen
+DEFAULT_KEYWORDS = 'data/Scraping_Part1_keywords_extended.csv'
+
+# Unified schema van de store; queries/emotions/terms/sources zijn lijsten,
+# terms bevat de [emotion, subject, setting] combinaties van de builder queries waar de video bij hoorde
+STORE_FIELDS = [
+    'video_key', 'platform', 'url', 'page_url', 'title', 'description', 'uploader', 'upload_date',
+    'duration', 'view_count', 'width', 'height', 'fps', 'file_type', 'thumbnail',
+    'queries', 'emotions', 'terms', 'first_seen', 'sources',
+]
+_DETAIL_FIELDS = ('page_url', 'title', 'description', 'uploader', 'upload_date', 'file_type', 'thumbnail')
+_NUMBER_FIELDS = ('duration', 'view_count', 'width', 'height', 'fps')
+_LIST_FIELDS = ('queries', 'emotions', 'terms', 'sources')
+_CAPPED_FIELDS = ('queries', 'terms')
+
+# Houdt records klein: een populaire video komt bij honderden queries terug
+MAX_QUERIES = 25
+
+_PEXELS_ID_RE = re.compile(r'pexels\.com/(?:video-files/|videos/|video/(?:[^/?#]*-)?)(\d+)')
+# De Vimeo scraper zoekt via DuckDuckGo met "site:vimeo.com <query>"
+_SITE_PREFIX_RE = re.compile(r'^site:\S+\s+')
+# DuckDuckGo titels eindigen op de site naam
+_TITLE_SUFFIX_RE = re.compile(r'\s+-\s+Vimeo$')
+_PLACEHOLDER_TITLES = {'', 'No title'}
+
+
+def video_key(platform: str, url: str, page_url: Optional[str] = None) -> Optional[str]:
+    """
+    Platform-onafhankelijke sleutel van een video, bijv. 'youtube:VpDG4HAT-DA' of 'pexels:2932301'
+
+    :return: None voor URL's die geen video zijn (Vimeo kanaal- of gebruikerspagina's)
+    """
+    if platform == 'youtube':
+        video_id = youtube_video_id(url)
+    elif platform == 'vimeo':
+        video_id = vimeo_video_id(url)
+        if video_id is None:
+            return None
+    elif platform == 'pexels':
+        match = _PEXELS_ID_RE.search(url) or _PEXELS_ID_RE.search(page_url or '')
+        video_id = match.group(1) if match else None
+    else:
+        video_id = None
+    return f"{platform}:{video_id}" if video_id else f"url:{url}"
+
+
+def _text(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Excel maakt van 20250418 een float
+    text = str(value).strip()
+    return text if text and text.lower() != 'nan' else None
+
+
+def _number(value):
+    text = _text(value)
+    if text is None:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def _timestamp(value) -> Optional[str]:
+    text = _text(value)
+    return text.replace(' ', 'T', 1) if text else None
+
+
+class KeywordTerms:
+    """
+    Zet een scraper query terug om naar zijn (emotion, subject, setting) termen
+
+    De CSV/XLSX outputs hebben alleen de query kolom; die is altijd "<emotion> <subject> <setting>" uit de
+    keywords CSV. Termen kunnen uit meerdere woorden bestaan ('grossed out', 'living room'), dus er wordt
+    niet op spaties geknipt maar elke splitsing tegen de bekende termen gecontroleerd.
+    """
+
+    def __init__(self, emotions: Iterable[str], subjects: Iterable[str], settings: Iterable[str]):
+        self.emotions = {_words(term): term for term in emotions}
+        self.subjects = {_words(term): term for term in subjects}
+        self.settings = {_words(term): term for term in settings}
+        self._cache: Dict[str, Optional[Tuple[str, str, str]]] = {}
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'KeywordTerms':
+        return cls(*read_terms(path))
+
+    def split(self, query: Optional[str]) -> Optional[Tuple[str, str, str]]:
+        """
+        :param query: Query uit een scraper output (een 'site:... ' prefix is al verwijderd)
+        :return: (emotion, subject, setting), None als de query niet uit de keywords komt
+        """
+        if not query:
+            return None
+        if query not in self._cache:
+            self._cache[query] = self._split(_words(query).split(' '))
+        return self._cache[query]
+
+    def _split(self, words: List[str]) -> Optional[Tuple[str, str, str]]:
+        for i in range(1, len(words) - 1):
+            emotion = self.emotions.get(' '.join(words[:i]))
+            if emotion is None:
+                continue
+            for j in range(i + 1, len(words)):
+                subject = self.subjects.get(' '.join(words[i:j]))
+                setting = self.settings.get(' '.join(words[j:]))
+                if subject is not None and setting is not None:
+                    return emotion, subject, setting
+        return None
+
+
+def _words(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def normalize_record(row: Dict, source: str, platform: Optional[str] = None, query: Optional[str] = None,
+                     emotion: Optional[str] = None, subject: Optional[str] = None, setting: Optional[str] = None,
+                     seen_at: Optional[str] = None, keywords: Optional[KeywordTerms] = None) -> Optional[Dict]:
+    """
+    Zet een rij uit een van de scraper outputs om naar het unified schema
+
+    :param row: Rij uit CSV/Excel of video uit een builder resultaat
+    :param source: Bestandsnaam (komt in 'sources')
+    :param platform: Platform als de rij het zelf niet zegt (bijv. uit de bestandsnaam)
+    :param query: Query van het builder resultaat waar de video onder hangt
+    :param emotion: Emotie van het builder resultaat
+    :param subject: Subject van het builder resultaat
+    :param setting: Setting van het builder resultaat
+    :param seen_at: Tijdstip van het builder resultaat
+    :param keywords: Termen voor rijen zonder emotion/subject/setting (CSV/XLSX), afgeleid uit hun query
+    :return: Record, None voor rijen zonder (video) URL
+    """
+    url = _text(row.get('url'))
+    if url is None:
+        return None
+    platform = _text(row.get('platform')) or platform or platform_for_url(url)
+    key = video_key(platform, url, _text(row.get('page_url')))
+    if key is None:
+        return None
+
+    record = {'video_key': key, 'platform': platform, 'url': url}
+    for field in _DETAIL_FIELDS:
+        record[field] = _text(row.get(field))
+    for field in _NUMBER_FIELDS:
+        record[field] = _number(row.get(field))
+    if record['upload_date']:
+        record['upload_date'] = record['upload_date'].replace('-', '')[:8]
+    title = record['title']
+    if title in _PLACEHOLDER_TITLES:
+        record['title'] = None
+    elif title and platform == 'vimeo':
+        record['title'] = _TITLE_SUFFIX_RE.sub('', title)
+
+    query = _text(row.get('query')) or query
+    query = _SITE_PREFIX_RE.sub('', query) if query else None
+    record['queries'] = [query] if query else []
+    if keywords is not None and not (emotion or subject or setting):
+        emotion, subject, setting = keywords.split(query) or (None, None, None)
+    record['emotions'] = [emotion] if emotion else []
+    record['terms'] = [[emotion, subject, setting]] if emotion or subject or setting else []
+    record['first_seen'] = _timestamp(row.get('scraped_at')) or seen_at
+    record['sources'] = [source]
+    return record
+
+
+def merge_records(base: Dict, other: Dict) -> Dict:
+    """
+    Voeg twee records met dezelfde video_key samen (in place in base)
+
+    Lege velden worden aangevuld, lijsten verenigd (queries en terms tot MAX_QUERIES) en first_seen is het vroegste tijdstip.
+    """
+    for field in _DETAIL_FIELDS + _NUMBER_FIELDS + ('platform', 'url'):
+        if base.get(field) is None and other.get(field) is not None:
+            base[field] = other[field]
+    for field in _LIST_FIELDS:
+        values = base.setdefault(field, [])
+        for value in other.get(field) or []:
+            if value not in values and (field not in _CAPPED_FIELDS or len(values) < MAX_QUERIES):
+                values.append(value)
+    if other.get('first_seen') and (not base.get('first_seen') or other['first_seen'] < base['first_seen']):
+        base['first_seen'] = other['first_seen']
+    return base
+
+
+def _platform_from_name(path: str) -> Optional[str]:
+    name = os.path.basename(path).lower()
+    for platform in ('youtube', 'vimeo', 'pexels'):
+        if name.startswith(platform):
+            return platform
+    return None
+
+
+def _iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator:
+    """Elementen van een JSON array één voor één, zonder het hele bestand in te lezen"""
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as f:
+        buffer = f.read(chunk_size)
+        pos = len(buffer) - len(buffer.lstrip())
+        if buffer[pos:pos + 1] != '[':
+            raise ValueError(f"{path} is not a JSON array")
+        pos += 1
+        eof = False
+        while True:
+            # Whitespace en ',' tussen elementen overslaan
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ','):
+                pos += 1
+            if pos < len(buffer):
+                if buffer[pos] == ']':
+                    return
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Element loopt door in het volgende blok (of het bestand is afgekapt)
+                    if eof:
+                        raise
+                else:
+                    yield element
+                    pos = end
+                    continue
+            elif eof:
+                raise ValueError(f"{path} ends before the closing ']'")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def _iter_builder_json(path: str, source: str) -> Iterator[Dict]:
+    """Video's uit results_batch_*.json / final_results.json (lijst van query resultaten)"""
+    for result in _iter_json_array(path):
+        if not isinstance(result, dict):
+            continue
+        for video in result.get('videos') or []:
+            if isinstance(video, dict):
+                record = normalize_record(video, source, query=result.get('query'), emotion=result.get('emotion'),
+                                          subject=result.get('subject'), setting=result.get('setting'),
+                                          seen_at=_timestamp(result.get('timestamp')))
+                if record is not None:
+                    yield record
+
+
+def _iter_csv(path: str, source: str, keywords: Optional[KeywordTerms] = None) -> Iterator[Dict]:
+    platform = _platform_from_name(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            record = normalize_record(row, source, platform=platform, keywords=keywords)
+            if record is not None:
+                yield record
+
+
+def _iter_xlsx(path: str, source: str, keywords: Optional[KeywordTerms] = None) -> Iterator[Dict]:
+    from openpyxl import load_workbook
+
+    platform = _platform_from_name(path)
+    # read_only streamt de rijen i.p.v. het hele werkblad op te bouwen
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(name) if name is not None else '' for name in header]
+        for values in rows:
+            record = normalize_record(dict(zip(header, values)), source, platform=platform, keywords=keywords)
+            if record is not None:
+                yield record
+    finally:
+        workbook.close()
+
+
+def iter_records(path: str, keywords: Optional[KeywordTerms] = None) -> Iterator[Dict]:
+    """
+    Records in het unified schema uit één output bestand (formaat volgt uit de extensie)
+
+    :param keywords: Termen om de queries van CSV/XLSX rijen terug te splitsen (builder JSON heeft ze al)
+    """
+    source = os.path.basename(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        return _iter_builder_json(path, source)
+    if extension == '.csv':
+        return _iter_csv(path, source, keywords)
+    if extension == '.xlsx':
+        return _iter_xlsx(path, source, keywords)
+    raise ValueError(f"Unsupported input format: {path}")
+
+
+def _read_jsonl(path: str) -> Iterator[Dict]:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class DatasetCompactor:
+    """
+    Voegt alle scraper outputs samen tot één gededupliceerde store in het unified schema
+
+    Bounded memory via een external merge sort: records worden per chunk_size op video_key gesorteerd
+    naar tijdelijke run bestanden geschreven, daarna worden de runs en de bestaande store (al gesorteerd)
+    met heapq.merge samengevoegd en per video_key gemerged. Er staat dus nooit meer dan één chunk in het geheugen.
+
+    Incrementeel: manifest.json onthoudt grootte en mtime van elk verwerkt bestand; een volgende run leest
+    alleen nieuwe of gewijzigde bestanden. Een gewijzigd bestand (bijv. een CSV waar de scraper achter
+    plakt) wordt helemaal opnieuw gelezen; mergen is idempotent, dus dat levert geen dubbele records op.
+    Wijzigt de keywords CSV, dan worden alle CSV/XLSX outputs opnieuw gelezen voor hun termen.
+    """
+
+    def __init__(self, output_dir: str = 'data/compacted', chunk_size: int = 50000,
+                 keywords_file: Optional[str] = DEFAULT_KEYWORDS):
+        """
+        :param output_dir: Map voor videos.jsonl (canonieke store), videos.csv (export) en manifest.json
+        :param chunk_size: Records per gesorteerde run; bepaalt het geheugengebruik
+        :param keywords_file: Keywords CSV om de termen van CSV/XLSX rijen uit hun query af te leiden
+            (None of niet gevonden = alleen de termen uit builder JSON)
+        """
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.keywords_file = keywords_file if keywords_file and os.path.exists(keywords_file) else None
+        self.keywords = KeywordTerms.from_csv(self.keywords_file) if self.keywords_file else None
+        self.store_path = os.path.join(output_dir, 'videos.jsonl')
+        self.csv_path = os.path.join(output_dir, 'videos.csv')
+        self.manifest_path = os.path.join(output_dir, 'manifest.json')
+        self.logger = LoggerConfig.setup_logger(__name__)
+        self.stats = ScraperStats('compaction', [
+            'files_read', 'files_skipped', 'records_read', 'runs_written', 'videos_stored', 'videos_new'
+        ])
+        if keywords_file and self.keywords_file is None:
+            self.logger.warning(f"Keywords file {keywords_file} not found: CSV/XLSX rows get no terms")
+
+    def _load_manifest(self) -> Dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_manifest(self, files: Dict[str, Dict]):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'compacted_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'keywords': self._keywords_fingerprint(),
+                       'files': files}, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _keywords_fingerprint(self) -> Optional[Dict]:
+        if self.keywords_file is None:
+            return None
+        return {'path': os.path.abspath(self.keywords_file), **self._fingerprint(self.keywords_file)}
+
+    @staticmethod
+    def _fingerprint(path: str) -> Dict:
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def pending_files(self, patterns: Iterable[str], full: bool = False) -> List[str]:
+        """Bestanden die nieuw of gewijzigd zijn sinds de vorige compaction (alles met full=True)"""
+        manifest = {} if full else self._load_manifest()
+        keywords_changed = manifest.get('keywords') != self._keywords_fingerprint()
+        manifest = manifest.get('files', {})
+        paths = sorted({path for pattern in patterns for path in glob.glob(pattern) if os.path.isfile(path)})
+        pending = []
+        for path in paths:
+            known = manifest.get(os.path.abspath(path))
+            fingerprint = self._fingerprint(path)
+            unchanged = known and known['size'] == fingerprint['size'] and known['mtime_ns'] == fingerprint['mtime_ns']
+            # CSV/XLSX termen komen uit de keywords CSV: die gewijzigd = opnieuw lezen
+            if unchanged and not (keywords_changed and os.path.splitext(path)[1].lower() in ('.csv', '.xlsx')):
+                self.stats.inc('files_skipped')
+                continue
+            pending.append(path)
+        return pending
+
+    def _write_run(self, chunk: List[Dict], run_dir: str) -> str:
+        chunk.sort(key=lambda record: record['video_key'])
+        path = os.path.join(run_dir, f"run_{self.stats['runs_written']:05d}.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in chunk:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.stats.inc('runs_written')
+        return path
+
+    def _sorted_runs(self, paths: List[str], run_dir: str) -> Dict:
+        """Lees de bestanden en schrijf gesorteerde runs; geeft de run paden en het aantal records per bestand terug"""
+        runs = []
+        counts = {}
+        chunk: List[Dict] = []
+        for path in paths:
+            count = 0
+            try:
+                for record in iter_records(path, self.keywords):
+                    chunk.append(record)
+                    count += 1
+                    if len(chunk) >= self.chunk_size:
+                        runs.append(self._write_run(chunk, run_dir))
+                        chunk = []
+            except (OSError, ValueError) as e:
+                # Een half geschreven batch bestand mag de rest niet tegenhouden; volgende run opnieuw
+                self.logger.error(f"Could not read {path}: {e}")
+                continue
+            counts[path] = count
+            self.stats.inc('files_read')
+            self.stats.inc('records_read', count)
+            self.logger.info(f"Read {count} records from {path}")
+        if chunk:
+            runs.append(self._write_run(chunk, run_dir))
+        return {'runs': runs, 'counts': counts}
+
+    def _write_store(self, runs: List[str]):
+        """Merge de runs met de bestaande store naar een nieuwe store (atomic replace van videos.jsonl en videos.csv)"""
+        streams = [_read_jsonl(path) for path in runs]
+        has_store = os.path.exists(self.store_path)
+        if has_store:
+            # De bestaande store eerst, zodat zijn waarden bij een conflict voorgaan
+            streams.insert(0, ({**record, '_stored': True} for record in _read_jsonl(self.store_path)))
+        merged = heapq.merge(*streams, key=lambda record: record['video_key'])
+
+        tmp_store = self.store_path + '.tmp'
+        tmp_csv = self.csv_path + '.tmp'
+        with open(tmp_store, 'w', encoding='utf-8') as store, open(tmp_csv, 'w', newline='', encoding='utf-8') as export:
+            writer = csv.DictWriter(export, fieldnames=STORE_FIELDS)
+            writer.writeheader()
+            for _, group in groupby(merged, key=lambda record: record['video_key']):
+                record = next(group)
+                for other in group:
+                    merge_records(record, other)
+                if not record.pop('_stored', False):
+                    self.stats.inc('videos_new')
+                record = {field: record.get(field) for field in STORE_FIELDS}
+                store.write(json.dumps(record, ensure_ascii=False) + '\n')
+                row = {**record, **{field: '|'.join(record[field] or []) for field in _LIST_FIELDS if field != 'terms'}}
+                row['terms'] = '|'.join('/'.join(term or '' for term in terms) for terms in record['terms'] or [])
+                writer.writerow(row)
+                self.stats.inc('videos_stored')
+        os.replace(tmp_store, self.store_path)
+        os.replace(tmp_csv, self.csv_path)
+
+    def compact(self, patterns: Iterable[str] = DEFAULT_INPUTS, full: bool = False) -> Dict:
+        """
+        Verwerk de nieuwe/gewijzigde bestanden in de store
+
+        :param patterns: Glob patronen van de inputs
+        :param full: Manifest en bestaande store negeren en alles opnieuw opbouwen
+        :return: Stats snapshot
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        if full:
+            for path in (self.store_path, self.csv_path, self.manifest_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        paths = self.pending_files(patterns, full=full)
+        if not paths:
+            self.logger.info("Nothing to compact: no new or changed files")
+            return self.stats.snapshot()
+        self.logger.info(f"Compacting {len(paths)} file(s) into {self.store_path}")
+
+        start = time.perf_counter()
+        run_dir = tempfile.mkdtemp(prefix='runs_', dir=self.output_dir)
+        try:
+            result = self._sorted_runs(paths, run_dir)
+            self._write_store(result['runs'])
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+        # Pas na een geslaagde store write in het manifest, anders leest de volgende run ze opnieuw
+        files = {} if full else self._load_manifest().get('files', {})
+        for path, count in result['counts'].items():
+            files[os.path.abspath(path)] = {**self._fingerprint(path), 'records': count}
+        self._write_manifest(files)
+
+        self.logger.info(
+            f"Compaction done in {time.perf_counter() - start:.1f}s: {self.stats['records_read']} records -> "
+            f"{self.stats['videos_stored']} videos ({self.stats['videos_new']} new)"
+        )
+        return self.stats.snapshot()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge all scraper outputs into one deduplicated video store")
+    parser.add_argument("--inputs", nargs="+", default=DEFAULT_INPUTS, help="Input files or glob patterns")
+    parser.add_argument("--output-dir", default="data/compacted", help="Directory for the compacted store")
+    parser.add_argument("--keywords", default=DEFAULT_KEYWORDS,
+                        help="Keywords CSV the scrapers built their queries from (terms for CSV/XLSX rows)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Records per sorted run (bounds memory)")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and rebuild the store from scratch")
+    parser.add_argument("--index", action="store_true", help="Rebuild the SQLite query index (video_index.py) afterwards")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    compactor = DatasetCompactor(output_dir=args.output_dir, chunk_size=args.chunk_size, keywords_file=args.keywords)
+    compactor.compact(args.inputs, full=args.full)
+
+    if args.index:
+        from video_index import VideoIndex
+
+        index = VideoIndex(os.path.join(args.output_dir, 'videos.db'))
+        if index.is_stale(compactor.store_path):
+            index.build(compactor.store_path)
+
+
+if __name__ == "__main__":
+    main()
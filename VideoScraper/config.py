@@ -2,28 +2,175 @@ import logging
 import os
 from datetime import datetime
 
+# Standaard LogRecord attributen; alles daarbuiten komt uit extra={...} en gaat mee in de JSON events
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def _queue_handler(log_queue):
+    """
+    QueueHandler die alleen het bericht (en een eventuele traceback) uitrekent
+
+    De standaard prepare() formatteert elk record volledig op de aanroepende thread; dat is hier
+    niet nodig omdat de listener het formatteren doet. Net als de standaard werkt prepare() op een
+    kopie, zodat andere handlers van hetzelfde record de originele args en exc_info houden.
+    """
+    import copy
+    from logging.handlers import QueueHandler
+
+    class _PreparedQueueHandler(QueueHandler):
+        def prepare(self, record):
+            record = copy.copy(record)
+            record.message = record.getMessage()
+            record.msg = record.message
+            record.args = None
+            if record.exc_info:
+                record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+                record.exc_info = None
+            return record
+
+    return _PreparedQueueHandler(log_queue)
+
+
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Eén JSON object per regel; velden uit extra={...} worden meegenomen als gestructureerde event data"""
+
+    def __init__(self):
+        super().__init__()
+        import json
+        self._dumps = json.dumps
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'func': record.funcName,
+            'line': record.lineno,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_text:
+            event['exc'] = record.exc_text
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                event[key] = value
+        return self._dumps(event, ensure_ascii=False, default=str)
+
+
 class LoggerConfig:
     """Centralized logging configuration"""
-    
+
+    # Queued mode (zie configure): gedeelde QueueHandler en de listener thread die naar disk schrijft
+    _queue_handler = None
+    _listener = None
+    _loggers = set()
+
+    @classmethod
+    def configure(cls, log_dir: str = 'logs', json_format: bool = False, max_bytes: int = 10 * 1024 * 1024,
+                  backup_count: int = 5, console_level: int = logging.INFO):
+        """
+        Zet queued logging aan voor deze run
+
+        Loggers schrijven alleen nog een record in een queue (microseconden); een QueueListener
+        op een achtergrond thread schrijft naar één gedeelde set bestanden per run, die op grootte
+        roteren. Loggers die al via setup_logger aangemaakt zijn worden omgezet.
+
+        :param log_dir: Directory voor log files
+        :param json_format: Bestanden als JSON lines (gestructureerde events) i.p.v. tekst
+        :param max_bytes: Grootte waarop een log file roteert
+        :param backup_count: Aantal geroteerde files dat bewaard blijft
+        :param console_level: Level voor de console output
+        """
+        import atexit
+        import queue
+        from logging.handlers import QueueListener, RotatingFileHandler
+
+        cls.shutdown()
+        os.makedirs(log_dir, exist_ok=True)
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        ext = 'jsonl' if json_format else 'log'
+        if json_format:
+            file_formatter = JsonFormatter()
+        else:
+            file_formatter = logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s',
+                datefmt='%Y-%m-%d %H:%M:%S'
+            )
+
+        file_handler = RotatingFileHandler(f'{log_dir}/scraper_{timestamp}.{ext}', maxBytes=max_bytes,
+                                           backupCount=backup_count, encoding='utf-8')
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(file_formatter)
+
+        error_handler = RotatingFileHandler(f'{log_dir}/errors_{timestamp}.{ext}', maxBytes=max_bytes,
+                                            backupCount=backup_count, encoding='utf-8')
+        error_handler.setLevel(logging.ERROR)
+        error_handler.setFormatter(file_formatter)
+
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(console_level)
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S'))
+
+        log_queue = queue.SimpleQueue()
+        cls._queue_handler = _queue_handler(log_queue)
+        cls._listener = QueueListener(log_queue, file_handler, error_handler, console_handler,
+                                      respect_handler_level=True)
+        cls._listener.start()
+        atexit.register(cls.shutdown)
+
+        for name in cls._loggers:
+            logger = logging.getLogger(name)
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+                handler.close()
+            logger.addHandler(cls._queue_handler)
+
+    @classmethod
+    def shutdown(cls):
+        """Stop de listener thread; wacht tot alle records in de queue geschreven zijn"""
+        if cls._listener is None:
+            return
+        cls._listener.stop()
+        for handler in cls._listener.handlers:
+            handler.close()
+        cls._listener = None
+
     @staticmethod
     def setup_logger(name: str, log_dir: str = 'logs') -> logging.Logger:
         """
         Setup logger met file en console handlers
-        
+
+        In queued mode (LoggerConfig.configure, of SCRAPER_LOG_MODE=queue/json) krijgt de logger
+        alleen de gedeelde QueueHandler.
+
         :param name: Logger naam (meestal __name__ van module)
         :param log_dir: Directory voor log files
         :return: Configured logger
         """
+        mode = os.environ.get('SCRAPER_LOG_MODE', '').lower()
+        if LoggerConfig._listener is None and mode in ('queue', 'json'):
+            LoggerConfig.configure(log_dir=log_dir, json_format=mode == 'json')
+
         # Maak log directory
         os.makedirs(log_dir, exist_ok=True)
         
         # Logger instance
         logger = logging.getLogger(name)
         logger.setLevel(logging.DEBUG)  # Capture everything
+        LoggerConfig._loggers.add(name)
         
         # Voorkom duplicate handlers
         if logger.handlers:
             return logger
+
+        if LoggerConfig._listener is not None:
+            logger.addHandler(LoggerConfig._queue_handler)
+            logger.debug(f"Logger '{name}' initialized (queued)")
+            return logger
         
         # Timestamp voor log files
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
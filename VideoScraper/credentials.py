@@ -0,0 +1,237 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from config import LoggerConfig
+from metrics import ScraperStats
+from blocking import PlatformBlocked
+
+# Omgevingsvariabelen (ook uit .env): meerdere waarden gescheiden door ';' (',' mag ook bij API keys)
+PEXELS_KEYS_ENV = 'PEXELS_API_KEYS'
+PEXELS_KEY_ENV = 'PEXELS_API_KEY'
+COOKIES_ENV = 'YTDLP_COOKIES'
+
+
+class Credential:
+    """
+    Eén API key of cookie bron met zijn gebruik en throttle state
+
+    kind is 'api_key' (secret = de key), 'cookiefile' (secret = pad naar een Netscape cookies.txt)
+    of 'browser' (secret = yt-dlp cookiesfrombrowser tuple, bijv. ('chrome', 'Profile 1')).
+    label komt in logs en snapshots; de secret zelf nooit.
+    """
+    __slots__ = ('kind', 'secret', 'label', 'in_flight', 'uses', 'strikes', 'until', 'reason')
+
+    def __init__(self, kind: str, secret: Any, label: str):
+        self.kind = kind
+        self.secret = secret
+        self.label = label
+        self.in_flight = 0   # Leases die nu lopen
+        self.uses = 0        # Afgeronde leases
+        self.strikes = 0     # Blokkades op rij (bepaalt de backoff)
+        self.until = 0.0     # Cooldown tot (time.monotonic)
+        self.reason = ''     # Laatste blokkade
+
+    @classmethod
+    def api_key(cls, key: str) -> 'Credential':
+        from quota import key_id
+
+        return cls('api_key', key, f"key:{key_id(key)}")
+
+    @classmethod
+    def cookies(cls, spec: str) -> 'Credential':
+        """
+        Cookie bron uit een spec: een bestaand bestand (of *.txt) is een cookies.txt, anders
+        'browser' of 'browser:profiel' zoals bij yt-dlp --cookies-from-browser
+        """
+        spec = spec.strip()
+        if os.path.isfile(spec) or spec.lower().endswith('.txt'):
+            return cls('cookiefile', spec, f"file:{os.path.basename(spec)}")
+        browser, _, profile = spec.partition(':')
+        secret = (browser.strip().lower(), profile.strip()) if profile.strip() else (browser.strip().lower(),)
+        return cls('browser', secret, f"browser:{':'.join(secret)}")
+
+    def ytdlp_options(self) -> Dict[str, Any]:
+        """Opties voor yt_dlp.YoutubeDL om met deze cookies te werken"""
+        if self.kind == 'cookiefile':
+            return {'cookiefile': self.secret}
+        if self.kind == 'browser':
+            return {'cookiesfrombrowser': self.secret}
+        return {}
+
+
+class CredentialPool:
+    """
+    Verdeelt requests over meerdere credentials van één platform
+
+    acquire() geeft per request de minst belaste gezonde credential: eerst de minste lopende leases,
+    dan de kortste wachttijd (bijv. tot de QuotaManager de key weer toelaat), dan het minste gebruik.
+    Een geblokkeerde credential (429, quota op, bot-check) gaat alleen zelf in cooldown, met exponentiële
+    backoff net als CooldownTracker; de rest van de pool werkt door. Pas als alle credentials in cooldown
+    staan komt er een PlatformBlocked met de tijd tot de eerste weer beschikbaar is, zodat de platform
+    cooldown het overneemt. Met N credentials schaalt de throughput zo ongeveer met N.
+    """
+
+    def __init__(self, platform: str, credentials: Iterable[Credential], base_cooldown: float = 60.0,
+                 max_cooldown: float = 1800.0):
+        """
+        :param platform: Naam in PlatformBlocked, logs en de metrics
+        :param credentials: API keys of cookie bronnen (dubbele labels worden één credential)
+        :param base_cooldown: Eerste cooldown van een geblokkeerde credential in seconden
+        :param max_cooldown: Bovengrens van de backoff
+        """
+        self.platform = platform
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.logger = LoggerConfig.setup_logger(__name__)
+        self._lock = threading.Lock()
+        self._credentials: List[Credential] = list({c.label: c for c in credentials}.values())
+        self.stats = ScraperStats(f'{platform}_credentials', ['leases', 'blocked', 'exhausted'])
+
+    def __len__(self) -> int:
+        return len(self._credentials)
+
+    def healthy(self) -> int:
+        """Aantal credentials dat nu niet in cooldown staat"""
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for credential in self._credentials if credential.until <= now)
+
+    def retry_after(self) -> float:
+        """Seconden tot er een credential beschikbaar is (0 = nu)"""
+        now = time.monotonic()
+        with self._lock:
+            return max(min((c.until for c in self._credentials), default=now) - now, 0.0)
+
+    def acquire(self, wait_time: Optional[Callable[[Credential], float]] = None) -> Credential:
+        """
+        Neem de minst belaste gezonde credential; na gebruik altijd release()
+
+        :param wait_time: Seconden tot de credential een request mag doen (math.inf = voorlopig niet)
+        :raises PlatformBlocked: Alle credentials staan in cooldown
+        :raises RuntimeError: De pool is leeg
+        """
+        if not self._credentials:
+            raise RuntimeError(f"No credentials configured for {self.platform}")
+        now = time.monotonic()
+        with self._lock:
+            candidates = [c for c in self._credentials if c.until <= now]
+            if not candidates:
+                retry_after = min(c.until for c in self._credentials) - now
+                self.stats.inc('exhausted')
+                raise PlatformBlocked(self.platform, f"all {len(self._credentials)} credentials cooling down",
+                                      retry_after)
+            if wait_time is None:
+                credential = min(candidates, key=lambda c: (c.in_flight, c.uses))
+            else:
+                credential = min(candidates, key=lambda c: (c.in_flight, wait_time(c), c.uses))
+            credential.in_flight += 1
+        self.stats.inc('leases')
+        return credential
+
+    def release(self, credential: Credential, blocked: Optional[PlatformBlocked] = None) -> float:
+        """
+        Geef een lease terug; met `blocked` gaat de credential in cooldown
+
+        :return: Cooldown in seconden (0 als de request slaagde)
+        """
+        with self._lock:
+            credential.in_flight -= 1
+            credential.uses += 1
+            if blocked is None:
+                credential.strikes = 0
+                return 0.0
+            credential.strikes += 1
+            cooldown = min(self.base_cooldown * 2 ** (credential.strikes - 1), self.max_cooldown)
+            if blocked.retry_after is not None:
+                cooldown = max(cooldown, blocked.retry_after)
+            credential.until = max(credential.until, time.monotonic() + cooldown)
+            credential.reason = blocked.reason
+
+        self.stats.inc('blocked')
+        self.logger.warning(f"{self.platform} {credential.label} blocked ({blocked.reason}), strike "
+                            f"{credential.strikes}: cooling down for {cooldown:.0f}s, {self.healthy()} left")
+        return cooldown
+
+    @contextmanager
+    def lease(self, wait_time: Optional[Callable[[Credential], float]] = None) -> Iterator[Credential]:
+        """acquire/release rond een blok; een PlatformBlocked uit het blok zet de credential in cooldown"""
+        credential = self.acquire(wait_time)
+        try:
+            yield credential
+        except PlatformBlocked as e:
+            self.release(credential, e)
+            raise
+        except BaseException:
+            self.release(credential)
+            raise
+        self.release(credential)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """State per credential label (voor logs en de benchmark)"""
+        now = time.monotonic()
+        with self._lock:
+            return {c.label: {'in_flight': c.in_flight, 'uses': c.uses, 'strikes': c.strikes,
+                              'cooldown_s': round(max(c.until - now, 0.0), 1), 'reason': c.reason}
+                    for c in self._credentials}
+
+
+@contextmanager
+def youtube_dl(opts: Dict[str, Any], cookies: Optional[CredentialPool] = None):
+    """
+    yt_dlp.YoutubeDL met het minst belaste gezonde cookie profiel uit de pool (zonder pool: zonder cookies)
+
+    Een PlatformBlocked uit het blok (zie blocking.ytdlp_extract) zet dat profiel in cooldown.
+    """
+    import yt_dlp
+
+    if cookies is None:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            yield ydl
+        return
+    with cookies.lease() as credential, yt_dlp.YoutubeDL({**opts, **credential.ytdlp_options()}) as ydl:
+        yield ydl
+
+
+def next_credential_on_block(pool: Optional[CredentialPool], func: Callable, *args, **kwargs):
+    """
+    Roep func opnieuw aan zolang er na een geblokkeerde credential nog een gezonde over is
+
+    :raises PlatformBlocked: Geen pool, of geen gezonde credential meer
+    """
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except PlatformBlocked as e:
+            if pool is None or not pool.healthy():
+                raise
+            pool.logger.warning(f"{pool.platform} blocked a credential ({e.reason}), retrying with the next one")
+
+
+def _split(value: Optional[str], separators: str = ';') -> List[str]:
+    for separator in separators[1:]:
+        value = (value or '').replace(separator, separators[0])
+    return [part.strip() for part in (value or '').split(separators[0]) if part.strip()]
+
+
+def pexels_pool_from_env(**options) -> CredentialPool:
+    """Pexels keys uit PEXELS_API_KEYS (meerdere) en/of PEXELS_API_KEY; options gaan naar CredentialPool"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    keys = _split(os.getenv(PEXELS_KEYS_ENV), ';,') + _split(os.getenv(PEXELS_KEY_ENV))
+    return CredentialPool('pexels', [Credential.api_key(key) for key in keys], **options)
+
+
+def cookie_pool_from_env(platform: str = 'youtube', **options) -> CredentialPool:
+    """
+    Cookie bronnen voor yt-dlp uit YTDLP_COOKIES, bijv. 'cookies/a.txt;firefox;chrome:Profile 1'
+
+    Leeg als de variabele niet gezet is (dan zonder cookies, zoals voorheen).
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return CredentialPool(platform, [Credential.cookies(spec) for spec in _split(os.getenv(COOKIES_ENV))], **options)
@@ -0,0 +1,378 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from config import LoggerConfig
+from metrics import REGISTRY, BYTES, ScraperStats
+from http_clients import get_session
+from blocking import ytdlp_extract
+
+if TYPE_CHECKING:
+    from credentials import CredentialPool
+
+# Standaard result store: de CSV's die de scrapers schrijven
+DEFAULT_INPUTS = [
+    'data/results/pexels_videos_scraped.csv',
+    'data/results/youtube_videos_scraped.csv',
+    'data/vimeo_videos_scraped.csv',
+]
+
+# Hosts waarvoor een pagina URL via yt-dlp gedownload moet worden i.p.v. direct HTTP
+YTDLP_HOSTS = {
+    'youtube.com': 'youtube',
+    'youtu.be': 'youtube',
+    'vimeo.com': 'vimeo',
+}
+
+
+def platform_for_url(url: str) -> str:
+    host = urlparse(url).hostname or ''
+    for suffix, platform in YTDLP_HOSTS.items():
+        if host.endswith(suffix):
+            return platform
+    return 'pexels' if host.endswith('pexels.com') else 'direct'
+
+
+class DownloadError(Exception):
+    """Download mislukt of bestand kwam niet door de verificatie"""
+
+
+class VideoDownloader:
+    """
+    Parallelle, hervatbare downloader voor de verzamelde video URLs
+
+    - begrensde pool van workers + limiet per host
+    - directe links (Pexels mp4) via HTTP Range hervatten vanaf het .part bestand
+    - YouTube/Vimeo pagina's via yt-dlp (dat zelf .part bestanden hervat)
+    - content-addressed opslag (sha256) zodat dezelfde inhoud maar één keer op disk staat
+    - manifest.jsonl houdt bij wat al binnen is, zodat een volgende run verder gaat
+    """
+
+    def __init__(self, output_dir: str = 'data/videos', max_workers: int = 8, per_host_limit: int = 2,
+                 chunk_size: int = 1 << 16, timeout: float = 30.0, verify_container: bool = True,
+                 max_attempts: int = 3, cookies: Optional['CredentialPool'] = None):
+        """
+        :param output_dir: Map voor de video's, .part bestanden en het manifest
+        :param max_workers: Maximaal aantal gelijktijdige downloads
+        :param per_host_limit: Maximaal aantal gelijktijdige downloads per host
+        :param chunk_size: Bytes per gelezen chunk
+        :param timeout: Connect/read timeout in seconden
+        :param verify_container: Controleer de 'ftyp' header van mp4/mov bestanden
+        :param max_attempts: Pogingen per directe link; elke nieuwe poging hervat vanaf het .part bestand
+        :param cookies: Cookie profielen voor YouTube downloads via yt-dlp, per download het minst belaste
+            gezonde profiel (default: YTDLP_COOKIES uit de omgeving, niet gezet = zonder cookies)
+        """
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.verify_container = verify_container
+        self.max_attempts = max_attempts
+        self.logger = LoggerConfig.setup_logger(__name__)
+        if cookies is None:
+            from credentials import cookie_pool_from_env
+
+            cookies = cookie_pool_from_env('youtube')
+        self.cookies = cookies if len(cookies) else None
+
+        self.parts_dir = os.path.join(output_dir, 'parts')
+        self.manifest_path = os.path.join(output_dir, 'manifest.jsonl')
+        os.makedirs(self.parts_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+        self.stats = ScraperStats('downloader', [
+            "downloaded",
+            "skipped",
+            "deduplicated",
+            "resumed",
+            "failed",
+            "bytes",
+        ])
+
+        self.done_urls = set()
+        self.known_hashes = {}
+        self._load_manifest()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                self.done_urls.add(entry['url'])
+                self.known_hashes[entry['sha256']] = entry['path']
+        self.logger.info(f"Manifest loaded: {len(self.done_urls)} URLs already downloaded")
+
+    def _write_manifest(self, entry: Dict):
+        with self._lock:
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def _get_session(self):
+        """Eén gedeelde session met een pool zo groot als het aantal workers"""
+        return get_session('downloader', pool_connections=self.max_workers, pool_maxsize=self.max_workers,
+                           timeout=self.timeout, allowed_methods=('GET', 'HEAD'))
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).hostname or ''
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    @staticmethod
+    def load_targets(paths: Iterable[str]) -> List[Dict]:
+        """
+        Lees de download targets uit de result store (CSV's met een 'url' kolom)
+
+        :param paths: CSV bestanden, niet-bestaande bestanden worden overgeslagen
+        :return: Unieke targets {url, platform, query}
+        """
+        targets = []
+        seen = set()
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    url = (row.get('url') or '').strip()
+                    if not url or url in seen:
+                        continue
+                    seen.add(url)
+                    platform = row.get('platform') or platform_for_url(url)
+                    targets.append({'url': url, 'platform': platform, 'query': row.get('query', '')})
+        return targets
+
+    def _part_path(self, url: str) -> str:
+        return os.path.join(self.parts_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.part')
+
+    def _download_http(self, url: str) -> tuple:
+        """
+        Download een directe link, hervat vanaf een bestaand .part bestand met een Range request
+
+        :return: (pad naar het complete .part bestand, extensie)
+        """
+        part_path = self._part_path(url)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        session = self._get_session()
+        with session.get(url, headers=headers, stream=True, timeout=self.timeout) as resp:
+            if resp.status_code == 416:
+                # Range voorbij het einde: .part is al compleet
+                total = offset
+                mode = None
+            elif resp.status_code == 206:
+                total = int(resp.headers.get('Content-Range', '').rsplit('/', 1)[-1] or 0) or None
+                mode = 'ab'
+                self.stats.inc('resumed')
+            else:
+                resp.raise_for_status()
+                # Server negeert Range: opnieuw beginnen
+                offset = 0
+                length = resp.headers.get('Content-Length')
+                total = int(length) if length else None
+                mode = 'wb'
+
+            if mode:
+                with open(part_path, mode) as f:
+                    for chunk in resp.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            self.stats.inc('bytes', len(chunk))
+                            REGISTRY.inc(BYTES, len(chunk), component='downloader')
+
+        size = os.path.getsize(part_path)
+        if total is not None and size != total:
+            raise DownloadError(f"Incomplete download for {url}: {size}/{total} bytes")
+
+        ext = os.path.splitext(urlparse(url).path)[1].lower() or '.mp4'
+        return part_path, ext
+
+    def _download_http_with_resume(self, url: str) -> tuple:
+        import requests
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return self._download_http(url)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, DownloadError) as e:
+                if attempt == self.max_attempts:
+                    raise
+                self.logger.warning(f"Download of {url} interrupted ({e}), resuming (attempt {attempt + 1})")
+                REGISTRY.sleep(min(2 ** attempt, 10), platform=platform_for_url(url))
+
+    def _download_ytdlp(self, url: str) -> tuple:
+        """
+        Download een YouTube/Vimeo pagina via yt-dlp (hervat zelf via .part bestanden)
+
+        YouTube gaat met een cookie profiel uit de pool; een bot-check probeert het volgende gezonde profiel.
+
+        :raises PlatformBlocked: Geblokkeerd en geen gezond cookie profiel meer over
+        """
+        from credentials import next_credential_on_block
+
+        platform = platform_for_url(url)
+        cookies = self.cookies if platform == 'youtube' else None
+        return next_credential_on_block(cookies, self._ytdlp_attempt, url, platform, cookies)
+
+    def _ytdlp_attempt(self, url: str, platform: str, cookies: Optional['CredentialPool']) -> tuple:
+        from credentials import youtube_dl
+
+        base = self._part_path(url)[:-len('.part')]
+        ydl_opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "outtmpl": base + '.%(ext)s',
+            "continuedl": True,
+            "noplaylist": True,
+        }
+        with youtube_dl(ydl_opts, cookies) as ydl:
+            info = ytdlp_extract(ydl, url, platform, download=True)
+            path = ydl.prepare_filename(info)
+
+        size = os.path.getsize(path)
+        self.stats.inc('bytes', size)
+        REGISTRY.inc(BYTES, size, component='downloader')
+        return path, os.path.splitext(path)[1].lower()
+
+    def _verify(self, path: str, ext: str):
+        size = os.path.getsize(path)
+        if size == 0:
+            raise DownloadError(f"Empty file: {path}")
+        if self.verify_container and ext in ('.mp4', '.mov', '.m4v'):
+            with open(path, 'rb') as f:
+                header = f.read(12)
+            if header[4:8] != b'ftyp':
+                raise DownloadError(f"Not an MP4/MOV container: {path}")
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def download(self, target: Dict) -> Optional[Dict]:
+        """
+        Download één target (blokkeert op de host limiet)
+
+        :return: Manifest entry, of None als de URL al eerder gedownload is
+        """
+        url = target['url']
+        if url in self.done_urls:
+            self.stats.inc('skipped')
+            return None
+
+        started = time.perf_counter()
+        with self._host_slot(url):
+            if platform_for_url(url) in ('youtube', 'vimeo'):
+                tmp_path, ext = self._download_ytdlp(url)
+            else:
+                tmp_path, ext = self._download_http_with_resume(url)
+        elapsed = time.perf_counter() - started
+
+        self._verify(tmp_path, ext)
+        sha256 = self._sha256(tmp_path)
+        size = os.path.getsize(tmp_path)
+
+        with self._lock:
+            existing = self.known_hashes.get(sha256)
+            if existing is None:
+                final_path = os.path.join(self.output_dir, sha256[:2], sha256 + ext)
+                self.known_hashes[sha256] = final_path
+            self.done_urls.add(url)
+
+        if existing is not None:
+            # Zelfde inhoud staat al op disk
+            os.remove(tmp_path)
+            final_path = existing
+            self.stats.inc('deduplicated')
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            shutil.move(tmp_path, final_path)
+            self.stats.inc('downloaded')
+
+        entry = {
+            'url': url,
+            'platform': target.get('platform'),
+            'query': target.get('query'),
+            'sha256': sha256,
+            'path': final_path,
+            'bytes': size,
+            'seconds': round(elapsed, 3),
+            'downloaded_at': datetime.now().isoformat(),
+        }
+        self._write_manifest(entry)
+        self.logger.debug(f"Downloaded {url} ({size / 1e6:.2f} MB, {size / 1e6 / max(elapsed, 1e-9):.2f} MB/s)")
+        return entry
+
+    def run(self, targets: List[Dict]) -> Dict:
+        """
+        Download alle targets met de begrensde worker pool
+
+        :return: Stats inclusief totale doorvoer in MB/s
+        """
+        pending = [t for t in targets if t['url'] not in self.done_urls]
+        self.stats.inc('skipped', len(targets) - len(pending))
+        self.logger.info(f"Downloading {len(pending)} videos ({len(targets) - len(pending)} already done), "
+                         f"{self.max_workers} workers, {self.per_host_limit} per host")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.download, target): target for target in pending}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self.stats.inc('failed')
+                    self.logger.error(f"Download failed for {futures[future]['url']}: {e}")
+
+        elapsed = time.perf_counter() - started
+        self.stats.set('seconds', round(elapsed, 3))
+        self.stats.set('mb_per_s', round(self.stats['bytes'] / 1e6 / max(elapsed, 1e-9), 2))
+
+        self.logger.info(
+            f"Downloads complete: {self.stats['downloaded']} new, {self.stats['deduplicated']} duplicate content, "
+            f"{self.stats['resumed']} resumed, {self.stats['failed']} failed - "
+            f"{self.stats['bytes'] / 1e6:.1f} MB in {elapsed:.1f}s ({self.stats['mb_per_s']} MB/s)"
+        )
+        return self.stats.snapshot()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download the collected video URLs")
+    parser.add_argument("--inputs", nargs="+", default=DEFAULT_INPUTS, help="Result CSV files with a 'url' column")
+    parser.add_argument("--output-dir", default="data/videos", help="Directory for downloaded videos")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent downloads")
+    parser.add_argument("--per-host", type=int, default=2, help="Concurrent downloads per host")
+    parser.add_argument("--platforms", nargs="+", default=None, help="Only download these platforms (e.g. pexels)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    downloader = VideoDownloader(output_dir=args.output_dir, max_workers=args.workers, per_host_limit=args.per_host)
+    targets = downloader.load_targets(args.inputs)
+    if args.platforms:
+        targets = [t for t in targets if t['platform'] in args.platforms]
+    downloader.run(targets)
+
+
+if __name__ == "__main__":
+    main()
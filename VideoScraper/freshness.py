@@ -0,0 +1,182 @@
+import glob
+import math
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import LoggerConfig
+from metrics import ScraperStats
+from compact_dataset import _iter_json_array, video_key
+
+# Builder outputs met per-query resultaten, in de volgorde waarin ze gelezen worden
+HISTORY_PATTERNS = ('results_batch_*.json', 'final_results.json', 'refresh_*.json')
+
+# Kortere intervallen zeggen niets over churn (zelfde run, retries)
+_MIN_INTERVAL_DAYS = 1 / 24
+
+
+def _fingerprint(video: Dict) -> int:
+    """Verandert als de metadata van een video verandert (titel, duur, views in grootteorde)"""
+    views = video.get('view_count')
+    magnitude = int(math.log10(views)) if isinstance(views, (int, float)) and views > 0 else None
+    return hash((video.get('title'), video.get('duration'), magnitude))
+
+
+def _video_map(videos: Iterable[Dict]) -> Dict[str, Tuple[str, int]]:
+    """video_key -> (platform, fingerprint) voor de video's van één query resultaat"""
+    mapped = {}
+    for video in videos:
+        url = video.get('url')
+        if not url:
+            continue
+        platform = video.get('platform') or ''
+        key = video_key(platform, url, video.get('page_url'))
+        if key is not None:
+            mapped[key] = (platform, _fingerprint(video))
+    return mapped
+
+
+class QueryState:
+    """Wat we van één query weten: laatste scrape, de video's van toen en de geschatte churn"""
+    __slots__ = ('query', 'last_seen', 'videos', 'churn_rate', 'observations')
+
+    def __init__(self, query: str, prior_rate: float):
+        self.query = query
+        self.last_seen: Optional[datetime] = None
+        self.videos: Dict[str, Tuple[str, int]] = {}
+        self.churn_rate = prior_rate
+        self.observations = 0
+
+    def observe(self, seen_at: datetime, videos: Dict[str, Tuple[str, int]], platforms: Iterable[str],
+                smoothing: float):
+        """
+        Verwerk een scrape (chronologisch); alleen de platforms die toen slaagden tellen mee
+
+        De churn van een interval is 1 - Jaccard tussen de oude en nieuwe video's (nieuwe of gewijzigde
+        metadata telt als verschil), omgerekend naar een rate per dag en met een EWMA gemiddeld.
+        """
+        platforms = set(platforms)
+        if self.last_seen is not None:
+            interval = (seen_at - self.last_seen).total_seconds() / 86400
+            before = {key: value for key, value in self.videos.items() if value[0] in platforms}
+            if interval >= _MIN_INTERVAL_DAYS and (before or videos):
+                same = sum(1 for key, value in videos.items() if before.get(key) == value)
+                churn = 1 - same / len(before.keys() | videos.keys())
+                rate = -math.log(max(1 - churn, 0.01)) / interval
+                self.churn_rate = smoothing * rate + (1 - smoothing) * self.churn_rate
+
+        self.videos = {key: value for key, value in self.videos.items() if value[0] not in platforms}
+        self.videos.update(videos)
+        self.last_seen = seen_at if self.last_seen is None else max(self.last_seen, seen_at)
+        self.observations += 1
+
+    def staleness(self, now: datetime) -> float:
+        """Verwachte fractie veranderde resultaten sinds de laatste scrape (1.0 = nooit gescraped)"""
+        if self.last_seen is None:
+            return 1.0
+        age = max((now - self.last_seen).total_seconds() / 86400, 0.0)
+        return 1 - math.exp(-self.churn_rate * age)
+
+
+class RefreshScheduler:
+    """
+    Kiest welke queries opnieuw gescraped moeten worden en houdt alleen nieuwe/gewijzigde video's over
+
+    Leest de eerdere builder resultaten (results_batch_*, final_results, refresh_*) en schat per query
+    hoe snel de zoekresultaten veranderen. Staleness = 1 - exp(-churn_rate * leeftijd in dagen): een query
+    met veel churn is na een paar dagen al oud, een stabiele query pas na weken. Queries zonder eerdere
+    scrape gaan altijd mee; queries met maar één scrape krijgen prior_rate als churn.
+    """
+
+    def __init__(self, prior_rate: float = 0.05, smoothing: float = 0.5):
+        """
+        :param prior_rate: Churn per dag voor queries zonder geschiedenis (0.05 = ~30% vernieuwd na een week)
+        :param smoothing: EWMA gewicht van de nieuwste churn meting
+        """
+        self.prior_rate = prior_rate
+        self.smoothing = smoothing
+        self.logger = LoggerConfig.setup_logger(__name__)
+        self.states: Dict[str, QueryState] = {}
+        self.stats = ScraperStats('refresh', ['queries_stale', 'queries_fresh', 'videos_new', 'videos_unchanged'])
+
+    def load(self, output_dir: str) -> 'RefreshScheduler':
+        """Lees de geschiedenis uit output_dir; dezelfde scrape in meerdere bestanden telt één keer"""
+        observations: Dict[str, Dict[str, Dict]] = {}
+        for pattern in HISTORY_PATTERNS:
+            for path in sorted(glob.glob(os.path.join(output_dir, pattern))):
+                try:
+                    for result in _iter_json_array(path):
+                        if not isinstance(result, dict) or 'error' in result or not result.get('timestamp'):
+                            continue
+                        observations.setdefault(result['query'], {})[result['timestamp']] = {
+                            'videos': _video_map(result.get('videos') or []),
+                            'keys': result.get('video_keys'),
+                            'platforms': list(result.get('platforms') or
+                                              {video.get('platform') for video in result.get('videos') or []}),
+                        }
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Skipping unreadable history file {path}: {e}")
+
+        for query, by_time in observations.items():
+            state = self.states[query] = QueryState(query, self.prior_rate)
+            for timestamp in sorted(by_time):
+                seen = by_time[timestamp]
+                if not seen['platforms']:
+                    continue  # Geen enkel platform slaagde: zegt niets over de actualiteit
+                videos = seen['videos']
+                if seen['keys'] is not None:
+                    # Refresh resultaten bevatten alleen de nieuwe/gewijzigde video's; de rest is ongewijzigd
+                    videos = {key: videos.get(key) or state.videos.get(key) or (key.split(':', 1)[0], 0)
+                              for key in seen['keys']}
+                state.observe(datetime.fromisoformat(timestamp), videos, seen['platforms'], self.smoothing)
+
+        self.logger.info(f"Loaded refresh history for {len(self.states)} queries from {output_dir}")
+        return self
+
+    def select(self, queries: List[Dict], threshold: float = 0.25, max_queries: Optional[int] = None,
+               now: Optional[datetime] = None) -> List[Dict]:
+        """
+        Queries die aan een refresh toe zijn, meest verouderde eerst
+
+        :param queries: Alle queries van de generator
+        :param threshold: Minimale staleness
+        :param max_queries: Budget per refresh run (None = alles boven de drempel)
+        :return: Kopieën van de query dicts met 'staleness'
+        """
+        now = now or datetime.now()
+        stale = []
+        for query_data in queries:
+            state = self.states.get(query_data['query'])
+            staleness = state.staleness(now) if state is not None else 1.0
+            if staleness >= threshold:
+                stale.append({**query_data, 'staleness': round(staleness, 3)})
+        stale.sort(key=lambda item: -item['staleness'])
+        if max_queries is not None:
+            stale = stale[:max_queries]
+
+        self.stats.inc('queries_stale', len(stale))
+        self.stats.inc('queries_fresh', len(queries) - len(stale))
+        return stale
+
+    def keep_changes(self, results: Dict) -> Dict:
+        """
+        Laat in een nieuw query resultaat alleen de nieuwe of gewijzigde video's staan (in place)
+
+        'video_keys' krijgt alle gevonden video's, zodat de volgende refresh de churn over de volledige
+        resultaten kan berekenen; 'total_videos' blijft het aantal gevonden video's.
+        """
+        state = self.states.get(results['query'])
+        known = state.videos if state is not None else {}
+        current = _video_map(results['videos'])
+        changed = []
+        for video in results['videos']:
+            key = video_key(video.get('platform') or '', video.get('url') or '', video.get('page_url'))
+            if key is None or known.get(key) != current.get(key):
+                changed.append(video)
+
+        self.stats.inc('videos_new', len(changed))
+        self.stats.inc('videos_unchanged', len(results['videos']) - len(changed))
+        results['video_keys'] = list(current)
+        results['videos'] = changed
+        results['new_videos'] = len(changed)
+        return results
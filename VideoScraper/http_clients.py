@@ -0,0 +1,118 @@
+import threading
+from typing import Dict, Iterable, Optional
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+DEFAULT_TIMEOUT = 30.0
+
+_sessions: Dict[str, 'requests.Session'] = {}
+_sessions_lock = threading.Lock()
+_adapter_class = None
+
+
+def _timeout_adapter():
+    """HTTPAdapter met een standaard timeout voor requests die er zelf geen meegeven"""
+    global _adapter_class
+    if _adapter_class is None:
+        from requests.adapters import HTTPAdapter
+
+        class TimeoutHTTPAdapter(HTTPAdapter):
+            def __init__(self, *args, timeout: Optional[float] = None, **kwargs):
+                self.timeout = timeout
+                super().__init__(*args, **kwargs)
+
+            def send(self, request, **kwargs):
+                if kwargs.get('timeout') is None:
+                    kwargs['timeout'] = self.timeout
+                return super().send(request, **kwargs)
+
+        _adapter_class = TimeoutHTTPAdapter
+    return _adapter_class
+
+
+def get_session(name: str = 'default', pool_connections: int = 10, pool_maxsize: int = 10,
+                timeout: float = DEFAULT_TIMEOUT, retries: int = 3, backoff_factor: float = 2,
+                allowed_methods: Iterable[str] = ('GET', 'POST', 'HEAD')) -> 'requests.Session':
+    """
+    Gedeelde, langlevende requests session per naam
+
+    De eerste aanroep voor een naam bepaalt de configuratie; volgende aanroepen krijgen dezelfde
+    session terug, zodat keep-alive connecties (en dus TCP/TLS handshakes) over queries hergebruikt
+    worden. De urllib3 connection pool is thread-safe; deel een session niet tussen threads als er
+    per thread andere cookies of headers nodig zijn.
+
+    :param name: Naam van de client (bijv. 'youtube', 'downloader')
+    :param pool_connections: Aantal hosts waarvoor een pool bewaard wordt
+    :param pool_maxsize: Maximaal aantal open connecties per host
+    :param timeout: Standaard timeout als een request er zelf geen meegeeft
+    :param retries: Aantal retries bij verbindingsfouten en RETRY_STATUS
+    :param backoff_factor: Wachttijd tussen retries (backoff_factor * 2^n seconden)
+    :param allowed_methods: Methodes die opnieuw geprobeerd mogen worden
+    """
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            import requests
+            from urllib3.util.retry import Retry
+
+            retry_strategy = Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=list(RETRY_STATUS),
+                allowed_methods=list(allowed_methods)
+            )
+            adapter = _timeout_adapter()(
+                max_retries=retry_strategy,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=False,
+                timeout=timeout,
+            )
+            session = requests.Session()
+            session.headers['Connection'] = 'keep-alive'
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[name] = session
+    return session
+
+
+def aiohttp_session(limit: int = 100, limit_per_host: int = 10, timeout: float = DEFAULT_TIMEOUT,
+                    ttl_dns_cache: int = 300, keepalive_timeout: float = 30.0,
+                    **kwargs) -> 'aiohttp.ClientSession':
+    """
+    aiohttp ClientSession met begrensde connector, DNS cache en keep-alive
+
+    Een aiohttp session hoort bij één event loop: maak hem binnen de running loop aan en gebruik
+    hem voor alle requests van die run (`async with aiohttp_session() as session:`).
+
+    :param limit: Maximaal aantal open connecties in totaal
+    :param limit_per_host: Maximaal aantal open connecties per host
+    :param timeout: Totale timeout per request
+    :param ttl_dns_cache: Seconden dat DNS resultaten gecached worden
+    :param keepalive_timeout: Seconden dat een idle connectie open blijft
+    """
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=ttl_dns_cache,
+        use_dns_cache=True,
+        keepalive_timeout=keepalive_timeout,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        **kwargs
+    )
+
+
+def close_all():
+    """Sluit alle gedeelde requests sessions (aan het einde van een run)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,84 @@
+import argparse
+import glob
+import os
+import timeit
+from html.parser import HTMLParser
+
+from link_extractor import extract_targets, normalize_url
+
+FIXTURES = 'data/benchmarks/html/*.html'
+
+
+def run_beautifulsoup(html, domain, max_results):
+    """Huidige aanpak uit video_api_try.VideoAPI.get_sources: volledige parse, daarna zoeken"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    urls = []
+    for tag in soup.find_all(['a', 'iframe']):
+        url = normalize_url(tag.get('href') if tag.name == 'a' else tag.get('src'))
+        if url and (domain is None or domain in url) and url not in urls:
+            urls.append(url)
+    return urls[:max_results] if max_results else urls
+
+
+class _LinkParser(HTMLParser):
+    """Aanpak uit test.py (VimeoLinkParser), zonder de class beperking"""
+
+    def __init__(self, domain):
+        super().__init__()
+        self.domain = domain
+        self.urls = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in ('a', 'iframe'):
+            return
+        attrs = dict(attrs)
+        url = normalize_url(attrs.get('href') if tag == 'a' else attrs.get('src'))
+        if url and (self.domain is None or self.domain in url) and url not in self.urls:
+            self.urls.append(url)
+
+
+def run_htmlparser(html, domain, max_results):
+    parser = _LinkParser(domain)
+    parser.feed(html)
+    return parser.urls[:max_results] if max_results else parser.urls
+
+
+def run_streaming(html, domain, max_results, chunk_size=8192):
+    chunks = (html[i:i + chunk_size] for i in range(0, len(html), chunk_size))
+    return [t['url'] for t in extract_targets(chunks, max_results=max_results, domain=domain)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark link/iframe extraction on saved HTML pages")
+    parser.add_argument('--fixtures', default=FIXTURES, help="Glob with saved result/embed pages")
+    parser.add_argument('--domain', default=None, help="Only count links to this domain")
+    parser.add_argument('--max-results', type=int, default=5, help="Early stop for the limited runs")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    implementations = [
+        ('beautifulsoup html.parser', run_beautifulsoup),
+        ('HTMLParser (test.py)', run_htmlparser),
+        ('link_extractor stream', run_streaming),
+    ]
+
+    for path in sorted(glob.glob(args.fixtures)):
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        reference = run_beautifulsoup(html, args.domain, None)
+        print(f"\n{os.path.basename(path)}: {len(html):,} characters, {len(reference)} links")
+        print(f"{'implementation':<28}{'all (ms)':>10}{f'first {args.max_results} (ms)':>16}{'same links':>12}")
+        for name, func in implementations:
+            found = func(html, args.domain, None)
+            times = []
+            for limit in (None, args.max_results):
+                best = min(timeit.repeat(lambda: func(html, args.domain, limit), number=args.number, repeat=args.repeat))
+                times.append(best / args.number * 1000)
+            print(f"{name:<28}{times[0]:>10.3f}{times[1]:>16.3f}{str(found == reference):>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+import re
+from html import unescape
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from urllib.parse import parse_qs, urljoin, urlparse, urlunparse
+
+# Eén pass over de HTML: alleen <a ...>tekst</a> en <iframe ...> zijn interessant
+_TARGET_RE = re.compile(
+    r'<a\s(?P<a_attrs>[^>]*)>(?P<text>.*?)</a\s*>|<iframe\s(?P<iframe_attrs>[^>]*)>',
+    re.IGNORECASE | re.DOTALL
+)
+# Begin van een tag die nog niet compleet in de buffer staat
+_OPEN_TAG_RE = re.compile(r'<(?:a|iframe)\s', re.IGNORECASE)
+_ATTR_RE = re.compile(r'''(href|src|class|title)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]*>')
+
+# DuckDuckGo verpakt resultaten in een redirect: //duckduckgo.com/l/?uddg=<url>&rut=...
+_DDG_REDIRECT_HOSTS = ('duckduckgo.com',)
+_EMBED_PATTERNS = [
+    (re.compile(r'^https://player\.vimeo\.com/video/(\d+)'), 'https://vimeo.com/{}'),
+    (re.compile(r'^https://(?:www\.)?youtube(?:-nocookie)?\.com/embed/([A-Za-z0-9_-]{11})'), 'https://www.youtube.com/watch?v={}'),
+]
+
+# Grootte van de rest-buffer waarna een niet-afgesloten tag als kapot beschouwd wordt
+_MAX_PENDING = 1 << 16
+
+
+def normalize_url(href: str, base_url: Optional[str] = None) -> Optional[str]:
+    """
+    Normaliseer een link uit een resultaat- of embedpagina naar een bruikbaar doel
+
+    Pakt DuckDuckGo redirects uit, maakt relatieve en protocol-relatieve links absoluut,
+    zet embed URLs (player.vimeo.com, youtube.com/embed) om naar de gewone video URL
+    en laat het fragment weg.
+
+    :return: Absolute http(s) URL, None voor javascript:, ankers en andere niet-video links
+    """
+    href = unescape(href or '').strip()
+    if not href or href.startswith(('#', 'javascript:', 'mailto:')):
+        return None
+    if href.startswith('//'):
+        href = 'https:' + href
+    elif base_url:
+        href = urljoin(base_url, href)
+
+    parsed = urlparse(href)
+    host = (parsed.hostname or '').lower()
+    if host.endswith(_DDG_REDIRECT_HOSTS):
+        target = parse_qs(parsed.query).get('uddg')
+        if not target:
+            return None
+        return normalize_url(target[0])
+    if parsed.scheme not in ('http', 'https') or not host:
+        return None
+
+    url = urlunparse(('https' if parsed.scheme == 'https' else 'http', parsed.netloc.lower(),
+                      parsed.path, parsed.params, parsed.query, ''))
+    for pattern, template in _EMBED_PATTERNS:
+        match = pattern.match(url)
+        if match:
+            return template.format(match.group(1))
+    return url
+
+
+def _attrs(raw: str) -> Dict[str, str]:
+    attrs = {}
+    for match in _ATTR_RE.finditer(raw):
+        name = match.group(1).lower()
+        if name not in attrs:
+            attrs[name] = match.group(2) if match.group(2) is not None else (
+                match.group(3) if match.group(3) is not None else match.group(4))
+    return attrs
+
+
+def iter_targets(chunks: Union[str, Iterable[str]], base_url: Optional[str] = None, domain: Optional[str] = None,
+                 tags: Iterable[str] = ('a', 'iframe'), css_class: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Stream links uit HTML in één pass; stop met itereren om het lezen (en downloaden) af te breken
+
+    :param chunks: HTML als string, of een iterable van stukken (bijv. response.iter_content(decode_unicode=True))
+    :param base_url: URL van de pagina, voor relatieve links
+    :param domain: Alleen doelen op dit domein (of subdomeinen ervan), None = alles
+    :param tags: 'a' voor resultaatlinks, 'iframe' voor embeds
+    :param css_class: Alleen <a> tags met deze class (bijv. 'result-link'), None = alle
+    :return: Iterator van {'url', 'title', 'tag'}; elke URL komt maar één keer voor
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    want_a = 'a' in tags
+    want_iframe = 'iframe' in tags
+    domain = domain.lower() if domain else None
+    seen = set()
+
+    pending = ''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer = pending + chunk
+        end = 0
+        for match in _TARGET_RE.finditer(buffer):
+            end = match.end()
+            if match.group('a_attrs') is not None:
+                if not want_a:
+                    continue
+                attrs = _attrs(match.group('a_attrs'))
+                if css_class and css_class not in (attrs.get('class') or '').split():
+                    continue
+                href, tag = attrs.get('href'), 'a'
+                title = ' '.join(unescape(_TAG_RE.sub(' ', match.group('text'))).split())
+            else:
+                if not want_iframe:
+                    continue
+                attrs = _attrs(match.group('iframe_attrs'))
+                href, tag = attrs.get('src'), 'iframe'
+                title = ' '.join(unescape(attrs.get('title') or '').split())
+
+            url = normalize_url(href, base_url)
+            if url is None or url in seen:
+                continue
+            if domain:
+                host = urlparse(url).hostname or ''
+                if host != domain and not host.endswith('.' + domain):
+                    continue
+            seen.add(url)
+            yield {'url': url, 'title': title, 'tag': tag}
+
+        # Bewaar alleen het stuk vanaf een tag die nog niet compleet is
+        rest = buffer[end:]
+        opened = None
+        for opened in _OPEN_TAG_RE.finditer(rest):
+            pass
+        if opened is not None and len(rest) - opened.start() < _MAX_PENDING:
+            pending = rest[opened.start():]
+        else:
+            last = rest.rfind('<')
+            pending = rest[last:] if last != -1 else ''
+
+
+def extract_targets(chunks: Union[str, Iterable[str]], max_results: Optional[int] = None, **kwargs) -> List[Dict]:
+    """
+    Verzamel maximaal max_results doelen uit een resultaat- of embedpagina (zie iter_targets)
+
+    De parser stopt zodra er genoeg links zijn; de rest van de pagina wordt niet meer gelezen.
+    """
+    targets = []
+    if max_results is not None and max_results <= 0:
+        return targets
+    for target in iter_targets(chunks, **kwargs):
+        targets.append(target)
+        if max_results is not None and len(targets) >= max_results:
+            break
+    return targets
@@ -1,11 +1,14 @@
 import json
 import os
 from datetime import datetime
+from collections.abc import Mapping
 from typing import List, Dict, Optional
 
 from query_generator import QueryGenerator
-from VideoScraper.youtube_scraper import VideoScraper
+from platforms import PlatformScraper
 from config import LoggerConfig
+from records import to_json
+import profiling
 
 
 class EmotionVideoDatasetBuilder:
@@ -30,8 +33,23 @@ class EmotionVideoDatasetBuilder:
         self.logger.debug("Initializing QueryGenerator...")
         self.query_generator = QueryGenerator(csv_path)
 
-        self.logger.debug("Initializing VideoScraper...")
-        self.scraper = VideoScraper(rate_limit_delay=20.0, cookies_from_browser=("firefox",))
+        # Eén near-duplicate index en thumbnail index voor alle platforms, zodat dezelfde video van
+        # YouTube, Vimeo en Pexels maar één keer in de resultaten komt. Alleen in geheugen: een refresh
+        # moet bestaande video's terugzien om wijzigingen te herkennen
+        self.logger.debug("Initializing shared duplicate indexes...")
+        from near_duplicates import NearDuplicateIndex
+        from thumbnails import ThumbnailDeduplicator
+
+        self.near_duplicates = NearDuplicateIndex()
+        self.thumbnails = ThumbnailDeduplicator(cache_dir=os.path.join(output_dir, 'thumbnails'))
+
+        self.logger.debug("Initializing PlatformScraper...")
+        shared = {'near_duplicates': self.near_duplicates}
+        self.scraper = PlatformScraper(options={
+            'youtube': {'rate_limit_delay': 20.0, **shared, 'thumbnails': self.thumbnails},
+            'vimeo': shared,
+            'pexels': {**shared, 'thumbnails': self.thumbnails},
+        })
 
         self.logger.info("=" * 70)
 
@@ -44,7 +62,8 @@ class EmotionVideoDatasetBuilder:
         start_time = datetime.now()
         self.logger.info(f"Start time: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
 
-        queries = self.query_generator.generate_all_queries(style=style)
+        with profiling.stage('query_generation'):
+            queries = self.query_generator.generate_all_queries(style=style)
 
         if not queries:
             self.logger.error("❌ Query generation failed - no queries generated")
@@ -96,9 +115,10 @@ class EmotionVideoDatasetBuilder:
 
         self.logger.info(f"Processing {len(queries_to_process):,} queries...")
 
-        for idx, query_data in enumerate(queries_to_process, start=start_from):
-            query_start = datetime.now()
-
+        # Queries lopen over alle platforms tegelijk; een geblokkeerd platform gaat in cooldown terwijl de
+        # workers de andere platforms afwerken. Resultaten komen in query volgorde terug (resume blijft kloppen).
+        completed = self.scraper.scrape_many(queries_to_process, platforms=platforms)
+        for idx, (query_data, results) in enumerate(completed, start=start_from):
             self.logger.info("")
             self.logger.info(f"{'=' * 70}")
             self.logger.info(f"Query [{idx + 1}/{len(queries)}] ({((idx + 1) / len(queries) * 100):.1f}%)")
@@ -109,12 +129,6 @@ class EmotionVideoDatasetBuilder:
             self.logger.info(f"{'=' * 70}")
 
             try:
-                # Scrape the query
-                results = self.scraper.scrape_query(
-                    query=query_data['query'],
-                    platforms=platforms
-                )
-
                 # Add metadata
                 results['query_id'] = query_data['id']
                 results['emotion'] = query_data['emotion']
@@ -125,8 +139,9 @@ class EmotionVideoDatasetBuilder:
                 all_results.append(results)
                 total_videos += results.get('total_videos', 0)
 
-                query_elapsed = (datetime.now() - query_start).total_seconds()
-                self.logger.info(f"✅ Query processed in {query_elapsed:.2f}s - Found {results.get('total_videos', 0)} videos")
+                self.logger.info(f"✅ Query processed in {results['seconds']:.2f}s - Found {results.get('total_videos', 0)} videos")
+                for platform, error in results['errors'].items():
+                    self.logger.warning(f"   {platform}: {error}")
                 self.logger.info(f"📊 Running total: {total_videos} videos from {len(all_results)} queries")
 
                 # Save intermediate results every batch_size queries
@@ -138,6 +153,7 @@ class EmotionVideoDatasetBuilder:
 
                     batch_file = f"results_batch_{idx + 1}.json"
                     self.save_results(all_results, batch_file)
+                    profiling.checkpoint(f"batch {idx + 1}")
 
                     # Log statistics
                     scraper_stats = self.scraper.get_stats()
@@ -216,8 +232,8 @@ class EmotionVideoDatasetBuilder:
             os.makedirs(self.output_dir, exist_ok=True)
 
             # Atomic write: write to temp then replace
-            with open(tmp_filepath, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
+            with profiling.stage('json_write'), open(tmp_filepath, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, ensure_ascii=False, default=to_json)
 
             os.replace(tmp_filepath, filepath)
 
@@ -225,10 +241,10 @@ class EmotionVideoDatasetBuilder:
             self.logger.info(f"✅ Saved successfully ({file_size / 1024:.2f} KB)")
 
             # Lightweight summary
-            errors = sum(1 for r in results if isinstance(r, dict) and 'error' in r)
+            errors = sum(1 for r in results if isinstance(r, Mapping) and 'error' in r)
             total_videos = 0
             for r in results:
-                if isinstance(r, dict):
+                if isinstance(r, Mapping):
                     total_videos += int(r.get('total_videos', 0) or 0)
 
             self.logger.info(f"📄 Summary in file:")
@@ -250,6 +266,67 @@ class EmotionVideoDatasetBuilder:
 
             return None
 
+    def refresh(
+        self,
+        style: str = 'simple',
+        platforms: List[str] = ['youtube'],
+        threshold: float = 0.25,
+        max_queries: Optional[int] = None,
+        batch_size: int = 100
+    ) -> List[Dict]:
+        """
+        Scrape alleen verouderde queries opnieuw en bewaar alleen nieuwe of gewijzigde video's
+
+        Welke queries verouderd zijn volgt uit de leeftijd van hun laatste resultaat en hoe sterk hun
+        resultaten eerder veranderden (zie freshness.RefreshScheduler). Output: refresh_<timestamp>.json
+        met hetzelfde formaat als final_results.json, plus 'video_keys' (alle gevonden video's) en 'new_videos'.
+        """
+        from freshness import RefreshScheduler
+
+        self.logger.info("=" * 70)
+        self.logger.info("REFRESH: RE-SCRAPING STALE QUERIES")
+        self.logger.info("=" * 70)
+
+        queries = self.generate_queries(style=style)
+        if not queries:
+            self.logger.error("❌ Aborting refresh - no queries generated.")
+            return []
+
+        scheduler = RefreshScheduler().load(self.output_dir)
+        stale = scheduler.select(queries, threshold=threshold, max_queries=max_queries)
+        self.logger.info(f"Stale queries: {len(stale):,} of {len(queries):,} (threshold {threshold:.2f})")
+        if not stale:
+            return []
+
+        filename = f"refresh_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        all_results = []
+        for idx, (query_data, results) in enumerate(self.scraper.scrape_many(stale, platforms=platforms), start=1):
+            results['query_id'] = query_data['id']
+            results['emotion'] = query_data['emotion']
+            results['subject'] = query_data['subject']
+            results['setting'] = query_data['setting']
+            results['staleness'] = query_data['staleness']
+            results['timestamp'] = datetime.now().isoformat()
+            scheduler.keep_changes(results)
+            all_results.append(results)
+
+            self.logger.info(f"[{idx}/{len(stale)}] {query_data['query']} (staleness {query_data['staleness']:.2f}): "
+                             f"{results['new_videos']} new/changed of {results['total_videos']} videos")
+            for platform, error in results['errors'].items():
+                self.logger.warning(f"   {platform}: {error}")
+            if idx % batch_size == 0:
+                self.save_results(all_results, filename)
+
+        self.save_results(all_results, filename)
+        self.logger.info(f"✅ Refresh complete: {scheduler.stats['videos_new']:,} new/changed videos, "
+                         f"{scheduler.stats['videos_unchanged']:,} unchanged")
+        return all_results
+
+    def close(self):
+        """Sluit de platform plugins (worker threads, sessions, achtergrond stages) en de gedeelde thumbnail stage"""
+        self.scraper.close()
+        self.thumbnails.close()
+
     def run(
         self,
         style: str = "simple",
@@ -0,0 +1,267 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, Optional, Tuple
+
+# Histogram buckets (seconden) van snelle cache hits tot trage Selenium zoekopdrachten
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+EVENTS = 'videoscraper_events_total'
+STAGE_SECONDS = 'videoscraper_stage_seconds'
+BYTES = 'videoscraper_bytes_total'
+RATE_LIMIT_WAIT = 'videoscraper_rate_limit_wait_seconds_total'
+PIPELINE_BLOCKED = 'videoscraper_pipeline_blocked_seconds_total'
+
+_HELP = {
+    EVENTS: 'Counters per component (queries, videos, drops, errors, ...)',
+    STAGE_SECONDS: 'Latency per platform and stage (search, enrich, sink)',
+    BYTES: 'Bytes transferred per component',
+    RATE_LIMIT_WAIT: 'Seconds spent sleeping for rate limits and backoff',
+    PIPELINE_BLOCKED: 'Seconds a pipeline stage waited on a full downstream queue (backpressure)',
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: str = '') -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters en histograms, exporteerbaar als Prometheus tekst of JSON snapshot
+
+    Eén lock voor de hele registry: een update is een dict lookup plus een optelling, dus
+    contention is verwaarloosbaar naast netwerk I/O.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        # Per label set: [count per bucket..., +Inf count, sum]
+        self._histograms: Dict[str, Dict[LabelKey, list]] = {}
+        self._server = None
+        self._snapshot_thread = None
+        self._snapshot_stop = threading.Event()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def time(self, name: str = STAGE_SECONDS, **labels) -> _Timer:
+        """Context manager die de duur van het blok in een histogram zet"""
+        return _Timer(self, name, labels)
+
+    def sleep(self, seconds: float, **labels):
+        """time.sleep dat de wachttijd meetelt in videoscraper_rate_limit_wait_seconds_total"""
+        if seconds <= 0:
+            return
+        time.sleep(seconds)
+        self.inc(RATE_LIMIT_WAIT, seconds, **labels)
+
+    async def async_sleep(self, seconds: float, **labels):
+        """sleep() voor coroutines: asyncio.sleep, zodat de event loop intussen andere requests afhandelt"""
+        import asyncio
+
+        if seconds <= 0:
+            return
+        await asyncio.sleep(seconds)
+        self.inc(RATE_LIMIT_WAIT, seconds, **labels)
+
+    def get(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def snapshot(self) -> Dict:
+        """Alle metrics als JSON-serialiseerbare dict (histograms als count/sum/buckets)"""
+        with self._lock:
+            counters = {
+                name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {}
+            for name, series in self._histograms.items():
+                histograms[name] = []
+                for key, counts in series.items():
+                    total = sum(counts[:-1])
+                    histograms[name].append({
+                        'labels': dict(key),
+                        'count': total,
+                        'sum': round(counts[-1], 6),
+                        'mean': round(counts[-1] / total, 6) if total else 0.0,
+                        'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], counts[:-1])),
+                    })
+        return {'time': time.time(), 'counters': counters, 'histograms': histograms}
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name in sorted(self._histograms):
+                lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, counts in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, counts):
+                        cumulative += count
+                        labels = _format_labels(key, 'le="%g"' % bound)
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    cumulative += counts[-2]
+                    labels = _format_labels(key, 'le="+Inf"')
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {counts[-1]:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1'):
+        """
+        Start een lokaal /metrics endpoint (Prometheus formaat) op een daemon thread
+
+        :return: De HTTP server (server.server_address geeft de echte poort bij port=0)
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        return self._server
+
+    def write_snapshot(self, path: str):
+        import json
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def start_snapshots(self, path: str = 'data/results/metrics.json', interval: float = 30.0):
+        """Schrijf elke `interval` seconden een JSON snapshot (atomisch vervangen) op een daemon thread"""
+        self._snapshot_stop.clear()
+
+        def loop():
+            while not self._snapshot_stop.wait(interval):
+                self.write_snapshot(path)
+            self.write_snapshot(path)
+
+        self._snapshot_thread = threading.Thread(target=loop, name='metrics-snapshot', daemon=True)
+        self._snapshot_thread.start()
+
+    def stop(self):
+        """Stop het endpoint en schrijf een laatste snapshot"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._snapshot_thread is not None:
+            self._snapshot_stop.set()
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+
+
+REGISTRY = MetricsRegistry()
+
+
+class ScraperStats:
+    """
+    Thread-safe tellers van één component (scraper of stage), gespiegeld naar de registry
+
+    Vervangt de losse stats dicts: `stats.inc('errors')` i.p.v. `stats['errors'] += 1`;
+    lezen blijft `stats['errors']`. In de registry verschijnt elke teller als
+    videoscraper_events_total{component=..., event=...}.
+    """
+
+    def __init__(self, component: str, keys: Iterable[str], registry: Optional[MetricsRegistry] = None):
+        self.component = component
+        self.registry = registry if registry is not None else REGISTRY
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = dict.fromkeys(keys, 0)
+
+    def inc(self, key: str, value: float = 1):
+        if not value:
+            return
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+        self.registry.inc(EVENTS, value, component=self.component, event=key)
+
+    def set(self, key: str, value: float):
+        """Afgeleide waarde (bijv. MB/s) die alleen in de snapshot hoort, niet in de registry"""
+        with self._lock:
+            self._values[key] = value
+
+    def __getitem__(self, key: str) -> float:
+        with self._lock:
+            return self._values[key]
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def __repr__(self):
+        return f"ScraperStats({self.component!r}, {self.snapshot()!r})"
@@ -0,0 +1,217 @@
+import mmap
+import os
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+# Normalisatie: alleen letters/cijfers, lowercase, één spatie
+_NON_ALNUM_RE = re.compile(r'[\W_]+')
+# Woorden die re-uploads toevoegen maar niets over de inhoud zeggen
+_NOISE_WORDS_RE = re.compile(r'\b(?:official|video|hd|4k|1080p|720p|full|clip|vimeo|youtube|pexels|free|stock|footage)\b')
+
+_MASK64 = (1 << 64) - 1
+
+
+def normalize_text(text: str) -> str:
+    text = _NON_ALNUM_RE.sub(' ', (text or '').lower())
+    text = _NOISE_WORDS_RE.sub(' ', text)
+    return ' '.join(text.split())
+
+
+def record_text(record: Dict, description_chars: int = 300) -> str:
+    """
+    Tekst van een video record waarop de near-duplicate check gebeurt
+
+    Titel + begin van de beschrijving; voor Pexels (geen titel) de slug uit de pagina URL.
+    """
+    title = record.get('title') or ''
+    if not title and record.get('page_url'):
+        # https://www.pexels.com/video/woman-crying-on-the-beach-2932301/ -> woman crying on the beach
+        slug = record['page_url'].rstrip('/').rsplit('/', 1)[-1]
+        title = re.sub(r'-?\d+$', '', slug).replace('-', ' ')
+    description = (record.get('description') or '')[:description_chars]
+    return normalize_text(f"{title} {description}")
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index voor near-duplicate titels/beschrijvingen over alle platforms
+
+    Elke band heeft een tabel met een vast aantal slots (32-bit fingerprint per slot),
+    dus het geheugen hangt af van `slots_per_band` en niet van het aantal records.
+    Bij een volle tabel overschrijven nieuwe records oude slots: recall op heel oude
+    records neemt af, het geheugen blijft begrensd.
+
+    Thread-safe: de dataset builder deelt één index tussen de platforms, die elk op een eigen thread zoeken.
+    """
+
+    def __init__(self, bands: int = 16, rows: int = 4, slots_per_band: int = 1 << 20,
+                 shingle_size: int = 5, seed: int = 1):
+        """
+        :param bands: Aantal LSH bands
+        :param rows: MinHash waarden per band (bands*rows = signature lengte)
+        :param slots_per_band: Slots per band tabel (macht van 2)
+        :param shingle_size: Lengte van de karakter shingles
+        :param seed: Seed voor de hash functies (moet gelijk blijven voor een opgeslagen index)
+        """
+        if slots_per_band & (slots_per_band - 1):
+            raise ValueError("slots_per_band must be a power of two")
+
+        self.bands = bands
+        self.rows = rows
+        self.slots_per_band = slots_per_band
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        # Anonieme mmap i.p.v. bytearray (die zet alles meteen op nul): het OS levert pas bij de eerste
+        # write een nul-pagina, dus een lege index kost vrijwel geen geheugen
+        self._buffer = mmap.mmap(-1, 4 * bands * slots_per_band)
+        self._table = memoryview(self._buffer).cast('I')
+        self._lock = threading.Lock()
+
+        self.records_added = 0
+        self.duplicates_found = 0
+
+        num_perm = bands * rows
+        rng_state = seed
+        self._hash_a = []
+        self._hash_b = []
+        for _ in range(num_perm):
+            rng_state = (rng_state * 6364136223846793005 + 1442695040888963407) & _MASK64
+            self._hash_a.append(rng_state | 1)  # multiply-shift hashing vereist een oneven multiplier
+            rng_state = (rng_state * 6364136223846793005 + 1442695040888963407) & _MASK64
+            self._hash_b.append(rng_state)
+
+    def _shingles(self, text: str) -> List[int]:
+        size = self.shingle_size
+        if len(text) <= size:
+            return [zlib.crc32(text.encode('utf-8'))]
+        data = text.encode('utf-8')
+        return list({zlib.crc32(data[i:i + size]) for i in range(len(data) - size + 1)})
+
+    def _band_keys(self, texts: List[str]) -> List[Optional[List[tuple]]]:
+        """
+        MinHash signatures voor een batch teksten, gevectoriseerd met numpy
+
+        :return: Per tekst een lijst met (slot, fingerprint) sleutels per band, None voor lege tekst
+        """
+        import numpy as np
+
+        a = np.array(self._hash_a, dtype=np.uint64)[:, None]
+        b = np.array(self._hash_b, dtype=np.uint64)[:, None]
+        band_mix = np.uint64(0x9E3779B97F4A7C15)
+
+        keys = []
+        with np.errstate(over='ignore'):
+            for text in texts:
+                if not text:
+                    keys.append(None)
+                    continue
+                shingles = np.array(self._shingles(text), dtype=np.uint64)[None, :]
+                # (a*x + b) mod 2^64 >> 32, minimum over alle shingles per hash functie
+                signature = ((a * shingles + b) >> np.uint64(32)).min(axis=1)
+
+                band_hash = np.zeros(self.bands, dtype=np.uint64)
+                for row in signature.reshape(self.bands, self.rows).T:
+                    band_hash = (band_hash ^ row) * band_mix
+                slots = (band_hash & np.uint64(self.slots_per_band - 1)).tolist()
+                fingerprints = ((band_hash >> np.uint64(32)) | np.uint64(1)).tolist()
+                keys.append(list(zip(slots, fingerprints)))
+        return keys
+
+    def _check_and_add(self, band_keys: List[tuple]) -> bool:
+        duplicate = False
+        table = self._table
+        for band, (slot, fingerprint) in enumerate(band_keys):
+            position = band * self.slots_per_band + slot
+            if table[position] == fingerprint:
+                duplicate = True
+            table[position] = fingerprint
+        self.records_added += 1
+        if duplicate:
+            self.duplicates_found += 1
+        return duplicate
+
+    def check_batch(self, texts: Iterable[str]) -> List[bool]:
+        """
+        Voeg een batch genormaliseerde teksten toe en geef per tekst aan of het een near-duplicate is
+        van iets dat eerder (ook eerder in dezelfde batch) gezien is.
+        """
+        band_keys = self._band_keys(list(texts))
+        # Check en toevoegen in één keer, zodat twee platforms dezelfde video niet allebei als nieuw zien
+        with self._lock:
+            return [False if keys is None else self._check_and_add(keys) for keys in band_keys]
+
+    def process_records(self, records: List[Dict], mode: str = 'collapse') -> List[Dict]:
+        """
+        Near-duplicate check op een batch video records
+
+        :param records: Video dicts (title/description, of page_url voor Pexels)
+        :param mode: 'collapse' = duplicates weglaten, 'flag' = veld near_duplicate toevoegen
+        :return: De records die naar de sinks mogen
+        """
+        if mode not in ('collapse', 'flag'):
+            raise ValueError(f"Unknown near-duplicate mode: {mode}")
+
+        flags = self.check_batch(record_text(r) for r in records)
+        if mode == 'flag':
+            for record, flag in zip(records, flags):
+                record['near_duplicate'] = flag
+            return records
+        return [r for r, flag in zip(records, flags) if not flag]
+
+    def save(self, path: str):
+        """Bewaar de index zodat een volgende run incrementeel verder kan"""
+        import json
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        meta = {
+            'bands': self.bands,
+            'rows': self.rows,
+            'slots_per_band': self.slots_per_band,
+            'shingle_size': self.shingle_size,
+            'seed': self.seed,
+            'records_added': self.records_added,
+            'duplicates_found': self.duplicates_found,
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            header = json.dumps(meta).encode('utf-8')
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            f.write(zlib.compress(self._buffer, 1))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'NearDuplicateIndex':
+        import json
+
+        with open(path, 'rb') as f:
+            header_len = int.from_bytes(f.read(4), 'little')
+            meta = json.loads(f.read(header_len).decode('utf-8'))
+            index = cls(
+                bands=meta['bands'],
+                rows=meta['rows'],
+                slots_per_band=meta['slots_per_band'],
+                shingle_size=meta['shingle_size'],
+                seed=meta['seed'],
+            )
+            # In stukken van 1 MB uitpakken (geen tweede kopie van de tabel) en alleen pagina's met
+            # fingerprints schrijven: lege pagina's van de mmap blijven onaangeroerd en kosten geen geheugen
+            decompressor = zlib.decompressobj()
+            pending, offset = f.read(), 0
+            while True:
+                data = decompressor.decompress(pending, 1 << 20) if pending else decompressor.flush()
+                if not data:
+                    break
+                pending = decompressor.unconsumed_tail
+                view = memoryview(data)
+                for start in range(0, len(data), mmap.PAGESIZE):
+                    page = view[start:start + mmap.PAGESIZE]
+                    if page.tobytes().strip(b'\0'):
+                        index._buffer[offset + start:offset + start + len(page)] = page
+                offset += len(data)
+        index.records_added = meta['records_added']
+        index.duplicates_found = meta['duplicates_found']
+        return index
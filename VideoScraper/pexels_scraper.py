@@ -1,44 +1,117 @@
-import aiohttp
-from dotenv import load_dotenv
 import os
-import pandas as pd
-import itertools
-import random
+from typing import TYPE_CHECKING, Dict, List, Optional
 from config import LoggerConfig
+from http_clients import aiohttp_session
+from tools import read_csv
+from sanitize import sanitize_records
+from metrics import REGISTRY, BYTES, ScraperStats
+from blocking import PlatformBlocked, call_with_cooldown, retry_after_seconds
+from records import PexelsVideo
 import time
 import csv
 
+if TYPE_CHECKING:
+    import aiohttp
+    from credentials import CredentialPool
+    from quota import QuotaManager
+    from near_duplicates import NearDuplicateIndex
+    from thumbnails import ThumbnailDeduplicator
+
+def _rendition_cost(video_file: Dict) -> float:
+    """Bestandsgrootte als de API die geeft, anders pixels per seconde als benadering"""
+    if video_file.get('size'):
+        return float(video_file['size'])
+    return float((video_file.get('width') or 0) * (video_file.get('height') or 0) * (video_file.get('fps') or 30))
+
+
+def select_rendition(video_files: List[Dict], min_width: int = 0, min_height: int = 0,
+                     min_fps: float = 0) -> Optional[Dict]:
+    """
+    Kies de kleinste rendition die aan de minimale eisen voldoet
+
+    Voldoet geen enkele rendition, dan de grootste die er is (dichtst bij de eisen).
+
+    :param video_files: 'video_files' lijst van een Pexels video
+    :param min_width: Minimale breedte in pixels
+    :param min_height: Minimale hoogte in pixels
+    :param min_fps: Minimale framerate
+    :return: Gekozen video_file dict, None als er geen bestanden zijn
+    """
+    files = [f for f in video_files or [] if f.get('link')]
+    if not files:
+        return None
+
+    eligible = [
+        f for f in files
+        if (f.get('width') or 0) >= min_width
+        and (f.get('height') or 0) >= min_height
+        and (f.get('fps') or 0) >= min_fps
+    ]
+    if eligible:
+        return min(eligible, key=_rendition_cost)
+    return max(files, key=_rendition_cost)
+
+
 class PexelsScraper:
     def __init__(self, csv_file: str = 'data/Scraping_Part1_keywords_extended.csv', 
-                 output_path: str = 'data/results/pexels_videos_scraped.csv'):
+                 output_path: str = 'data/results/pexels_videos_scraped.csv',
+                 near_duplicates: Optional['NearDuplicateIndex'] = None, near_duplicate_mode: str = 'collapse',
+                 min_width: int = 1280, min_height: int = 720, min_fps: float = 0,
+                 thumbnails: Optional['ThumbnailDeduplicator'] = None, quota: Optional['QuotaManager'] = None,
+                 credentials: Optional['CredentialPool'] = None):
+        """
+        :param csv_file: Keywords CSV
+        :param output_path: CSV output (Excel komt ernaast met .xlsx)
+        :param min_width: Minimale breedte van de gekozen rendition
+        :param min_height: Minimale hoogte van de gekozen rendition
+        :param min_fps: Minimale framerate van de gekozen rendition
+        :param thumbnails: Thumbnail stage (Pexels 'image') met perceptual-hash index voor visuele duplicates
+        :param near_duplicates: Gedeelde near-duplicate index (ook over platforms heen), None = geen check
+        :param near_duplicate_mode: 'collapse' (weglaten) of 'flag' (kolom near_duplicate)
+        :param quota: Quota bewaking op de X-Ratelimit headers (default: state in data/pexels_quota.json)
+        :param credentials: API keys; per request de key die het eerst weer mag
+            (default: PEXELS_API_KEYS en/of PEXELS_API_KEY uit de omgeving)
+        """
+        from credentials import pexels_pool_from_env
+        from quota import QuotaManager
+
         self.baseurl = "https://api.pexels.com/videos/search"
-        load_dotenv()
-        self.pexels_key = os.getenv("PEXELS_API_KEY")
+        self.credentials = credentials if credentials is not None else pexels_pool_from_env()
         self.logger = LoggerConfig.setup_logger(__name__)
         self.csv_file = csv_file
         self.output_path = output_path
 
         self.queries = []
-        self.fieldnames = ['query', 'url']
+        self.min_width = min_width
+        self.min_height = min_height
+        self.min_fps = min_fps
+        self.fieldnames = ['query', 'url', 'width', 'height', 'fps', 'file_type', 'duration', 'thumbnail']
+        self.near_duplicates = near_duplicates
+        self.near_duplicate_mode = near_duplicate_mode
+        self.thumbnails = thumbnails
+        self.quota = quota if quota is not None else QuotaManager()
+        if not len(self.credentials):
+            self.logger.warning("No Pexels API key configured (PEXELS_API_KEYS / PEXELS_API_KEY)")
+        if near_duplicates is not None and near_duplicate_mode == 'flag':
+            self.fieldnames.append('near_duplicate')
+        if thumbnails is not None and near_duplicate_mode == 'flag':
+            self.fieldnames.append('visual_duplicate_of')
 
-        self.video_query_links = []
+        self.stats = ScraperStats('pexels', [
+            "queries_processed",
+            "pexels_videos",
+            "near_duplicates",
+            "visual_duplicates",
+        ])
 
-        query_terms = pd.read_csv(self.csv_file)
-        query_terms.fillna('', inplace=True)
-
-        terms_emotion = set(query_terms.Emotion.unique())
-        terms_subject = set(query_terms.Subject.unique())
-        terms_setting = set(query_terms.Setting.unique())
-        for s in [terms_emotion, terms_subject, terms_setting]:
-            s.discard('')
-
-        all_queries = list(itertools.product(terms_emotion, terms_setting, terms_subject))
-        random.shuffle(all_queries)
-
-        for emo, setting, subj in all_queries:
+        for emo, setting, subj in read_csv(self.csv_file):
             self.queries.append(f"{emo} {subj} {setting}".strip())
 
-    async def scrape_pexels(self, session: aiohttp.ClientSession, query: str, max_results: int = 10):
+    def get_stats(self):
+        """Momentopname van de tellers (thread-safe)"""
+        return self.stats.snapshot()
+
+    async def scrape_pexels(self, session: 'aiohttp.ClientSession', query: str, max_results: int = 10):
         self.logger.info(f"Scraping Pexels for query: {query}")
 
         params = {
@@ -48,53 +121,155 @@ class PexelsScraper:
             "per_page": max_results,
         }
 
-        headers = {
-            "Authorization": self.pexels_key
-        }
-        fixed_delay = 2
-        random_delay = random.uniform(3, 6)
-        final_delay = fixed_delay + random_delay
-
-        time.sleep(final_delay)
-        async with session.get(self.baseurl, params=params, headers=headers) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
+        # Een geblokkeerde key gaat alleen zelf in cooldown en de request gaat naar de volgende;
+        # acquire() geeft PlatformBlocked (platform cooldown) als alle keys geblokkeerd zijn
+        while True:
+            key = self.credentials.acquire(lambda credential: self.quota.wait_time(credential.secret))
+            try:
+                data = await self._search(session, key.secret, params)
+            except PlatformBlocked as e:
+                self.credentials.release(key, e)
+                continue
+            except BaseException:
+                self.credentials.release(key)
+                raise
+            self.credentials.release(key)
             return data
 
-    async def run_scraper(self):
-        async with aiohttp.ClientSession() as session:
-            for query in self.queries:
-                data = await self.scrape_pexels(session, query)
-                scraped_video_links = data['videos']
-                video_links = []
-                for video_link in scraped_video_links:
-                    video_links.append((video_link['url'], video_link['video_files'][0]['link']))
-                self.video_query_links.append({query: video_links})
-                
-
-                print("------------------ THESE ARE THE VIDEO LINKS --------------------------")
-                print(self.video_query_links)
-
-                # ✅ Fixed Excel writing code
-                excel_path = self.output_path.rsplit('.', 1)[0] + '.xlsx'
-
-                rows = []
-                # Extract direct video URLs from tuples (pexels_page_url, direct_video_url)
-                for page_url, direct_url in video_links:
-                    rows.append({"query": query, "url": direct_url})
-
-                df = pd.DataFrame(rows, columns=self.fieldnames)
-
-                if not os.path.exists(excel_path):
-                    df.to_excel(excel_path, index=False)
-                else:
-                    # Read existing data and append new data
-                    existing_df = pd.read_excel(excel_path)
-                    combined_df = pd.concat([existing_df, df], ignore_index=True)
-                    combined_df.to_excel(excel_path, index=False)
-
-                # Write to CSV file
-                with open(self.output_path, 'w', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
-                    writer.writeheader()
-                    writer.writerows(rows)
\ No newline at end of file
+    async def _search(self, session: 'aiohttp.ClientSession', api_key: str, params: Dict) -> Dict:
+        """Eén search request met deze key"""
+        # Gelijkmatig over het resterende budget tot de reset i.p.v. een gok; budget op = PlatformBlocked
+        await REGISTRY.async_sleep(self.quota.reserve(api_key), platform='pexels')
+        with REGISTRY.time(platform='pexels', stage='search'):
+            async with session.get(self.baseurl, params=params, headers={"Authorization": api_key}) as resp:
+                self.quota.update(api_key, resp.headers, resp.status)
+                if resp.status == 429:
+                    # Uurlimiet op: X-Ratelimit-Reset zegt wanneer er weer requests bij komen
+                    raise PlatformBlocked('pexels', 'HTTP 429', retry_after_seconds(resp.headers))
+                resp.raise_for_status()
+                body = await resp.read()
+                REGISTRY.inc(BYTES, len(body), component='pexels_api')
+                return await resp.json()
+
+    def _select_clip(self, video: Dict) -> Optional[Dict]:
+        """
+        Kies de rendition van een Pexels video en leg de technische metadata vast
+
+        :param video: Video object uit de Pexels search response
+        :return: Row met directe link + width/height/fps/file_type/duration, None zonder bruikbare bestanden
+        """
+        rendition = select_rendition(video.get('video_files'), self.min_width, self.min_height, self.min_fps)
+        if rendition is None:
+            self.logger.warning(f"No downloadable rendition for {video.get('url')}")
+            return None
+
+        return PexelsVideo(
+            url=rendition['link'],
+            page_url=video.get('url'),
+            width=rendition.get('width'),
+            height=rendition.get('height'),
+            fps=rendition.get('fps'),
+            file_type=rendition.get('file_type'),
+            duration=video.get('duration'),
+            thumbnail=video.get('image'),
+        )
+
+    def process_response(self, query: str, data: Dict) -> List[Dict]:
+        """
+        Zet een search response om naar rows: rendition keuze, sanitizing en de duplicate checks
+
+        :param query: Zoekterm (komt in de 'query' kolom)
+        :param data: JSON response van /videos/search
+        :return: Rows in het schema van self.fieldnames (plus page_url)
+        """
+        rows = []
+        for video in data.get('videos') or []:
+            clip = self._select_clip(video)
+            if clip is not None:
+                clip['query'] = query
+                rows.append(clip)
+
+        sanitize_records(rows, fields=('query',))
+
+        # Pexels heeft geen titel; de slug van de pagina URL beschrijft de clip
+        # Gedeelde indexes (dataset builder): tellen uit deze batch, niet uit het verschil van hun tellers
+        if self.near_duplicates is not None:
+            kept = self.near_duplicates.process_records(rows, self.near_duplicate_mode)
+            flagged = sum(1 for row in kept if row.get('near_duplicate'))
+            self.stats.inc("near_duplicates", flagged if self.near_duplicate_mode == 'flag' else len(rows) - len(kept))
+            rows = kept
+        if self.thumbnails is not None:
+            with REGISTRY.time(platform='pexels', stage='enrich'):
+                kept = self.thumbnails.process_records(rows, self.near_duplicate_mode)
+            flagged = sum(1 for row in kept if row.get('visual_duplicate_of'))
+            self.stats.inc("visual_duplicates", flagged if self.near_duplicate_mode == 'flag' else len(rows) - len(kept))
+            rows = kept
+
+        self.stats.inc("queries_processed")
+        self.stats.inc("pexels_videos", len(rows))
+        return rows
+
+    def write_rows(self, excel_path: str, writer: csv.DictWriter, rows: List[Dict]):
+        """Sink: rows van één query achter de Excel en de (open) CSV plakken"""
+        import pandas as pd
+
+        with REGISTRY.time(platform='pexels', stage='sink'):
+            df = pd.DataFrame(rows, columns=self.fieldnames)
+
+            if not os.path.exists(excel_path):
+                df.to_excel(excel_path, index=False)
+            else:
+                # Read existing data and append new data
+                existing_df = pd.read_excel(excel_path)
+                combined_df = pd.concat([existing_df, df], ignore_index=True)
+                combined_df.to_excel(excel_path, index=False)
+
+            writer.writerows(rows)
+
+    async def run_scraper(self, search_workers: int = 1, queue_size: int = 8):
+        """
+        Scrape alle queries als pipeline: search -> filter (rendition keuze + dedup) -> sink
+
+        De API requests lopen op de event loop van deze coroutine; de stages draaien op worker
+        threads, zodat het Excel/CSV schrijven de volgende requests niet ophoudt.
+
+        :param search_workers: Gelijktijdige API requests (elke worker houdt zijn eigen rate-limit pauze aan)
+        :param queue_size: Maximaal aantal query responses tussen twee stages
+        """
+        import asyncio
+        from pipeline import Pipeline
+
+        loop = asyncio.get_running_loop()
+        excel_path = self.output_path.rsplit('.', 1)[0] + '.xlsx'
+
+        # Eén session voor alle queries: connecties en DNS lookups naar api.pexels.com worden hergebruikt
+        async with aiohttp_session(limit_per_host=4) as session:
+            def search(query):
+                def request():
+                    return asyncio.run_coroutine_threadsafe(self.scrape_pexels(session, query), loop).result()
+                return query, call_with_cooldown('pexels', request)
+
+            def select(item):
+                query, data = item
+                return query, self.process_response(query, data)
+
+            with open(self.output_path, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames, extrasaction='ignore')
+                writer.writeheader()
+
+                def sink(item):
+                    query, rows = item
+                    self.logger.debug(f"Video links for '{query}': {[(row['page_url'], row['url']) for row in rows]}")
+                    self.write_rows(excel_path, writer, rows)
+                    return item
+
+                # De dedup indexen en de writer zijn niet thread-safe: filter en sink hebben één worker
+                pipeline = (
+                    Pipeline('pexels', queue_size=queue_size)
+                    .stage('search', search, workers=search_workers)
+                    .stage('filter', select)
+                    .stage('sink', sink)
+                )
+                # De pipeline blokkeert; op een thread zodat deze loop de requests kan blijven afhandelen
+                pipeline_stats = await loop.run_in_executor(None, pipeline.run, self.queries)
+                self.logger.info(f"Pexels pipeline finished: {pipeline_stats}")
@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import LoggerConfig
+from metrics import REGISTRY, PIPELINE_BLOCKED, ScraperStats
+
+# Markeert het einde van de stroom; elke worker van een stage krijgt er één
+_DONE = object()
+
+
+class _Stage:
+    __slots__ = ('name', 'func', 'workers', 'inbox', 'remaining', 'busy', 'lock')
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int, queue_size: int):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.inbox: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.remaining = workers
+        self.busy = 0.0
+        self.lock = threading.Lock()
+
+
+class Pipeline:
+    """
+    Producer/consumer pipeline: query source -> stage -> stage -> ... met begrensde queues
+
+    Elke stage heeft een eigen aantal worker threads en leest uit een queue met maxsize; een volle
+    queue blokkeert de stage ervoor (backpressure), dus een trage sink remt de search af in plaats
+    van het geheugen te laten groeien, en netwerk- en disk-werk lopen door elkaar heen.
+
+    Een stage functie krijgt één item en geeft het item voor de volgende stage terug, of None om het
+    te laten vallen. Een exception laat alleen dat item vallen (gelogd en geteld), de pipeline loopt door.
+    Stages met gedeelde, niet thread-safe state (near-duplicate index, CSV writer) horen 1 worker te hebben.
+    """
+
+    def __init__(self, name: str, queue_size: int = 8,
+                 on_error: Optional[Callable[[str, Any, Exception], None]] = None):
+        """
+        :param name: Naam in logs en metrics (bijv. 'youtube')
+        :param queue_size: Maximaal aantal items in de queue vóór elke stage
+        :param on_error: Callback (stage, item, exception) na een mislukt item, bijv. om scraper stats bij te werken
+        """
+        self.name = name
+        self.queue_size = queue_size
+        self.on_error = on_error
+        self.logger = LoggerConfig.setup_logger(__name__)
+        self._stages: List[_Stage] = []
+        self.stats = ScraperStats(f'{name}_pipeline', [])
+
+    def stage(self, name: str, func: Callable[[Any], Any], workers: int = 1) -> 'Pipeline':
+        """Voeg een stage toe (in volgorde); geeft de pipeline terug zodat stages geketend kunnen worden"""
+        if workers < 1:
+            raise ValueError(f"Stage {name} needs at least one worker")
+        self._stages.append(_Stage(name, func, workers, self.queue_size))
+        return self
+
+    def _put(self, stage: _Stage, item: Any, sender: str):
+        start = time.perf_counter()
+        stage.inbox.put(item)
+        blocked = time.perf_counter() - start
+        if blocked > 0.001:
+            REGISTRY.inc(PIPELINE_BLOCKED, blocked, pipeline=self.name, stage=sender)
+
+    def _finish(self, index: int):
+        """Laatste worker van stage `index` klaar: de volgende stage krijgt een _DONE per worker"""
+        if index + 1 < len(self._stages):
+            following = self._stages[index + 1]
+            for _ in range(following.workers):
+                following.inbox.put(_DONE)
+
+    def _worker(self, index: int):
+        stage = self._stages[index]
+        following = self._stages[index + 1] if index + 1 < len(self._stages) else None
+
+        while True:
+            item = stage.inbox.get()
+            if item is _DONE:
+                break
+
+            start = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                self.stats.inc(f"{stage.name}.errors")
+                self.logger.error(f"[{self.name}] stage {stage.name} failed: {e}", exc_info=True)
+                if self.on_error is not None:
+                    self.on_error(stage.name, item, e)
+                continue
+            finally:
+                busy = time.perf_counter() - start
+                with stage.lock:
+                    stage.busy += busy
+
+            if result is None:
+                self.stats.inc(f"{stage.name}.dropped")
+                continue
+            self.stats.inc(f"{stage.name}.processed")
+            if following is not None:
+                self._put(following, result, stage.name)
+
+        with stage.lock:
+            stage.remaining -= 1
+            last = stage.remaining == 0
+        if last:
+            self._finish(index)
+
+    def run(self, source: Iterable) -> Dict[str, float]:
+        """
+        Voer alle items uit `source` door de stages en wacht tot de laatste stage leeg is
+
+        :param source: Items voor de eerste stage (bijv. de queries); wordt lazy gelezen
+        :return: Tellers per stage (<stage>.processed/dropped/errors/busy_seconds)
+        """
+        if not self._stages:
+            raise ValueError("Pipeline has no stages")
+
+        threads = []
+        for index, stage in enumerate(self._stages):
+            stage.remaining = stage.workers
+            stage.busy = 0.0
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(index,),
+                                          name=f'{self.name}-{stage.name}-{n}', daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        first = self._stages[0]
+        try:
+            for item in source:
+                self._put(first, item, 'source')
+        finally:
+            for _ in range(first.workers):
+                first.inbox.put(_DONE)
+            for thread in threads:
+                thread.join()
+
+        stats = self.stats.snapshot()
+        for stage in self._stages:
+            stats[f"{stage.name}.busy_seconds"] = round(stage.busy, 3)
+        return stats
@@ -0,0 +1,466 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import (TYPE_CHECKING, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Protocol, Tuple,
+                    runtime_checkable)
+
+from config import LoggerConfig
+from metrics import REGISTRY, ScraperStats
+from blocking import COOLDOWNS, CooldownTracker, PlatformBlocked
+from records import QueryResult
+import profiling
+
+if TYPE_CHECKING:
+    from pexels_scraper import PexelsScraper
+    from vimeo_scraper import VimeoScraper
+    from youtube_scraper import VideoScraper
+
+
+@runtime_checkable
+class Platform(Protocol):
+    """
+    Interface van een platform plugin
+
+    search() doet één zoekopdracht inclusief de eigen filters en dedup stages en geeft de rows terug;
+    pauzes voor rate limits horen bij de plugin zelf. Een plugin wordt door PlatformScraper vanuit
+    een worker thread aangeroepen, nooit twee keer tegelijk voor dezelfde query.
+    """
+
+    name: str
+
+    def search(self, query: str, max_results: int = 5, terms: Optional[Dict[str, str]] = None) -> List[Dict]:
+        ...
+
+    def get_stats(self) -> Dict[str, float]:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+_PLATFORMS: Dict[str, Callable[..., Platform]] = {}
+
+
+def register_platform(name: str):
+    """
+    Decorator die een plugin factory (meestal de class) onder `name` registreert
+
+        @register_platform('dailymotion')
+        class DailymotionPlatform:
+            ...
+    """
+    def decorator(factory: Callable[..., Platform]):
+        _PLATFORMS[name] = factory
+        return factory
+    return decorator
+
+
+def available_platforms() -> List[str]:
+    return sorted(_PLATFORMS)
+
+
+def create_platform(name: str, **options) -> Platform:
+    """
+    Maak een plugin aan; options gaan door naar de factory (bijv. rate_limit_delay)
+
+    :raises ValueError: Onbekend platform
+    """
+    factory = _PLATFORMS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown platform '{name}', available: {', '.join(available_platforms())}")
+    return factory(**options)
+
+
+@register_platform('youtube')
+class YouTubePlatform:
+    """
+    VideoScraper.scrape_youtube: yt-dlp flat search, metadata van de relevante video's, dan de dedupe
+    stages (near-duplicates, thumbnails) en het inplannen van transcripts, net als in run_scraper
+    """
+
+    name = 'youtube'
+
+    def __init__(self, scraper: Optional['VideoScraper'] = None, **options):
+        if scraper is None:
+            from youtube_scraper import VideoScraper
+            scraper = VideoScraper(**options)
+        self.scraper = scraper
+
+    def search(self, query: str, max_results: int = 5, terms: Optional[Dict[str, str]] = None) -> List[Dict]:
+        return self.scraper.scrape_youtube(query, max_results, terms=terms)
+
+    def get_stats(self) -> Dict[str, float]:
+        return self.scraper.get_stats()
+
+    def close(self):
+        if self.scraper.transcripts is not None:
+            self.scraper.transcripts.close()
+        if self.scraper.thumbnails is not None:
+            self.scraper.thumbnails.close()
+
+
+@register_platform('vimeo')
+class VimeoPlatform:
+    """
+    VimeoScraper.scrape_vimeo via DuckDuckGo (Selenium)
+
+    Tussen twee zoekopdrachten zit minstens rate_limit_delay (x1-1.5) seconden, net als in VimeoScraper.search().
+    """
+
+    name = 'vimeo'
+
+    def __init__(self, scraper: Optional['VimeoScraper'] = None, **options):
+        if scraper is None:
+            from vimeo_scraper import VimeoScraper
+            options.setdefault('use_selenium', True)
+            scraper = VimeoScraper(**options)
+        self.scraper = scraper
+        self._lock = threading.Lock()
+        self._next_search = 0.0
+
+    def _wait_turn(self):
+        with self._lock:
+            REGISTRY.sleep(self._next_search - time.monotonic(), platform='vimeo')
+            delay = self.scraper.rate_limit_delay
+            self._next_search = time.monotonic() + random.uniform(delay, delay * 1.5)
+
+    def search(self, query: str, max_results: int = 5, terms: Optional[Dict[str, str]] = None) -> List[Dict]:
+        self._wait_turn()
+        return self.scraper.scrape_vimeo(f"site:{self.scraper.to_scrape} {query}", max_results, terms=terms)
+
+    def get_stats(self) -> Dict[str, float]:
+        return self.scraper.get_stats()
+
+    def close(self):
+        if self.scraper.metadata is not None:
+            self.scraper.metadata.close()
+
+
+@register_platform('pexels')
+class PexelsPlatform:
+    """
+    PexelsScraper via de API
+
+    De aiohttp session hoort bij één event loop; die loop draait op een eigen daemon thread zodat
+    connecties over alle queries hergebruikt worden terwijl search() zelf blokkerend blijft.
+    """
+
+    name = 'pexels'
+
+    def __init__(self, scraper: Optional['PexelsScraper'] = None, limit_per_host: int = 4, **options):
+        if scraper is None:
+            from pexels_scraper import PexelsScraper
+            scraper = PexelsScraper(**options)
+        self.scraper = scraper
+        self.limit_per_host = limit_per_host
+        self._lock = threading.Lock()
+        self._loop = None
+        self._session = None
+
+    def _run(self, coro):
+        import asyncio
+
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='pexels-loop', daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _search(self, query: str, max_results: int) -> List[Dict]:
+        from http_clients import aiohttp_session
+
+        if self._session is None:
+            self._session = aiohttp_session(limit_per_host=self.limit_per_host)
+        data = await self.scraper.scrape_pexels(self._session, query, max_results)
+        return self.scraper.process_response(query, data)
+
+    def search(self, query: str, max_results: int = 5, terms: Optional[Dict[str, str]] = None) -> List[Dict]:
+        return self._run(self._search(query, max_results))
+
+    def get_stats(self) -> Dict[str, float]:
+        return self.scraper.get_stats()
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._session is not None:
+            self._run(self._session.close())
+            self._session = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+
+class PlatformScraper:
+    """
+    Fan-out van één query naar alle gekozen platforms tegelijk
+
+    Elk platform zoekt op een eigen worker thread; de resultaten worden samengevoegd in de volgorde
+    waarin de platforms klaar zijn. De latency van een query is daardoor die van het traagste
+    platform in plaats van de som. Plugins worden pas aangemaakt bij hun eerste query.
+
+    Een platform dat ons blokkeert (PlatformBlocked) gaat in cooldown; scrape_many schuift zijn werk
+    dan door en laat de workers intussen de queries van de andere platforms afwerken.
+    """
+
+    def __init__(self, max_results: int = 5, options: Optional[Dict[str, Dict]] = None,
+                 cooldowns: Optional[CooldownTracker] = None):
+        """
+        :param max_results: Resultaten per platform per query
+        :param options: Per platform de argumenten voor de plugin, bijv. {'youtube': {'rate_limit_delay': 20.0}};
+            geef dezelfde near_duplicates/thumbnails aan alle platforms voor dedup over platforms heen
+        :param cooldowns: Cooldown administratie (default: de gedeelde COOLDOWNS)
+        """
+        self.max_results = max_results
+        self.options = options or {}
+        self.cooldowns = cooldowns if cooldowns is not None else COOLDOWNS
+        self.logger = LoggerConfig.setup_logger(__name__)
+
+        self._lock = threading.Lock()
+        self._platforms: Dict[str, Platform] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(len(_PLATFORMS), 1), thread_name_prefix='platform')
+
+        self.stats = ScraperStats('fanout', [
+            "queries_processed",
+            "total_videos_found",
+            *[f"{name}_videos" for name in available_platforms()],
+            "blocked",
+            "errors",
+        ])
+
+    def add_platform(self, platform: Platform):
+        """Gebruik een kant-en-klare plugin (bijv. met een gedeelde near-duplicate index) i.p.v. de factory"""
+        with self._lock:
+            self._platforms[platform.name] = platform
+
+    def get_platform(self, name: str) -> Platform:
+        with self._lock:
+            platform = self._platforms.get(name)
+            if platform is None:
+                platform = self._platforms[name] = create_platform(name, **self.options.get(name, {}))
+            return platform
+
+    @staticmethod
+    def _check_platforms(platforms: Iterable[str]) -> List[str]:
+        names = list(dict.fromkeys(platforms))
+        unknown = [name for name in names if name not in _PLATFORMS]
+        if unknown:
+            raise ValueError(f"Unknown platform(s) {', '.join(unknown)}, available: {', '.join(available_platforms())}")
+        return names
+
+    def _search(self, name: str, query: str, max_results: int,
+                terms: Optional[Dict[str, str]]) -> Tuple[List[Dict], float]:
+        start = time.perf_counter()
+        with profiling.stage('scrape'):
+            videos = self.get_platform(name).search(query, max_results, terms=terms)
+        return videos or [], time.perf_counter() - start
+
+    @staticmethod
+    def _new_results(query: str) -> QueryResult:
+        return QueryResult(query=query, videos=[], total_videos=0, platforms={}, errors={})
+
+    def _merge(self, results: Dict, name: str, videos: List[Dict], seconds: float):
+        for video in videos:
+            video.setdefault('platform', name)
+            video.setdefault('query', results['query'])
+        results['videos'].extend(videos)
+        results['platforms'][name] = {'videos': len(videos), 'seconds': round(seconds, 3)}
+        self.stats.inc(f"{name}_videos", len(videos))
+        self.logger.debug(f"   {name}: {len(videos)} videos in {seconds:.2f}s")
+
+    def _fail(self, results: Dict, name: str, error: Exception):
+        """Registreer een mislukte search; een blokkade zet het platform in cooldown"""
+        if isinstance(error, PlatformBlocked):
+            self.stats.inc("blocked")
+            self.cooldowns.block(name, error.reason, error.retry_after)
+        else:
+            self.stats.inc("errors")
+            self.logger.error(f"{name} search failed for '{results['query']}': {error}", exc_info=error)
+        results['errors'][name] = str(error)
+
+    def _finish(self, results: Dict, start: float) -> Dict:
+        results['total_videos'] = len(results['videos'])
+        results['seconds'] = round(time.perf_counter() - start, 3)
+        self.stats.inc("queries_processed")
+        self.stats.inc("total_videos_found", results['total_videos'])
+        return results
+
+    def scrape_query(self, query: str, platforms: Iterable[str] = ('youtube',), max_results: Optional[int] = None,
+                     terms: Optional[Dict[str, str]] = None) -> Dict:
+        """
+        Zoek één query op alle platforms tegelijk
+
+        Platforms in cooldown worden overgeslagen (staat in 'errors'); voor doorschuiven naar later
+        zie scrape_many.
+
+        :param query: Zoekterm
+        :param platforms: Namen uit de registry
+        :param max_results: Resultaten per platform (default: self.max_results)
+        :param terms: emotion/subject/setting termen voor de relevantie filters
+        :return: {'query', 'videos', 'total_videos', 'platforms': {naam: {'videos', 'seconds'}},
+            'errors': {naam: melding}, 'seconds'}
+        :raises ValueError: Onbekend platform
+        """
+        names = self._check_platforms(platforms)
+        max_results = self.max_results if max_results is None else max_results
+        start = time.perf_counter()
+        results = self._new_results(query)
+
+        futures = {}
+        for name in names:
+            remaining = self.cooldowns.remaining(name)
+            if remaining > 0:
+                results['errors'][name] = f"cooling down ({remaining:.0f}s left)"
+                continue
+            futures[self._executor.submit(self._search, name, query, max_results, terms)] = name
+
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                videos, seconds = future.result()
+            except Exception as e:
+                self._fail(results, name, e)
+                continue
+            self.cooldowns.success(name)
+            self._merge(results, name, videos, seconds)
+
+        return self._finish(results, start)
+
+    def scrape_many(self, items: Iterable[Dict], platforms: Iterable[str] = ('youtube',),
+                    max_results: Optional[int] = None, max_open: int = 32,
+                    max_attempts: int = 5) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Scrape een reeks queries op alle platforms, met cooldown-bewuste work stealing
+
+        Per platform is er een wachtrij (query, platform) taken; één worker per platform-slot pakt steeds
+        de oudste taak van een platform dat niet bezig en niet in cooldown is. Een geblokkeerde taak gaat
+        terug vooraan de wachtrij van zijn platform en de worker gaat verder met andere platforms; pas als
+        alle resterende werk in cooldown staat wordt er gewacht. Resultaten komen in de volgorde van `items`.
+
+        :param items: Dicts met 'query' en optioneel 'emotion'/'subject'/'setting' (relevantie termen)
+        :param platforms: Namen uit de registry
+        :param max_results: Resultaten per platform (default: self.max_results)
+        :param max_open: Maximaal aantal queries tegelijk in behandeling (begrenst geheugen en voorsprong)
+        :param max_attempts: Pogingen per (query, platform) voordat de blokkade als fout telt
+        :return: Iterator van (item, results) met results zoals bij scrape_query
+        :raises ValueError: Onbekend platform
+        """
+        names = self._check_platforms(platforms)
+        max_results = self.max_results if max_results is None else max_results
+
+        source = iter(items)
+        cond = threading.Condition()
+        open_entries: Deque[Dict] = deque()
+        pending: Dict[str, Deque[Dict]] = {name: deque() for name in names}
+        busy = set()
+        state = {'exhausted': False, 'stopped': False, 'seq': 0}
+
+        def admit():
+            while not state['exhausted'] and len(open_entries) < max_open:
+                try:
+                    item = next(source)
+                except StopIteration:
+                    state['exhausted'] = True
+                    break
+                entry = {'item': item, 'seq': state['seq'], 'start': None, 'attempts': {},
+                         'remaining': set(names), 'results': self._new_results(item['query'])}
+                state['seq'] += 1
+                open_entries.append(entry)
+                for name in names:
+                    pending[name].append(entry)
+
+        def next_task() -> Tuple[Optional[Tuple[str, Dict]], Optional[float]]:
+            """(platform, entry) of None met de tijd tot de eerste cooldown afloopt"""
+            admit()
+            best, wake = None, None
+            for name in names:
+                if name in busy or not pending[name]:
+                    continue
+                remaining = self.cooldowns.remaining(name)
+                if remaining > 0:
+                    wake = remaining if wake is None else min(wake, remaining)
+                    continue
+                entry = pending[name][0]
+                if best is None or entry['seq'] < best[1]['seq']:
+                    best = (name, entry)
+            if best is not None:
+                pending[best[0]].popleft()
+                busy.add(best[0])
+                if best[1]['start'] is None:
+                    # Latency telt vanaf de eerste platform search, niet vanaf het toelaten
+                    best[1]['start'] = time.perf_counter()
+            return best, wake
+
+        def worker():
+            while True:
+                with cond:
+                    while True:
+                        if state['stopped']:
+                            return
+                        task, wake = next_task()
+                        if task is not None:
+                            break
+                        if state['exhausted'] and not any(pending.values()):
+                            return
+                        cond.wait(wake)
+
+                name, entry = task
+                results = entry['results']
+                terms = {k: entry['item'][k] for k in ('emotion', 'subject', 'setting') if k in entry['item']} or None
+                try:
+                    videos, seconds = self._search(name, results['query'], max_results, terms)
+                    error = None
+                except Exception as e:
+                    error = e
+
+                with cond:
+                    busy.discard(name)
+                    if isinstance(error, PlatformBlocked):
+                        attempts = entry['attempts'][name] = entry['attempts'].get(name, 0) + 1
+                        if attempts < max_attempts:
+                            self.stats.inc("blocked")
+                            self.cooldowns.block(name, error.reason, error.retry_after)
+                            pending[name].appendleft(entry)
+                            cond.notify_all()
+                            continue
+                    if error is not None:
+                        self._fail(results, name, error)
+                    else:
+                        self.cooldowns.success(name)
+                        self._merge(results, name, videos, seconds)
+                    entry['remaining'].discard(name)
+                    if not entry['remaining']:
+                        self._finish(results, entry['start'])
+                    cond.notify_all()
+
+        threads = [threading.Thread(target=worker, name=f'scheduler-{n}', daemon=True) for n in range(len(names))]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                with cond:
+                    while not (open_entries and not open_entries[0]['remaining']):
+                        if state['exhausted'] and not open_entries:
+                            return
+                        cond.wait()
+                    entry = open_entries.popleft()
+                    # Er is plek voor een nieuwe query: een wachtende worker kan hem toelaten
+                    cond.notify_all()
+                yield entry['item'], entry['results']
+        finally:
+            with cond:
+                state['stopped'] = True
+                cond.notify_all()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Momentopname van de fan-out tellers (per platform: <naam>_videos)"""
+        return self.stats.snapshot()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            platforms, self._platforms = list(self._platforms.values()), {}
+        for platform in platforms:
+            platform.close()
@@ -0,0 +1,262 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from metrics import REGISTRY, RATE_LIMIT_WAIT, STAGE_SECONDS
+
+
+class _NullStage:
+    """Wordt teruggegeven als er geen profiler actief is: geen timing, geen lock"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler: 'RunProfiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class RunProfiler:
+    """
+    Per-stage profiling van een run: waar gaat de wall-clock tijd heen?
+
+    Eigen stages (query generatie, scrape per query, JSON writes, logging) worden met perf_counter
+    gemeten; search/enrich/sink per platform en de rate-limit sleeps komen uit de metrics registry.
+    Optioneel neemt tracemalloc bij elke checkpoint een snapshot voor de top allocatie sites.
+    """
+
+    def __init__(self, output_dir: str = 'data/results', trace_memory: bool = False, top_n: int = 15,
+                 time_logging: bool = True):
+        """
+        :param output_dir: Map voor het profiel rapport
+        :param trace_memory: tracemalloc aanzetten (kost merkbaar CPU en geheugen)
+        :param top_n: Aantal allocatie sites in het rapport
+        :param time_logging: De tijd in logging handlers meten als eigen stage
+        """
+        self.output_dir = output_dir
+        self.trace_memory = trace_memory
+        self.top_n = top_n
+        self.time_logging = time_logging
+
+        self._lock = threading.Lock()
+        self._stages: Dict[str, List[float]] = {}  # naam -> [count, total, max]
+        self._checkpoints: List[Dict] = []
+        self._first_snapshot = None
+        self._last_snapshot = None
+        self._original_handle = None
+        self._registry_start = None
+        self.started = None
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            entry = self._stages.get(name)
+            if entry is None:
+                self._stages[name] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                if seconds > entry[2]:
+                    entry[2] = seconds
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._registry_start = REGISTRY.snapshot()
+
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start(10)
+            self._first_snapshot = tracemalloc.take_snapshot()
+
+        if self.time_logging:
+            import logging
+
+            profiler = self
+            original = logging.Logger.handle
+            self._original_handle = original
+
+            def handle(logger, record):
+                start = time.perf_counter()
+                try:
+                    return original(logger, record)
+                finally:
+                    profiler.add('logging', time.perf_counter() - start)
+
+            logging.Logger.handle = handle
+
+    def checkpoint(self, label: str):
+        """Leg tijd (en met trace_memory het geheugen) vast op een punt in de run"""
+        point = {'label': label, 'elapsed': round(time.perf_counter() - self.started, 3)}
+        if self.trace_memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            point['memory_mb'] = round(current / 1e6, 2)
+            point['peak_mb'] = round(peak / 1e6, 2)
+            self._last_snapshot = tracemalloc.take_snapshot()
+        with self._lock:
+            self._checkpoints.append(point)
+
+    def _registry_stages(self) -> Dict[str, List[float]]:
+        """search/enrich/sink per platform en de rate-limit sleeps sinds start(), uit de metrics registry"""
+        def by_labels(snapshot, kind, name):
+            return {tuple(sorted(s['labels'].items())): s for s in snapshot[kind].get(name, [])}
+
+        now = REGISTRY.snapshot()
+        stages = {}
+
+        before = by_labels(self._registry_start, 'histograms', STAGE_SECONDS)
+        for key, series in by_labels(now, 'histograms', STAGE_SECONDS).items():
+            old = before.get(key, {'count': 0, 'sum': 0.0})
+            count, total = series['count'] - old['count'], series['sum'] - old['sum']
+            if count:
+                labels = dict(key)
+                stages[f"{labels.get('platform')}.{labels.get('stage')}"] = [count, total, None]
+
+        before = by_labels(self._registry_start, 'counters', RATE_LIMIT_WAIT)
+        for key, series in by_labels(now, 'counters', RATE_LIMIT_WAIT).items():
+            total = series['value'] - before.get(key, {'value': 0})['value']
+            if total:
+                stages[f"{dict(key).get('platform')}.rate_limit_sleep"] = [None, total, None]
+        return stages
+
+    def _top_allocations(self) -> List[Dict]:
+        snapshot = self._last_snapshot
+        if snapshot is None:
+            return []
+        import tracemalloc
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+                   tracemalloc.Filter(False, '<frozen importlib._bootstrap*>')]
+        snapshot = snapshot.filter_traces(filters)
+        if self._first_snapshot is not None:
+            stats = snapshot.compare_to(self._first_snapshot.filter_traces(filters), 'lineno')
+        else:
+            stats = snapshot.statistics('lineno')
+
+        top = []
+        for stat in stats[:self.top_n]:
+            frame = stat.traceback[0]
+            top.append({
+                'site': f"{frame.filename}:{frame.lineno}",
+                'size_kb': round(stat.size / 1024, 1),
+                'size_diff_kb': round(getattr(stat, 'size_diff', stat.size) / 1024, 1),
+                'count': stat.count,
+            })
+        return top
+
+    def stop(self) -> Dict:
+        """Stop de profiler en geef het rapport terug (stages gesorteerd op totale tijd)"""
+        if self._original_handle is not None:
+            import logging
+            logging.Logger.handle = self._original_handle
+            self._original_handle = None
+
+        if self.trace_memory:
+            self.checkpoint('end')
+
+        wall = time.perf_counter() - self.started
+        with self._lock:
+            stages = {name: list(values) for name, values in self._stages.items()}
+            checkpoints = list(self._checkpoints)
+        stages.update(self._registry_stages())
+
+        rows = []
+        for name, (count, total, longest) in sorted(stages.items(), key=lambda item: -item[1][1]):
+            rows.append({
+                'stage': name,
+                'count': count,
+                'total_s': round(total, 3),
+                'mean_ms': round(total / count * 1000, 2) if count else None,
+                'max_ms': round(longest * 1000, 2) if longest is not None else None,
+                'share': round(total / wall, 4) if wall else 0.0,
+            })
+
+        report = {
+            'wall_s': round(wall, 3),
+            'stages': rows,
+            'checkpoints': checkpoints,
+            'top_allocations': self._top_allocations(),
+        }
+
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.stop()
+        return report
+
+    def write(self, report: Dict) -> str:
+        """Schrijf het rapport als JSON en geef een leesbare samenvatting terug"""
+        import json
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+        lines = [f"Profile ({report['wall_s']:.1f}s wall clock) -> {path}",
+                 "Stages overlap (scrape bevat search/enrich/sink/sleep), share is t.o.v. wall clock",
+                 f"{'stage':<28}{'count':>8}{'total s':>10}{'mean ms':>10}{'max ms':>10}{'share':>8}"]
+        for row in report['stages']:
+            lines.append(
+                f"{row['stage']:<28}{row['count'] if row['count'] is not None else '-':>8}{row['total_s']:>10.2f}"
+                f"{row['mean_ms'] if row['mean_ms'] is not None else '-':>10}"
+                f"{row['max_ms'] if row['max_ms'] is not None else '-':>10}{row['share']:>8.1%}"
+            )
+        if report['top_allocations']:
+            lines.append("Top allocation sites (growth since start):")
+            for alloc in report['top_allocations']:
+                lines.append(f"  {alloc['size_diff_kb']:>10.1f} KB  {alloc['count']:>8}  {alloc['site']}")
+        return '\n'.join(lines)
+
+
+_active: Optional[RunProfiler] = None
+
+
+def start(output_dir: str = 'data/results', trace_memory: bool = False, **kwargs) -> RunProfiler:
+    """Start de profiler voor deze run; stage() en checkpoint() worden daarna actief"""
+    global _active
+    _active = RunProfiler(output_dir=output_dir, trace_memory=trace_memory, **kwargs)
+    _active.start()
+    return _active
+
+
+def stop() -> Optional[str]:
+    """Stop de profiler, schrijf het rapport en geef de samenvatting terug (None als hij niet actief was)"""
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return None
+    return profiler.write(profiler.stop())
+
+
+def stage(name: str):
+    """Timer voor een stage; zonder actieve profiler een no-op"""
+    profiler = _active
+    return _NULL_STAGE if profiler is None else profiler.stage(name)
+
+
+def checkpoint(label: str):
+    profiler = _active
+    if profiler is not None:
+        profiler.checkpoint(label)
@@ -1,4 +1,3 @@
-import pandas as pd
 import itertools
 from typing import List, Tuple, Dict
 import os
@@ -22,6 +21,8 @@ class QueryGenerator:
         
         :return: True if successful, False otherwise
         """
+        import pandas as pd
+
         self.logger.info(f"Attempting to load CSV: {self.csv_path}")
         
         # Check if file exists
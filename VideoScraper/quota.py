@@ -0,0 +1,224 @@
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Mapping, Optional
+
+from config import LoggerConfig
+from metrics import ScraperStats
+from blocking import PlatformBlocked
+
+HOUR = 3600.0
+# X-Ratelimit-Reset is in hele seconden; pas daarna echt voorbij, anders een 429 op de grens
+_RESET_GRACE = 1.0
+
+
+def key_id(api_key: Optional[str]) -> str:
+    """Korte, niet terug te rekenen ID van een API key (de key zelf komt nooit in het state bestand)"""
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:12]
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    if value is None or not value.strip().isdigit():
+        return None
+    return int(value)
+
+
+class _KeyQuota:
+    __slots__ = ('limit', 'remaining', 'reset_at', 'requests', 'next_at')
+
+    def __init__(self):
+        self.limit: Optional[int] = None       # X-Ratelimit-Limit: requests per periode (maand bij Pexels)
+        self.remaining: Optional[int] = None   # X-Ratelimit-Remaining, lokaal afgeteld tussen responses
+        self.reset_at: Optional[float] = None  # X-Ratelimit-Reset: Unix timestamp van de nieuwe periode
+        self.requests: Deque[float] = deque()  # Starttijden in het afgelopen uur (uurlimiet zit niet in de headers)
+        self.next_at = 0.0                     # Vroegste start van de volgende request (Unix tijd)
+
+    def roll(self, now: float):
+        while self.requests and self.requests[0] <= now - HOUR:
+            self.requests.popleft()
+        if self.reset_at is not None and now >= self.reset_at + _RESET_GRACE:
+            # Nieuwe periode: tot de eerste response gaan we uit van het volledige budget
+            self.remaining = self.limit
+            self.reset_at = None
+
+    def to_dict(self) -> Dict:
+        return {'limit': self.limit, 'remaining': self.remaining, 'reset_at': self.reset_at,
+                'requests': list(self.requests), 'next_at': self.next_at}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> '_KeyQuota':
+        quota = cls()
+        quota.limit = data.get('limit')
+        quota.remaining = data.get('remaining')
+        quota.reset_at = data.get('reset_at')
+        quota.requests = deque(data.get('requests') or [])
+        quota.next_at = data.get('next_at') or 0.0
+        return quota
+
+
+class QuotaManager:
+    """
+    Quota bewaking voor een API met X-Ratelimit-Limit/Remaining/Reset headers (Pexels)
+
+    Per API key wordt bijgehouden hoeveel requests er nog zijn tot de reset en wanneer de laatste
+    requests van het afgelopen uur waren. reserve() geeft de wachttijd tot de volgende request mag:
+    de resterende periode gedeeld door het resterende budget (zodat het hele budget vóór de reset
+    opgaat, gelijk verdeeld), maar nooit sneller dan de uurlimiet toestaat. Budget op = PlatformBlocked
+    met de tijd tot de reset, zodat de cooldown tracker het platform tot dan overslaat.
+
+    De state wordt na elke response naar een JSON bestand geschreven; een volgende run gaat verder
+    met het budget en het request venster van de vorige. Met meerdere keys (CredentialPool) kiest de
+    pool via wait_time() de key die het eerst weer mag.
+    """
+
+    def __init__(self, state_path: Optional[str] = 'data/pexels_quota.json', hourly_limit: int = 200,
+                 reserve: int = 0, platform: str = 'pexels', clock: Callable[[], float] = time.time):
+        """
+        :param state_path: JSON bestand voor de state tussen runs (None = alleen in geheugen)
+        :param hourly_limit: Requests per uur (Pexels: 200; staat niet in de headers)
+        :param reserve: Zoveel requests van het periodebudget niet gebruiken (marge voor handwerk)
+        :param platform: Naam in PlatformBlocked en de metrics
+        :param clock: Bron van de Unix tijd (de benchmark schuift hem op met de overgeslagen pauzes)
+        """
+        self.state_path = state_path
+        self.hourly_limit = hourly_limit
+        self.reserve_requests = reserve
+        self.platform = platform
+        self.clock = clock
+        self.logger = LoggerConfig.setup_logger(__name__)
+        self._lock = threading.Lock()
+        self._quotas: Dict[str, _KeyQuota] = {}
+        self.stats = ScraperStats(f'{platform}_quota', ['requests', 'paced_seconds', 'exhausted', 'rejected'])
+        self._load()
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable quota state {self.state_path}: {e}")
+            return
+        self._quotas = {kid: _KeyQuota.from_dict(entry) for kid, entry in data.get('keys', {}).items()}
+
+    def _save(self):
+        """Onder self._lock aanroepen"""
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'keys': {kid: quota.to_dict() for kid, quota in self._quotas.items()}}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _quota(self, api_key: Optional[str]) -> _KeyQuota:
+        kid = key_id(api_key)
+        quota = self._quotas.get(kid)
+        if quota is None:
+            quota = self._quotas[kid] = _KeyQuota()
+        return quota
+
+    def interval(self, api_key: Optional[str], now: Optional[float] = None) -> float:
+        """Tijd tussen requests die het budget precies tot de reset laat reiken (minimaal de uurlimiet)"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            quota = self._quota(api_key)
+            quota.roll(now)
+            return self._interval(quota, now)
+
+    def _interval(self, quota: _KeyQuota, now: float) -> float:
+        interval = HOUR / self.hourly_limit
+        if quota.remaining is not None and quota.reset_at is not None:
+            budget = quota.remaining - self.reserve_requests
+            interval = max(interval, (quota.reset_at - now) / max(budget, 1))
+        return interval
+
+    def _start(self, quota: _KeyQuota, now: float) -> float:
+        """Vroegste start van de volgende request volgens het tempo en het uurvenster"""
+        start = max(now, quota.next_at)
+        if len(quota.requests) >= self.hourly_limit:
+            # Uurvenster vol: wachten tot de oudste request een uur oud is
+            start = max(start, quota.requests[-self.hourly_limit] + HOUR)
+        return start
+
+    def wait_time(self, api_key: Optional[str]) -> float:
+        """Seconden die reserve() nu voor deze key zou laten wachten (math.inf = budget op); reserveert niets"""
+        now = self.clock()
+        with self._lock:
+            quota = self._quota(api_key)
+            quota.roll(now)
+            if quota.remaining is not None and quota.remaining <= self.reserve_requests:
+                return math.inf
+            return self._start(quota, now) - now
+
+    def reserve(self, api_key: Optional[str]) -> float:
+        """
+        Reserveer de volgende request voor deze key
+
+        :return: Seconden wachten tot de request mag starten
+        :raises PlatformBlocked: Budget tot de reset is op
+        """
+        now = self.clock()
+        with self._lock:
+            quota = self._quota(api_key)
+            quota.roll(now)
+
+            if quota.remaining is not None and quota.remaining <= self.reserve_requests:
+                retry_after = max(quota.reset_at + _RESET_GRACE - now, 0.0) if quota.reset_at is not None else HOUR
+                self.stats.inc('exhausted')
+                raise PlatformBlocked(self.platform, 'API quota exhausted', retry_after)
+
+            start = self._start(quota, now)
+            quota.requests.append(start)
+            quota.next_at = start + self._interval(quota, start)
+            if quota.remaining is not None:
+                quota.remaining -= 1  # De response corrigeert dit naar de echte stand
+
+        self.stats.inc('requests')
+        self.stats.inc('paced_seconds', start - now)
+        return start - now
+
+    def update(self, api_key: Optional[str], headers: Mapping[str, str], status: int = 200):
+        """Verwerk de rate limit headers van een response (ook bij een 429) en bewaar de state"""
+        limit = _header_number(headers, 'X-Ratelimit-Limit')
+        remaining = _header_number(headers, 'X-Ratelimit-Remaining')
+        reset_at = _header_number(headers, 'X-Ratelimit-Reset')
+
+        with self._lock:
+            quota = self._quota(api_key)
+            new_period = reset_at is not None and float(reset_at) != quota.reset_at
+            if limit is not None:
+                quota.limit = limit
+            if reset_at is not None:
+                quota.reset_at = float(reset_at)
+            if remaining is not None:
+                # Binnen een periode de laagste stand: responses van parallelle requests komen in willekeurige
+                # volgorde en de lokale telling rekent requests die nog onderweg zijn al mee
+                if quota.remaining is None or new_period:
+                    quota.remaining = remaining
+                else:
+                    quota.remaining = min(quota.remaining, remaining)
+            if status == 429:
+                self.stats.inc('rejected')
+                if remaining is None:
+                    # Geen headers: behandel het uurvenster als vol
+                    quota.next_at = max(quota.next_at, self.clock() + HOUR / self.hourly_limit)
+            self._save()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """State per key ID (voor logs en de benchmark)"""
+        now = self.clock()
+        with self._lock:
+            result = {}
+            for kid, quota in self._quotas.items():
+                quota.roll(now)
+                result[kid] = {'limit': quota.limit, 'remaining': quota.remaining,
+                               'reset_in_s': round(quota.reset_at - now) if quota.reset_at else None,
+                               'last_hour': len(quota.requests), 'interval_s': round(self._interval(quota, now), 2)}
+            return result
@@ -0,0 +1,132 @@
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# Markeert een veld dat (nog) niet gezet is; None is een geldige waarde (bijv. view_count onbekend)
+_UNSET = object()
+
+# Velden met veel herhaalde waarden: één gedeelde string per waarde i.p.v. een kopie per record
+_INTERNED = frozenset({'query', 'platform', 'uploader', 'upload_date', 'emotion', 'subject', 'setting', 'file_type'})
+
+
+class _SlottedRecord(MutableMapping):
+    """
+    Record met vaste velden in __slots__ dat zich als dict gedraagt
+
+    Bestaande code (record['title'], .get, .setdefault, .update, 'x' in record, csv.DictWriter,
+    pd.DataFrame) blijft werken, maar zonder per record een hash table met keys. Velden buiten
+    FIELDS (bijv. near_duplicate in flag mode) komen in een kleine extra dict die pas bij gebruik ontstaat.
+    Net als bij een dict bestaat een veld pas nadat het gezet is; keys() volgt de volgorde van FIELDS.
+    """
+    __slots__ = ('_extra',)
+    FIELDS: Sequence[str] = ()
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            object.__setattr__(self, field, _UNSET)
+        self._extra: Optional[Dict[str, Any]] = None
+        for key, value in values.items():
+            self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            if value is not _UNSET:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _INTERNED and type(value) is str:
+            value = sys.intern(value)
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in self.FIELDS and getattr(self, key) is not _UNSET:
+            setattr(self, key, _UNSET)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        if key in self.FIELDS:
+            return getattr(self, key) is not _UNSET
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for field in self.FIELDS:
+            if getattr(self, field) is not _UNSET:
+                yield field
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        # Sneller dan de Mapping versie (geen exception per ontbrekend veld)
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is _UNSET else value
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self}
+
+    def to_row(self, fieldnames: Sequence[str]) -> List[Any]:
+        """Waarden in kolomvolgorde (Excel/CSV sinks), None voor ontbrekende velden"""
+        return [self.get(field) for field in fieldnames]
+
+    def __reduce__(self):
+        # copy/pickle via de gezette velden: de standaard slot state zou de _UNSET sentinel meenemen,
+        # en die is na een pickle round-trip een ander object (niet-gezette velden lijken dan gezet)
+        return type(self), (), self.to_dict()
+
+    def __setstate__(self, state: Dict[str, Any]):
+        for key, value in state.items():
+            self[key] = value
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class YouTubeVideo(_SlottedRecord):
+    FIELDS = ('query', 'platform', 'url', 'title', 'duration', 'view_count', 'description', 'uploader',
+              'upload_date', 'thumbnail')
+    __slots__ = FIELDS
+
+
+class VimeoVideo(_SlottedRecord):
+    # Zoekresultaat uit DuckDuckGo plus de velden die de oEmbed enrichment toevoegt
+    FIELDS = ('query', 'platform', 'url', 'title', 'search_position', 'scraped_at', 'video_id', 'duration',
+              'uploader', 'upload_date', 'description', 'thumbnail', 'width', 'height')
+    __slots__ = FIELDS
+
+
+class PexelsVideo(_SlottedRecord):
+    FIELDS = ('query', 'platform', 'url', 'page_url', 'width', 'height', 'fps', 'file_type', 'duration',
+              'thumbnail')
+    __slots__ = FIELDS
+
+
+class QueryResult(_SlottedRecord):
+    """Resultaat van één query over alle platforms (PlatformScraper) plus de builder metadata"""
+    FIELDS = ('query', 'videos', 'total_videos', 'platforms', 'errors', 'seconds', 'query_id', 'emotion',
+              'subject', 'setting', 'staleness', 'timestamp', 'video_keys', 'new_videos')
+    __slots__ = FIELDS
+
+
+def to_json(value: Any) -> Any:
+    """`default` voor json.dump: records worden gewone dicts"""
+    if isinstance(value, _SlottedRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,113 @@
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+# Standaard gewicht per term-groep uit de keywords CSV
+DEFAULT_WEIGHTS = {
+    'emotion': 1.0,
+    'subject': 1.0,
+    'setting': 1.0,
+}
+
+# Scheidingsteken tussen kandidaten in de samengevoegde batch tekst
+_BATCH_SEP = '\n\x1e\n'
+
+
+def _term_pattern(term: str) -> str:
+    """Regex voor één term: woordgrens + simpele stam zodat 'child' ook 'children' matcht"""
+    words = []
+    for word in term.lower().split():
+        stem = word
+        for suffix in ('ren', 'es', 's'):
+            if len(stem) > len(suffix) + 3 and stem.endswith(suffix):
+                stem = stem[:-len(suffix)]
+                break
+        words.append(re.escape(stem) + r'\w*')
+    return r'\b' + r'\W+'.join(words)
+
+
+class RelevanceFilter:
+    """
+    Scoort kandidaat video's tegen de emotion/subject/setting termen van een query
+
+    De score is de gewogen fractie van term-groepen die in titel of beschrijving voorkomen (0.0 - 1.0).
+    Een hele batch wordt in één regex scan beoordeeld.
+    """
+
+    def __init__(self, threshold: float = 0.3, fields: tuple = ('title', 'description'),
+                 weights: Optional[Dict[str, float]] = None):
+        """
+        :param threshold: Minimale score om een kandidaat te behouden
+        :param fields: Velden van de kandidaat die doorzocht worden
+        :param weights: Gewicht per term-groep (default: alle groepen even zwaar)
+        """
+        self.threshold = threshold
+        self.fields = fields
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self._pattern_cache: Dict[tuple, re.Pattern] = {}
+
+    @staticmethod
+    def terms_from_query(query: str) -> Dict[str, str]:
+        """Zonder expliciete termen wordt elk woord van de query een eigen groep"""
+        return {f'word_{idx}': word for idx, word in enumerate(query.split())}
+
+    def _compile(self, terms: Dict[str, str]) -> re.Pattern:
+        key = tuple(sorted(terms.items()))
+        pattern = self._pattern_cache.get(key)
+        if pattern is None:
+            groups = [
+                f'(?P<{group}>{_term_pattern(term)})'
+                for group, term in key
+                if term and term.strip()
+            ]
+            pattern = re.compile('|'.join(groups) or r'(?!x)x')
+            self._pattern_cache[key] = pattern
+        return pattern
+
+    def score_batch(self, candidates: List[Dict], terms: Dict[str, str]) -> List[float]:
+        """
+        Bereken de relevantie score voor een batch kandidaten
+
+        :param candidates: Video dicts met (een deel van) self.fields
+        :param terms: Mapping van groep (emotion/subject/setting) naar term
+        :return: Score per kandidaat, in dezelfde volgorde
+        """
+        if not candidates:
+            return []
+
+        active = {group: term for group, term in terms.items() if term and term.strip()}
+        total_weight = sum(self.weights.get(group, 1.0) for group in active)
+        if not total_weight:
+            return [1.0] * len(candidates)
+
+        # Eén samengevoegde tekst + offsets, zodat de regex maar één keer over de batch loopt
+        texts = []
+        for candidate in candidates:
+            texts.append(' '.join(str(candidate.get(field) or '') for field in self.fields).lower())
+        joined = _BATCH_SEP.join(texts)
+
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + len(_BATCH_SEP)
+
+        matched = [set() for _ in candidates]
+        for match in self._compile(active).finditer(joined):
+            matched[bisect_right(starts, match.start()) - 1].add(match.lastgroup)
+
+        return [
+            sum(self.weights.get(group, 1.0) for group in groups) / total_weight
+            for groups in matched
+        ]
+
+    def filter_batch(self, candidates: List[Dict], terms: Dict[str, str]) -> List[Dict]:
+        """
+        Behoud alleen kandidaten met score >= threshold
+
+        :param candidates: Video dicts
+        :param terms: Mapping van groep naar term
+        :return: Gefilterde lijst (volgorde blijft behouden)
+        """
+        scores = self.score_batch(candidates, terms)
+        return [c for c, score in zip(candidates, scores) if score >= self.threshold]
@@ -1,4 +1,8 @@
 import argparse
+from config import LoggerConfig
+from metrics import REGISTRY
+import profiling
+from platforms import available_platforms
 from main import EmotionVideoDatasetBuilder
 
 
@@ -30,7 +34,8 @@ def parse_args():
         "--platforms",
         nargs="+",
         default=["youtube"],
-        help="Platforms to scrape (e.g. youtube vimeo)"
+        choices=available_platforms(),
+        help="Platforms to scrape in parallel per query (e.g. youtube vimeo pexels)"
     )
 
     parser.add_argument(
@@ -47,23 +52,109 @@ def parse_args():
         help="Save intermediate results every N queries"
     )
 
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Only re-scrape stale queries (by age and past churn) and store only new or changed videos"
+    )
+
+    parser.add_argument(
+        "--refresh-threshold",
+        type=float,
+        default=0.25,
+        help="With --refresh: minimum expected fraction of changed results for a query to be re-scraped"
+    )
+
+    parser.add_argument(
+        "--refresh-max-queries",
+        type=int,
+        default=None,
+        help="With --refresh: re-scrape at most this many queries (most stale first)"
+    )
+
+    parser.add_argument(
+        "--log-mode",
+        default="queue",
+        choices=["sync", "queue", "json"],
+        help="sync: per-module log files; queue: background writer with rotating files; json: queue + JSON lines"
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus metrics on http://127.0.0.1:<port>/metrics during the run"
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help="Write a JSON metrics snapshot to this file periodically (e.g. data/results/metrics.json)"
+    )
+
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between metrics snapshots"
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every stage and write a per-stage breakdown to <output-dir>/profile_<timestamp>.json"
+    )
+
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="With --profile: take tracemalloc snapshots at each checkpoint and report the top allocation sites"
+    )
+
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
 
+    if args.log_mode != "sync":
+        LoggerConfig.configure(json_format=args.log_mode == "json")
+
+    if args.metrics_port is not None:
+        REGISTRY.serve(port=args.metrics_port)
+    if args.metrics_file:
+        REGISTRY.start_snapshots(args.metrics_file, interval=args.metrics_interval)
+
+    if args.profile:
+        profiling.start(output_dir=args.output_dir, trace_memory=args.profile_memory)
+
     builder = EmotionVideoDatasetBuilder(
         csv_path=args.csv,
         output_dir=args.output_dir
     )
 
-    builder.run(
-        style=args.style,
-        platforms=args.platforms,
-        start_from=args.start_from,
-        batch_size=args.batch_size
-    )
+    try:
+        if args.refresh:
+            builder.refresh(
+                style=args.style,
+                platforms=args.platforms,
+                threshold=args.refresh_threshold,
+                max_queries=args.refresh_max_queries,
+                batch_size=args.batch_size
+            )
+        else:
+            builder.run(
+                style=args.style,
+                platforms=args.platforms,
+                start_from=args.start_from,
+                batch_size=args.batch_size
+            )
+    finally:
+        builder.close()
+        summary = profiling.stop()
+        if summary:
+            builder.logger.info(summary)
+        REGISTRY.stop()
 
 
 if __name__ == "__main__":
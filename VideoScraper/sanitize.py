@@ -0,0 +1,91 @@
+import re
+from typing import Dict, Iterable, List
+
+# Tekstvelden die elke scraper opschoont voordat ze naar CSV/Excel gaan
+TEXT_FIELDS = ('title', 'description', 'uploader')
+
+# Scheidingsteken om een hele batch als één string te verwerken (wordt zelf niet weggefilterd)
+_BATCH_SEP = '\x1e'
+
+# Alles gebeurt op UTF-8 bytes: bytes.translate en regexes met een vaste prefix
+# lopen in C over de tekst, zonder Python werk per karakter.
+# ASCII newlines/tabs -> spatie, overige ASCII control characters -> weg
+_ASCII_TABLE = bytearray(range(256))
+for _c in b'\r\n\t\v\f':
+    _ASCII_TABLE[_c] = ord(' ')
+_ASCII_TABLE = bytes(_ASCII_TABLE)
+_ASCII_DELETE = bytes(c for c in range(0x20) if c not in b'\r\n\t\v\f') + b'\x7f'
+_BATCH_ASCII_DELETE = _ASCII_DELETE.replace(_BATCH_SEP.encode(), b'')
+
+# Non-BMP karakters (emoji e.d.) breken Excel/oudere CSV readers; in UTF-8 zijn dat 4-byte sequenties
+_NON_BMP_F0_RE = re.compile(rb'\xf0[\x80-\xbf]{3}')
+_NON_BMP_OTHER_RE = re.compile(rb'[\xf1-\xf4][\x80-\xbf]{3}')
+# C1 control characters (U+0080-U+009F); U+0085 (NEL) wordt eerst een spatie
+_C1_RE = re.compile(rb'\xc2[\x80-\x9f]')
+_MULTI_SPACE_RE = re.compile(rb'  +')
+
+
+def _clean_bytes(data: bytes, delete: bytes) -> bytes:
+    data = data.translate(_ASCII_TABLE, delete)
+    if b'\xf0' in data:
+        data = _NON_BMP_F0_RE.sub(b'', data)
+    if b'\xf1' in data or b'\xf2' in data or b'\xf3' in data or b'\xf4' in data:
+        data = _NON_BMP_OTHER_RE.sub(b'', data)
+    if b'\xc2' in data:
+        data = _C1_RE.sub(b'', data.replace(b'\xc2\x85', b' '))
+    if b'\xe2\x80' in data:
+        # U+2028 LINE SEPARATOR / U+2029 PARAGRAPH SEPARATOR
+        data = data.replace(b'\xe2\x80\xa8', b' ').replace(b'\xe2\x80\xa9', b' ')
+    return _MULTI_SPACE_RE.sub(b' ', data)
+
+
+def sanitize_text(value) -> str:
+    """
+    Maak een enkele waarde CSV-safe
+
+    :param value: Tekst (of None / ander type)
+    :return: Opgeschoonde string, '' voor None
+    """
+    if value is None:
+        return ''
+    data = str(value).encode('utf-8', 'ignore')
+    return _clean_bytes(data, _ASCII_DELETE).decode('utf-8').strip()
+
+
+def sanitize_records(records: List[Dict], fields: Iterable[str] = TEXT_FIELDS) -> List[Dict]:
+    """
+    Schoon de tekstvelden van een hele batch records in één keer op (in-place)
+
+    Alle waarden worden samengevoegd tot één string zodat translate en de regexes
+    maar één keer over de batch lopen in plaats van per veld of per karakter.
+
+    :param records: Lijst van video dicts
+    :param fields: Velden die opgeschoond moeten worden (ontbrekende velden worden overgeslagen)
+    :return: Dezelfde lijst records
+    """
+    slots = []
+    values = []
+    for record in records:
+        for field in fields:
+            if field in record:
+                value = record[field]
+                slots.append((record, field))
+                values.append('' if value is None else str(value))
+
+    if not values:
+        return records
+
+    joined = _BATCH_SEP.join(values)
+    if joined.count(_BATCH_SEP) != len(values) - 1:
+        # Het scheidingsteken komt in de data zelf voor; val terug op per-waarde verwerking
+        for record, field in slots:
+            record[field] = sanitize_text(record[field])
+        return records
+
+    data = _clean_bytes(joined.encode('utf-8', 'ignore'), _BATCH_ASCII_DELETE)
+    cleaned = data.decode('utf-8').split(_BATCH_SEP)
+
+    for (record, field), value in zip(slots, cleaned):
+        record[field] = value.strip()
+
+    return records
@@ -0,0 +1,80 @@
+import argparse
+import random
+import timeit
+
+from sanitize import TEXT_FIELDS, sanitize_records, sanitize_text
+
+# Woorden zoals ze in titels/beschrijvingen voorkomen, plus de lastige gevallen
+_WORDS = ['the', 'video', 'guilt', 'beach', 'children', 'playing', 'música', 'über', '中文',
+          'family', 'happy', 'subscribe', 'channel', 'https://youtu.be/abc']
+_NOISE = ['\n', '\r\n', ' 😀', '\x07', '\x85', '\t']
+
+
+def make_records(count: int, description_length: int, seed: int = 42):
+    rng = random.Random(seed)
+
+    def text(length):
+        words = []
+        size = 0
+        while size < length:
+            word = rng.choice(_WORDS)
+            if rng.random() < 0.08:
+                word += rng.choice(_NOISE)
+            words.append(word)
+            size += len(word) + 1
+        return ' '.join(words)
+
+    return [
+        {
+            'title': text(60),
+            'description': text(description_length),
+            'uploader': text(20),
+        }
+        for _ in range(count)
+    ]
+
+
+def legacy_make_csv_safe(text):
+    """Oude per-karakter implementatie uit VideoScraper.make_csv_safe"""
+    return "".join(char for char in text if ord(char) <= 0xFFF)
+
+
+def run_legacy(records):
+    for record in records:
+        for field in TEXT_FIELDS:
+            legacy_make_csv_safe(record[field])
+
+
+def run_per_value(records):
+    for record in records:
+        for field in TEXT_FIELDS:
+            sanitize_text(record[field])
+
+
+def run_batch(records):
+    sanitize_records([dict(r) for r in records])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark for the text sanitization pipeline")
+    parser.add_argument('--records', type=int, default=500, help="Records per batch")
+    parser.add_argument('--description-length', type=int, default=2000, help="Characters per description")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_records(args.records, args.description_length)
+    chars = sum(len(r[f]) for r in records for f in TEXT_FIELDS)
+
+    print(f"{args.records} records, {chars:,} characters per batch")
+    print(f"{'implementation':<28}{'best (ms)':>12}{'MB/s':>10}")
+    for name, func in [
+        ('legacy make_csv_safe', run_legacy),
+        ('sanitize_text per value', run_per_value),
+        ('sanitize_records batch', run_batch),
+    ]:
+        best = min(timeit.repeat(lambda: func(records), number=1, repeat=args.repeat))
+        print(f"{name:<28}{best * 1000:>12.2f}{chars / best / 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+import base64
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+# YouTube zoekfilter (sp parameter): protobuf veld 2 met upload datum (veld 1) en duur (veld 3)
+_SP_UPLOAD_BUCKETS = [
+    (timedelta(hours=1), 1),
+    (timedelta(days=1), 2),
+    (timedelta(days=7), 3),
+    (timedelta(days=31), 4),
+    (timedelta(days=366), 5),
+]
+_SP_DURATION_SHORT = 1  # < 4 minuten
+_SP_DURATION_LONG = 2  # > 20 minuten
+_SP_DURATION_MEDIUM = 3  # 4 - 20 minuten
+
+SHORTS_MAX_DURATION = 180
+
+
+def _parse_date(value) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    value = str(value).replace('-', '')
+    return datetime.strptime(value, '%Y%m%d').date()
+
+
+def is_short(entry: Dict) -> Optional[bool]:
+    """
+    Is een (flat of volledige) yt-dlp entry een YouTube Short?
+
+    :return: True/False, of None als de beschikbare velden het nog niet vertellen
+    """
+    url = entry.get('url') or entry.get('webpage_url') or ''
+    if '/shorts/' in url:
+        return True
+    duration = entry.get('duration')
+    if duration is not None and duration > SHORTS_MAX_DURATION:
+        return False
+    width, height = entry.get('width'), entry.get('height')
+    if width and height:
+        return height > width
+    return None
+
+
+@dataclass
+class VideoFilterSpec:
+    """
+    Declaratieve filter voor zoekresultaten
+
+    Elke conditie wordt toegepast op het vroegste moment dat het veld beschikbaar is:
+    de zoek URL (sp parameter), de flat search entries, en pas als laatste de volledige metadata.
+    Een veld dat in een stage nog ontbreekt laat de entry door naar de volgende stage.
+    """
+    min_duration: Optional[int] = None  # seconden
+    max_duration: Optional[int] = None  # seconden
+    uploaded_after: Optional[date] = None  # date of 'YYYYMMDD'
+    uploaded_before: Optional[date] = None
+    min_views: Optional[int] = None
+    shorts: Optional[bool] = None  # None = alles, True = alleen shorts, False = geen shorts
+
+    def __post_init__(self):
+        self.uploaded_after = _parse_date(self.uploaded_after)
+        self.uploaded_before = _parse_date(self.uploaded_before)
+
+    @classmethod
+    def from_dict(cls, spec: Optional[Dict]) -> Optional['VideoFilterSpec']:
+        return cls(**spec) if spec else None
+
+    def is_empty(self) -> bool:
+        return all(v is None for v in (self.min_duration, self.max_duration, self.uploaded_after,
+                                       self.uploaded_before, self.min_views, self.shorts))
+
+    def _sp_duration(self) -> Optional[int]:
+        """YouTube duur bucket die de hele [min, max] range dekt"""
+        low = self.min_duration or 0
+        high = self.max_duration
+        if high is not None and high <= 4 * 60:
+            return _SP_DURATION_SHORT
+        if low >= 20 * 60:
+            return _SP_DURATION_LONG
+        if low >= 4 * 60 and high is not None and high <= 20 * 60:
+            return _SP_DURATION_MEDIUM
+        return None
+
+    def _sp_upload(self) -> Optional[int]:
+        """Kleinste upload bucket ('afgelopen uur/dag/week/maand/jaar') die het venster dekt"""
+        if self.uploaded_after is None or self.uploaded_before is not None:
+            return None
+        age = datetime.now() - datetime.combine(self.uploaded_after, datetime.min.time())
+        for span, bucket in _SP_UPLOAD_BUCKETS:
+            if age <= span:
+                return bucket
+        return None
+
+    def youtube_sp(self) -> Optional[str]:
+        """Encodeer de filters die YouTube zelf kan toepassen als sp parameter"""
+        fields = b''
+        upload = self._sp_upload()
+        if upload is not None:
+            fields += bytes([0x08, upload])
+        duration = self._sp_duration()
+        if duration is not None:
+            fields += bytes([0x18, duration])
+        if not fields:
+            return None
+        return base64.b64encode(bytes([0x12, len(fields)]) + fields).decode('ascii')
+
+    def youtube_search_url(self, query: str, max_results: int) -> str:
+        """
+        Zoek URL voor yt-dlp; met sp parameter als YouTube een deel van de filters zelf kan doen
+
+        Zonder sp filter blijft het de gewone ytsearchN: prefix.
+        """
+        sp = self.youtube_sp()
+        if sp is None:
+            return f"ytsearch{max_results}:{query}"
+        return "https://www.youtube.com/results?" + urlencode({'search_query': query, 'sp': sp})
+
+    def check(self, entry: Dict, complete: bool = True) -> Tuple[bool, Optional[str]]:
+        """
+        Controleer een yt-dlp entry
+
+        :param entry: Flat of volledige yt-dlp info dict
+        :param complete: False voor flat entries: ontbrekende velden zijn dan geen afwijzing
+        :return: (accepted, reden van afwijzing)
+        """
+        duration = entry.get('duration')
+        if duration is not None:
+            if self.min_duration is not None and duration < self.min_duration:
+                return False, f"duration {duration}s < {self.min_duration}s"
+            if self.max_duration is not None and duration > self.max_duration:
+                return False, f"duration {duration}s > {self.max_duration}s"
+
+        views = entry.get('view_count')
+        if views is not None and self.min_views is not None and views < self.min_views:
+            return False, f"{views} views < {self.min_views}"
+
+        upload_date = entry.get('upload_date')
+        if upload_date:
+            uploaded = _parse_date(upload_date)
+            if self.uploaded_after is not None and uploaded < self.uploaded_after:
+                return False, f"uploaded {uploaded} before {self.uploaded_after}"
+            if self.uploaded_before is not None and uploaded > self.uploaded_before:
+                return False, f"uploaded {uploaded} after {self.uploaded_before}"
+
+        if self.shorts is not None:
+            short = is_short(entry)
+            if short is None and complete:
+                short = duration is not None and duration <= 60
+            if short is not None and short != self.shorts:
+                return False, "short" if short else "not a short"
+
+        return True, None
+
+    def yt_dlp_match_filter(self, info: Dict, *, incomplete: bool = False) -> Optional[str]:
+        """
+        match_filter voor yt-dlp; yt-dlp roept hem ook aan op flat playlist entries (incomplete=True),
+        zodat afgewezen video's nooit volledig geëxtraheerd worden.
+        """
+        accepted, reason = self.check(info, complete=not incomplete)
+        return None if accepted else reason
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Set, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BASE_DIR, 'data', 'benchmarks', 'startup_baseline.json')
+
+# Modules die bij "import <entry point>" geladen worden
+ENTRY_POINTS = [
+    'youtube_scraper',
+    'vimeo_scraper',
+    'pexels_scraper',
+    'query_generator',
+    'main',
+    'run_dataset_builder',
+]
+
+# Zware dependencies die alleen op het pad geladen mogen worden dat ze echt nodig heeft
+HEAVY_MODULES = {
+    'pandas', 'numpy', 'yt_dlp', 'bs4', 'requests', 'urllib3',
+    'openpyxl', 'cleantext', 'aiohttp', 'selenium',
+}
+
+
+def measure_import(module: str) -> Tuple[int, Set[str]]:
+    """
+    Importeer een module in een nieuw proces met `python -X importtime`
+
+    :param module: Naam van de module
+    :return: (cumulatieve import tijd in microseconden, set van geladen top-level packages)
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+
+    cumulative = 0
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # header regel
+        name = parts[2].strip()
+        loaded.add(name.split('.')[0])
+        if name == module:
+            cumulative = int(parts[1])
+
+    return cumulative, loaded
+
+
+def run_benchmark(modules: List[str], repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for module in modules:
+        timings = []
+        loaded: Set[str] = set()
+        for _ in range(repeat):
+            cumulative, loaded = measure_import(module)
+            timings.append(cumulative)
+        results[module] = {
+            'cumulative_us': min(timings),
+            'heavy_modules': sorted(loaded & HEAVY_MODULES),
+        }
+    return results
+
+
+def load_baseline() -> Dict[str, int]:
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results: Dict[str, Dict]):
+    os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+    with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+        json.dump({m: r['cumulative_us'] for m, r in results.items()}, f, indent=2)
+        f.write('\n')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Startup (import time) benchmark for the scraper entry points")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per entry point (the fastest run counts)")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Allowed slowdown relative to the baseline (0.5 = 50%%)")
+    parser.add_argument('--update-baseline', action='store_true', help="Store the current timings as the new baseline")
+    parser.add_argument('modules', nargs='*', default=ENTRY_POINTS)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.modules, args.repeat)
+
+    if args.update_baseline:
+        save_baseline(results)
+        print(f"Baseline written to {BASELINE_FILE}")
+
+    baseline = load_baseline()
+    failures = []
+
+    print(f"{'module':<22}{'import (ms)':>12}{'baseline (ms)':>15}")
+    for module, result in results.items():
+        cumulative = result['cumulative_us']
+        budget = baseline.get(module)
+        budget_str = f"{budget / 1000:.1f}" if budget else '-'
+        print(f"{module:<22}{cumulative / 1000:>12.1f}{budget_str:>15}")
+
+        if result['heavy_modules']:
+            failures.append(f"{module} eagerly imports {', '.join(result['heavy_modules'])}")
+        if budget and cumulative > budget * (1 + args.tolerance):
+            failures.append(
+                f"{module} import time regressed: {cumulative / 1000:.1f}ms > {budget / 1000:.1f}ms baseline"
+            )
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("\nOK: startup budget respected")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
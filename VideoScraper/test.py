@@ -1,24 +1,6 @@
 from urllib import request
 from urllib.parse import urlencode
-from html.parser import HTMLParser
-
-
-class VimeoLinkParser(HTMLParser):
-    def __init__(self, max_results=5):
-        super().__init__()
-        self.max_results = max_results
-        self.links = []
-
-    def handle_starttag(self, tag, attrs):
-        if tag != "a" or len(self.links) >= self.max_results:
-            return
-
-        attrs = dict(attrs)
-        href = attrs.get("href", "")
-        class_attr = attrs.get("class", "")
-
-        if "result__a" in class_attr and "vimeo.com" in href:
-            self.links.append(href)
+from link_extractor import extract_targets
 
 
 def search(baseurl, query, max_results=5):
@@ -42,10 +24,10 @@ def search(baseurl, query, max_results=5):
         html = res.read().decode("utf-8")
         print(html)
 
-    parser = VimeoLinkParser(max_results)
-    parser.feed(html)
+    targets = extract_targets(html, max_results=max_results, base_url=baseurl,
+                              domain='vimeo.com', css_class='result__a', tags=('a',))
 
-    return parser.links
+    return [target['url'] for target in targets]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,673 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BASE_DIR, 'data', 'benchmarks', 'throughput_baseline.json')
+DDG_FIXTURE = os.path.join(BASE_DIR, 'data', 'benchmarks', 'html', 'ddg_lite_results.html')
+
+TARGETS = ['youtube', 'pexels', 'vimeo', 'builder']
+
+# Keywords voor de dataset builder: emoties x 2 subjects x 2 settings, zodat er net genoeg queries zijn
+BUILDER_SUBJECTS = ['woman', 'children']
+BUILDER_SETTINGS = ['beach', 'park']
+
+_FILLER = ['video', 'clip', 'footage', 'moment', 'scene', 'vlog', 'story', 'day', 'life', 'film']
+
+
+def _video_id(*parts, length: int = 11) -> str:
+    """Deterministische YouTube-achtige ID, zodat elke query andere video's oplevert"""
+    import base64
+    import hashlib
+
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).digest()
+    return base64.urlsafe_b64encode(digest).decode('ascii')[:length]
+
+
+def _numeric_id(*parts) -> str:
+    import hashlib
+
+    return str(int(hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()[:12], 16) % 10**9).rjust(9, '1')
+
+
+# ---------------------------------------------------------------------------------------------------
+# Stand-ins
+# ---------------------------------------------------------------------------------------------------
+
+class FakeYoutubeDL:
+    """
+    Vervangt yt_dlp.YoutubeDL: synthetische flat zoekresultaten en volledige video metadata
+
+    Ongeveer 70% van de titels bevat de zoektermen, zodat de relevantie filter echt werk doet.
+    Elke extract_info kost `latency` seconden, als stand-in voor de netwerk round trip.
+    """
+
+    latency = 0.005
+
+    def __init__(self, params: Optional[Dict] = None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url: str, download: bool = False) -> Dict:
+        import random
+        from urllib.parse import parse_qs, urlparse
+
+        time.sleep(self.latency)
+        if url.startswith('ytsearch'):
+            count, query = url[len('ytsearch'):].split(':', 1)
+            count = int(count or 1)
+        elif 'search_query=' in url:
+            query = parse_qs(urlparse(url).query)['search_query'][0]
+            count = self.params.get('playlistend') or 20
+        else:
+            video_id = parse_qs(urlparse(url).query).get('v', [url.rsplit('/', 1)[-1]])[0]
+            return self._full_entry(video_id)
+
+        rng = random.Random(query)
+        entries = []
+        for i in range(count):
+            video_id = _video_id(query, i)
+            words = rng.sample(_FILLER, 3)
+            title = f"{query} {' '.join(words)}" if rng.random() < 0.7 else ' '.join(words).title()
+            entries.append({
+                'id': video_id,
+                'url': f"https://www.youtube.com/watch?v={video_id}",
+                'title': title,
+                'duration': rng.randint(20, 900),
+                'view_count': rng.randint(100, 10**6),
+            })
+            _TITLES[video_id] = title
+        return {'entries': entries}
+
+    def _full_entry(self, video_id: str) -> Dict:
+        import random
+
+        rng = random.Random(video_id)
+        title = _TITLES.get(video_id, f"Video {video_id}")
+        return {
+            'id': video_id,
+            'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
+            'title': title,
+            'duration': rng.randint(20, 900),
+            'view_count': rng.randint(100, 10**6),
+            'description': f"{title}. " + ' '.join(rng.choice(_FILLER) for _ in range(rng.randint(20, 120))),
+            'uploader': f"channel_{rng.randint(1, 500)}",
+            'upload_date': f"20{rng.randint(15, 25)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+            'thumbnails': [
+                {'url': f"https://i.ytimg.com/vi/{video_id}/default.jpg", 'width': 120, 'height': 90},
+                {'url': f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg", 'width': 320, 'height': 180},
+                {'url': f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg", 'width': 480, 'height': 360},
+            ],
+        }
+
+
+# Titels uit de flat search, zodat de volledige entry dezelfde titel heeft
+_TITLES: Dict[str, str] = {}
+
+
+def start_pexels_server(latency: float, quota: int = 1_000_000, period: float = 30 * 86400):
+    """
+    Lokale aiohttp server die api.pexels.com/videos/search nabootst (eigen event loop op een daemon thread)
+
+    Net als de echte API stuurt hij X-Ratelimit-Limit/Remaining/Reset mee en geeft hij 429 als het
+    budget van de periode op is; met een kleine quota en periode is de QuotaManager zo te testen.
+
+    :param quota: Requests per periode
+    :param period: Lengte van de quota periode in seconden
+    :return: (base URL van /videos/search, stop functie)
+    """
+    import asyncio
+    import random
+    import threading
+
+    from aiohttp import web
+
+    usage = {'reset': time.time() + period, 'used': 0}
+
+    def rate_limit_headers() -> Dict[str, str]:
+        if time.time() >= usage['reset']:
+            usage['reset'] = time.time() + period
+            usage['used'] = 0
+        return {'X-Ratelimit-Limit': str(quota), 'X-Ratelimit-Remaining': str(max(quota - usage['used'], 0)),
+                'X-Ratelimit-Reset': str(int(usage['reset']))}
+
+    async def search(request):
+        query = request.query.get('query', '')
+        per_page = int(request.query.get('per_page', 15))
+        await asyncio.sleep(latency)
+
+        headers = rate_limit_headers()
+        if usage['used'] >= quota:
+            return web.json_response({'error': 'Rate limit exceeded'}, status=429, headers=headers)
+        usage['used'] += 1
+        headers = rate_limit_headers()
+
+        rng = random.Random(query)
+        slug = query.lower().replace(' ', '-')
+        videos = []
+        for i in range(per_page):
+            video_id = int(_numeric_id(query, i))
+            files = []
+            for quality, width, height in (('sd', 640, 360), ('sd', 960, 540), ('hd', 1280, 720),
+                                           ('hd', 1920, 1080), ('uhd', 3840, 2160)):
+                files.append({
+                    'id': video_id * 10 + len(files),
+                    'quality': quality,
+                    'file_type': 'video/mp4',
+                    'width': width,
+                    'height': height,
+                    'fps': rng.choice((24, 25, 30, 60)),
+                    'link': f"https://videos.pexels.com/video-files/{video_id}/{video_id}-{quality}_{width}_{height}.mp4",
+                })
+            videos.append({
+                'id': video_id,
+                'width': 3840,
+                'height': 2160,
+                'url': f"https://www.pexels.com/video/{slug}-{video_id}/",
+                'image': f"https://images.pexels.com/videos/{video_id}/pictures/preview-0.jpg",
+                'duration': rng.randint(5, 60),
+                'user': {'id': rng.randint(1, 10**6), 'name': 'Stand-in', 'url': 'https://www.pexels.com/@stand-in'},
+                'video_files': files,
+                'video_pictures': [],
+            })
+        return web.json_response({'page': 1, 'per_page': per_page, 'total_results': 1000, 'videos': videos},
+                                 headers=headers)
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def start():
+        app = web.Application()
+        app.router.add_get('/videos/search', search)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        state['runner'] = runner
+        state['port'] = runner.addresses[0][1]
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name='pexels-standin', daemon=True).start()
+    ready.wait()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(state['runner'].cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    return f"http://127.0.0.1:{state['port']}/videos/search", stop
+
+
+def start_ddg_server(latency: float):
+    """
+    Lokale DuckDuckGo lite: GET geeft het zoekformulier, POST de resultaat fixture
+
+    De Vimeo video ID's in de fixture worden per query herschreven, zodat de dedup stages
+    niet alles na de eerste query weggooien.
+
+    :return: (URL van /lite/, stop functie)
+    """
+    import re
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs
+
+    with open(DDG_FIXTURE, encoding='utf-8') as f:
+        fixture = f.read()
+    video_ids = re.compile(r'(vimeo\.com%2F)(\d{5,})')
+    form = ('<html><body><form action="/lite/" method="post">'
+            '<input class="query" type="text" name="q"><input class="submit" type="submit" value="Search">'
+            '</form></body></html>')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, body: str):
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=UTF-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            time.sleep(latency)
+            self._send(form)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            query = parse_qs(self.rfile.read(length).decode('utf-8')).get('q', [''])[0]
+            time.sleep(latency)
+            self._send(video_ids.sub(lambda m: m.group(1) + _numeric_id(query, m.group(2)), fixture))
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='ddg-standin', daemon=True).start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+
+    return f"http://127.0.0.1:{server.server_address[1]}/lite/", stop
+
+
+class _FakeElement:
+    def __init__(self, driver: 'FakeDriver', name: str):
+        self.driver = driver
+        self.name = name
+
+    def send_keys(self, keys: str):
+        self.driver.typed += keys
+
+    def click(self):
+        self.driver.submit()
+
+
+class FakeDriver:
+    """Minimale Selenium driver: echte HTTP requests naar de lokale DuckDuckGo, geen browser"""
+
+    def __init__(self):
+        self.page_source = ''
+        self.current_url = ''
+        self.typed = ''
+
+    def get(self, url: str):
+        from urllib.request import urlopen
+
+        with urlopen(url) as resp:
+            self.page_source = resp.read().decode('utf-8')
+        self.current_url = url
+
+    def find_element(self, by: str, value: str) -> _FakeElement:
+        return _FakeElement(self, value)
+
+    def submit(self):
+        from urllib.parse import urlencode
+        from urllib.request import urlopen
+
+        with urlopen(self.current_url, data=urlencode({'q': self.typed}).encode('utf-8')) as resp:
+            self.page_source = resp.read().decode('utf-8')
+
+    def quit(self):
+        pass
+
+
+# ---------------------------------------------------------------------------------------------------
+# Eén target meten (in een eigen proces, zodat de peak RSS per target klopt)
+# ---------------------------------------------------------------------------------------------------
+
+class _QueryClock:
+    """Latency en aantal video's per query, voor directe scrape functies en voor pipelines"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.counts: List[int] = []
+        self.started: Dict[str, float] = {}
+
+    @property
+    def queries(self) -> int:
+        return max(len(self.latencies), len(self.started))
+
+    def timed(self, func: Callable, count: Callable = len) -> Callable:
+        """Wrap een functie die één query helemaal afhandelt"""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+            self.counts.append(count(result) if result else 0)
+            return result
+        return wrapper
+
+    def completed(self, func: Callable) -> Callable:
+        """Wrap een generator van (item, results) zoals PlatformScraper.scrape_many"""
+        def wrapper(*args, **kwargs):
+            for item, results in func(*args, **kwargs):
+                self.latencies.append(results['seconds'])
+                self.counts.append(results.get('total_videos', 0))
+                yield item, results
+        return wrapper
+
+    def first_stage(self, func: Callable, query_arg: int = 0) -> Callable:
+        """Pipeline: de query komt de eerste stage binnen (args[query_arg] is de query)"""
+        def wrapper(*args, **kwargs):
+            self.started.setdefault(args[query_arg], time.perf_counter())
+            return func(*args, **kwargs)
+        return wrapper
+
+    def last_stage(self, func: Callable, rows_arg: int) -> Callable:
+        """Pipeline: de rows van een query (met 'query' veld) zijn weggeschreven"""
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            rows = args[rows_arg]
+            if rows:
+                self.latencies.append(time.perf_counter() - self.started[rows[0]['query']])
+                self.counts.append(len(rows))
+            return result
+        return wrapper
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux geeft KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _skip_sleeps() -> Dict[str, float]:
+    """
+    Rate-limit sleeps tellen wel mee in de registry, maar wachten niet
+
+    Per platform telt 'advanced' hoeveel de tijd door de overgeslagen pauzes verder had moeten zijn;
+    _quota_clock geeft de QuotaManager die tijd. Zonder die klok gaat de tijd tussen twee reserveringen
+    niet vooruit, schuift elke reservering verder de toekomst in en groeit de wachttijd kwadratisch.
+    """
+    import threading
+
+    from metrics import REGISTRY, RATE_LIMIT_WAIT
+
+    skipped = {'seconds': 0.0, 'advanced': {}}
+    lock = threading.Lock()
+
+    def sleep(seconds, **labels):
+        if seconds > 0:
+            with lock:
+                skipped['seconds'] += seconds
+                platform = labels.get('platform')
+                skipped['advanced'][platform] = skipped['advanced'].get(platform, 0.0) + seconds
+            REGISTRY.inc(RATE_LIMIT_WAIT, seconds, **labels)
+
+    async def async_sleep(seconds, **labels):
+        sleep(seconds, **labels)
+
+    REGISTRY.sleep = sleep
+    REGISTRY.async_sleep = async_sleep
+    return skipped
+
+
+def _quota_clock(skipped: Dict, platform: str = 'pexels') -> Callable[[], float]:
+    """Unix tijd plus de overgeslagen pauzes van het platform (requests van één platform lopen na elkaar)"""
+    return lambda: time.time() + skipped['advanced'].get(platform, 0.0)
+
+
+def _write_builder_csv(path: str, queries: int):
+    """Keywords CSV met precies genoeg emoties (uit de echte keywords) voor `queries` combinaties"""
+    import csv
+    import math
+
+    from tools import read_terms
+
+    per_emotion = len(BUILDER_SUBJECTS) * len(BUILDER_SETTINGS)
+    emotions = sorted(read_terms('data/Scraping_Part1_keywords_extended.csv')[0])[:math.ceil(queries / per_emotion)]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Emotion', 'Subject', 'Setting'])
+        for i, emotion in enumerate(emotions):
+            writer.writerow([emotion,
+                             BUILDER_SUBJECTS[i] if i < len(BUILDER_SUBJECTS) else '',
+                             BUILDER_SETTINGS[i] if i < len(BUILDER_SETTINGS) else ''])
+
+
+def run_target(target: str, queries: int, latency: float, work_dir: str) -> Dict:
+    """
+    Draai één scraper tegen zijn stand-in en meet throughput
+
+    :return: Dict met queries, videos, seconds, queries_per_s, videos_per_s, p50_ms, p99_ms,
+        peak_rss_mb en skipped_sleep_s (of 'skipped' met een reden)
+    """
+    import logging
+    import random
+
+    from config import LoggerConfig
+
+    random.seed(0)
+    LoggerConfig.configure(log_dir=os.path.join(work_dir, 'logs'), console_level=logging.WARNING)
+    skipped_sleep = _skip_sleeps()
+    FakeYoutubeDL.latency = latency
+
+    clock = _QueryClock()
+    stop_servers = []
+
+    try:
+        if target == 'youtube':
+            import yt_dlp
+            from youtube_scraper import VideoScraper
+
+            yt_dlp.YoutubeDL = FakeYoutubeDL
+            scraper = VideoScraper()
+            scraper.queries = scraper.queries[:queries]
+            scraper.search_entries = clock.first_stage(scraper.search_entries)
+            scraper.append_to_excel = clock.last_stage(scraper.append_to_excel, rows_arg=1)
+            os.chdir(work_dir)
+            start = time.perf_counter()
+            scraper.run_scraper(excel_path='youtube.xlsx', csv_path='youtube.csv')
+
+        elif target == 'pexels':
+            import asyncio
+            from pexels_scraper import PexelsScraper
+            from credentials import Credential, CredentialPool
+            from quota import QuotaManager
+
+            url, stop_server = start_pexels_server(latency)
+            stop_servers.append(stop_server)
+            scraper = PexelsScraper(output_path=os.path.join(work_dir, 'pexels.csv'),
+                                    quota=QuotaManager(os.path.join(work_dir, 'pexels_quota.json'),
+                                                       clock=_quota_clock(skipped_sleep)),
+                                    credentials=CredentialPool('pexels', [Credential.api_key('stand-in')]))
+            scraper.baseurl = url
+            scraper.queries = scraper.queries[:queries]
+            scraper.scrape_pexels = clock.first_stage(scraper.scrape_pexels, query_arg=1)
+            scraper.write_rows = clock.last_stage(scraper.write_rows, rows_arg=2)
+            os.chdir(work_dir)
+            start = time.perf_counter()
+            asyncio.run(scraper.run_scraper())
+
+        elif target == 'vimeo':
+            from vimeo_scraper import VimeoScraper
+
+            url, stop_server = start_ddg_server(latency)
+            stop_servers.append(stop_server)
+            scraper = VimeoScraper(use_selenium=True)
+            scraper.baseurl = url
+            scraper._make_driver = FakeDriver
+            scraper.start_urls = scraper.start_urls[:queries]
+            scraper._search_with_selenium = clock.timed(scraper._search_with_selenium)
+            os.chdir(work_dir)
+            os.makedirs('data', exist_ok=True)
+            start = time.perf_counter()
+            scraper.search()
+
+        elif target == 'builder':
+            import yt_dlp
+            from main import EmotionVideoDatasetBuilder
+            from credentials import Credential, CredentialPool
+            from platforms import PexelsPlatform, VimeoPlatform, YouTubePlatform
+            from quota import QuotaManager
+
+            yt_dlp.YoutubeDL = FakeYoutubeDL
+            pexels_url, stop_pexels = start_pexels_server(latency)
+            ddg_url, stop_ddg = start_ddg_server(latency)
+            stop_servers += [stop_pexels, stop_ddg]
+
+            csv_path = os.path.join(work_dir, 'keywords.csv')
+            _write_builder_csv(csv_path, queries)
+            builder = EmotionVideoDatasetBuilder(csv_path, output_dir=os.path.join(work_dir, 'results'))
+
+            # Alle drie de platforms per query, elk tegen zijn eigen stand-in, met de gedeelde near-duplicate
+            # index van de builder (de thumbnail stage niet: die haalt echte thumbnail URLs op). 'flag' i.p.v.
+            # 'collapse': de stand-in teksten komen uit een handvol woorden en lijken dus allemaal op elkaar
+            shared = {'near_duplicates': builder.near_duplicates, 'near_duplicate_mode': 'flag'}
+            pexels = PexelsPlatform(output_path=os.path.join(work_dir, 'pexels.csv'), **shared,
+                                    quota=QuotaManager(os.path.join(work_dir, 'pexels_quota.json'),
+                                                       clock=_quota_clock(skipped_sleep)),
+                                    credentials=CredentialPool('pexels', [Credential.api_key('stand-in')]))
+            pexels.scraper.baseurl = pexels_url
+            vimeo = VimeoPlatform(**shared)
+            vimeo.scraper.baseurl = ddg_url
+            vimeo.scraper._make_driver = FakeDriver
+            for platform in (YouTubePlatform(**shared), pexels, vimeo):
+                builder.scraper.add_platform(platform)
+
+            builder.scraper.scrape_many = clock.completed(builder.scraper.scrape_many)
+            os.chdir(work_dir)
+            start = time.perf_counter()
+            queries_data = builder.generate_queries()[:queries]
+            builder.scrape_all_queries(queries_data, platforms=['youtube', 'pexels', 'vimeo'],
+                                       batch_size=max(len(queries_data) // 2, 1))
+            builder.close()
+
+        else:
+            raise ValueError(f"Unknown target: {target}")
+
+        seconds = time.perf_counter() - start
+    finally:
+        for stop_server in stop_servers:
+            stop_server()
+        LoggerConfig.shutdown()
+
+    return {
+        'queries': clock.queries,
+        'videos': sum(clock.counts),
+        'seconds': round(seconds, 3),
+        'queries_per_s': round(clock.queries / seconds, 2) if seconds else 0.0,
+        'videos_per_s': round(sum(clock.counts) / seconds, 2) if seconds else 0.0,
+        'p50_ms': round(_percentile(clock.latencies, 0.5) * 1000, 2),
+        'p99_ms': round(_percentile(clock.latencies, 0.99) * 1000, 2),
+        'peak_rss_mb': _peak_rss_mb(),
+        'skipped_sleep_s': round(skipped_sleep['seconds'], 1),
+    }
+
+
+# ---------------------------------------------------------------------------------------------------
+# Orkestratie
+# ---------------------------------------------------------------------------------------------------
+
+def measure(target: str, queries: int, latency: float) -> Dict:
+    """Draai een target in een nieuw proces en lees het JSON resultaat van de laatste stdout regel"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory(prefix=f'throughput_{target}_') as work_dir:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run', target, '--queries', str(queries),
+             '--latency-ms', str(latency * 1000), '--work-dir', work_dir],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"Benchmark {target} failed:\n{proc.stderr[-4000:]}")
+    return json.loads(lines[-1])
+
+
+def load_baseline() -> Dict[str, Dict]:
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results: Dict[str, Dict]):
+    os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+    baseline = load_baseline()
+    baseline.update({t: r for t, r in results.items() if 'skipped' not in r})
+    with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Offline throughput benchmark: scrapers against local YouTube/Pexels/DuckDuckGo stand-ins")
+    parser.add_argument('targets', nargs='*', default=TARGETS, metavar='target',
+                        help=f"Targets to run (default: all of {', '.join(TARGETS)})")
+    parser.add_argument('--queries', type=int, default=40, help="Queries per target")
+    parser.add_argument('--latency-ms', type=float, default=5.0, help="Simulated network latency per request")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per target (the fastest run counts)")
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help="Allowed throughput loss / latency and RSS growth relative to the baseline (0.3 = 30%%)")
+    parser.add_argument('--update-baseline', action='store_true', help="Store the current results as the new baseline")
+    parser.add_argument('--run', choices=TARGETS, help=argparse.SUPPRESS)
+    parser.add_argument('--work-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+
+    if args.run:
+        print(json.dumps(run_target(args.run, args.queries, latency, args.work_dir)))
+        return 0
+
+    results = {}
+    for target in args.targets or TARGETS:
+        runs = [measure(target, args.queries, latency) for _ in range(args.repeat)]
+        measured = [r for r in runs if 'skipped' not in r]
+        results[target] = max(measured, key=lambda r: r['queries_per_s']) if measured else runs[0]
+
+    if args.update_baseline:
+        save_baseline(results)
+        print(f"Baseline written to {BASELINE_FILE}")
+
+    baseline = load_baseline()
+    failures = []
+
+    print(f"{'target':<10}{'queries/s':>11}{'videos/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'RSS MB':>8}"
+          f"{'base q/s':>10}{'sleep skipped':>15}")
+    for target, result in results.items():
+        if 'skipped' in result:
+            print(f"{target:<10}  skipped: {result['skipped']}")
+            continue
+        base = baseline.get(target)
+        base_str = f"{base['queries_per_s']:.1f}" if base else '-'
+        print(f"{target:<10}{result['queries_per_s']:>11.1f}{result['videos_per_s']:>10.1f}{result['p50_ms']:>9.1f}"
+              f"{result['p99_ms']:>9.1f}{result['peak_rss_mb'] or 0:>8.0f}{base_str:>10}"
+              f"{result['skipped_sleep_s']:>14.0f}s")
+        if not base:
+            continue
+        if result['queries_per_s'] < base['queries_per_s'] * (1 - args.tolerance):
+            failures.append(f"{target} throughput regressed: {result['queries_per_s']:.1f} < "
+                            f"{base['queries_per_s']:.1f} queries/s baseline")
+        if result['p99_ms'] > base['p99_ms'] * (1 + args.tolerance):
+            failures.append(f"{target} p99 latency regressed: {result['p99_ms']:.1f}ms > {base['p99_ms']:.1f}ms baseline")
+        if result['peak_rss_mb'] and base.get('peak_rss_mb') and \
+                result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + args.tolerance):
+            failures.append(f"{target} peak RSS regressed: {result['peak_rss_mb']:.0f}MB > "
+                            f"{base['peak_rss_mb']:.0f}MB baseline")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("\nOK: throughput within baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from config import LoggerConfig
+from metrics import REGISTRY, BYTES, ScraperStats
+from http_clients import get_session
+
+
+def youtube_thumbnail(entry: Dict, min_width: int = 320) -> Optional[str]:
+    """
+    Kies een thumbnail URL uit een yt-dlp entry: de kleinste met breedte >= min_width
+
+    Valt terug op entry['thumbnail'] of de vaste i.ytimg.com URL van de video ID.
+    """
+    thumbnails = [t for t in entry.get('thumbnails') or [] if t.get('url')]
+    sized = [t for t in thumbnails if (t.get('width') or 0) >= min_width]
+    if sized:
+        return min(sized, key=lambda t: t['width'])['url']
+    if entry.get('thumbnail'):
+        return entry['thumbnail']
+    if thumbnails:
+        return thumbnails[-1]['url']
+    if entry.get('id'):
+        return f"https://i.ytimg.com/vi/{entry['id']}/hqdefault.jpg"
+    return None
+
+
+def dhash_batch(images: List[bytes], hash_size: int = 8) -> List[Optional[int]]:
+    """
+    Perceptual difference hash (dHash) voor een batch afbeeldingen
+
+    Decoderen/verkleinen gebeurt per afbeelding met Pillow, de hash zelf in één numpy bewerking
+    over de hele batch.
+
+    :param images: Ruwe bytes van de afbeeldingen
+    :param hash_size: 8 -> 64-bit hash
+    :return: Hash per afbeelding, None als de afbeelding niet te decoderen is
+    """
+    import numpy as np
+    from PIL import Image
+
+    pixels = []
+    valid = []
+    for data in images:
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                small = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+                pixels.append(np.asarray(small, dtype=np.int16))
+                valid.append(True)
+        except Exception:
+            valid.append(False)
+
+    hashes: List[Optional[int]] = [None] * len(images)
+    if not pixels:
+        return hashes
+
+    stack = np.stack(pixels)  # (n, hash_size, hash_size + 1)
+    bits = (stack[:, :, 1:] > stack[:, :, :-1]).reshape(len(pixels), -1)
+    packed = np.packbits(bits, axis=1)  # (n, hash_size * hash_size / 8) bytes, big-endian
+    values = [int.from_bytes(row.tobytes(), 'big') for row in packed]
+
+    it = iter(values)
+    for idx, ok in enumerate(valid):
+        if ok:
+            hashes[idx] = next(it)
+    return hashes
+
+
+class HammingIndex:
+    """
+    Index van 64-bit perceptual hashes met snelle Hamming-afstand lookup
+
+    Multi-index hashing: de hash wordt in max_distance + 1 stukken gesplitst. Twee hashes met
+    afstand <= max_distance zijn volgens het duivenhokprincipe in minstens één stuk gelijk,
+    dus alleen de kandidaten uit die buckets worden exact vergeleken.
+    """
+
+    def __init__(self, max_distance: int = 6, bits: int = 64):
+        self.max_distance = max_distance
+        self.bits = bits
+
+        chunks = max_distance + 1
+        base, extra = divmod(bits, chunks)
+        self._chunks: List[Tuple[int, int]] = []  # (shift, mask)
+        shift = 0
+        for i in range(chunks):
+            width = base + (1 if i < extra else 0)
+            self._chunks.append((shift, (1 << width) - 1))
+            shift += width
+
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in self._chunks]
+        self.hashes: List[int] = []
+        self.keys: List[str] = []
+        self._persisted = 0
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def find(self, value: int) -> Optional[Tuple[str, int]]:
+        """
+        :return: (key, afstand) van de dichtstbijzijnde hash binnen max_distance, of None
+        """
+        best = None
+        seen = set()
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            for idx in table.get((value >> shift) & mask, ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                distance = (self.hashes[idx] ^ value).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (self.keys[idx], distance)
+        return best
+
+    def add(self, value: int, key: str):
+        idx = len(self.hashes)
+        self.hashes.append(value)
+        self.keys.append(key)
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            table.setdefault((value >> shift) & mask, []).append(idx)
+
+    def flush(self, path: str):
+        """Schrijf de hashes die sinds de vorige flush/load toegevoegd zijn achteraan het bestand bij"""
+        if self._persisted == len(self.hashes):
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for value, key in zip(self.hashes[self._persisted:], self.keys[self._persisted:]):
+                f.write(json.dumps({'phash': f"{value:016x}", 'key': key}) + '\n')
+        self._persisted = len(self.hashes)
+
+    def load(self, path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.add(int(entry['phash'], 16), entry['key'])
+        self._persisted = len(self.hashes)
+
+
+class ThumbnailDeduplicator:
+    """
+    Stage die thumbnails van geaccepteerde resultaten ophaalt en visuele duplicates markeert
+
+    Thumbnails worden concurrent opgehaald en op disk bewaard (voor reviewers), daarna in batch
+    gehasht (dHash) en opgezocht in een HammingIndex die over runs bewaard blijft. De index lookups
+    zijn thread-safe, zodat meerdere platforms één deduplicator kunnen delen.
+    """
+
+    def __init__(self, cache_dir: str = 'data/results/thumbnails', max_workers: int = 8,
+                 max_distance: int = 6, timeout: float = 15.0):
+        """
+        :param cache_dir: Map voor thumbnails en de hash index
+        :param max_workers: Gelijktijdige thumbnail downloads
+        :param max_distance: Maximale Hamming-afstand om als visuele duplicate te tellen
+        :param timeout: Timeout per thumbnail request
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.logger = LoggerConfig.setup_logger(__name__)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index_path = os.path.join(cache_dir, 'phash_index.jsonl')
+        self.index = HammingIndex(max_distance=max_distance)
+        self.index.load(self.index_path)
+        self._lock = threading.Lock()
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnails')
+
+        self.stats = ScraperStats('thumbnails', [
+            "fetched",
+            "cached",
+            "visual_duplicates",
+            "errors",
+        ])
+
+    def _get_session(self):
+        return get_session('thumbnails', pool_maxsize=self.max_workers, timeout=self.timeout,
+                           backoff_factor=1, allowed_methods=('GET',))
+
+    def _cache_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.jpg')
+
+    def _fetch(self, url: str) -> Optional[bytes]:
+        path = self._cache_path(url)
+        if os.path.exists(path):
+            self.stats.inc("cached")
+            with open(path, 'rb') as f:
+                return f.read()
+        try:
+            resp = self._get_session().get(url, timeout=self.timeout)
+            resp.raise_for_status()
+        except Exception as e:
+            self.stats.inc("errors")
+            self.logger.warning(f"Thumbnail fetch failed for {url}: {e}")
+            return None
+        REGISTRY.inc(BYTES, len(resp.content), component='thumbnails')
+        with open(path, 'wb') as f:
+            f.write(resp.content)
+        self.stats.inc("fetched")
+        return resp.content
+
+    def process_records(self, records: List[Dict], mode: str = 'collapse', url_field: str = 'thumbnail') -> List[Dict]:
+        """
+        Haal de thumbnails van een batch records op en check ze tegen de hash index
+
+        :param records: Video dicts; records zonder thumbnail URL gaan ongewijzigd door
+        :param mode: 'collapse' = visuele duplicates weglaten, 'flag' = veld visual_duplicate_of toevoegen
+        :param url_field: Veld met de thumbnail URL
+        :return: De records die naar de sinks mogen
+        """
+        if mode not in ('collapse', 'flag'):
+            raise ValueError(f"Unknown visual duplicate mode: {mode}")
+
+        with_thumb = [r for r in records if r.get(url_field)]
+        images = list(self._executor.map(self._fetch, [r[url_field] for r in with_thumb]))
+
+        fetched = [(r, img) for r, img in zip(with_thumb, images) if img]
+        hashes = dhash_batch([img for _, img in fetched])
+
+        duplicates = set()
+        with self._lock:
+            for (record, _), value in zip(fetched, hashes):
+                if value is None:
+                    continue
+                match = self.index.find(value)
+                if match is not None:
+                    duplicates.add(id(record))
+                    self.stats.inc("visual_duplicates")
+                    if mode == 'flag':
+                        record['visual_duplicate_of'] = match[0]
+                    self.logger.debug(f"   Visual duplicate: {record.get('url')} ~ {match[0]} (distance {match[1]})")
+                else:
+                    self.index.add(value, record.get('url') or record[url_field])
+
+            self.index.flush(self.index_path)
+
+        if mode == 'flag':
+            return records
+        return [r for r in records if id(r) not in duplicates]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -1,16 +1,30 @@
-import pandas as pd
+import csv
 import itertools
 import random
 
-def read_csv(filename: str):
-    query_terms = pd.read_csv(filename)
-    query_terms.fillna('', inplace=True)
-    terms_emotion = set(query_terms.Emotion.unique())
-    terms_subject = set(query_terms.Subject.unique())
-    terms_setting = set(query_terms.Setting.unique())
+def read_terms(filename: str):
+    """
+    Lees de unieke Emotion/Subject/Setting termen uit de keywords CSV.
+    Gebruikt de csv module i.p.v. pandas zodat importeren van de scrapers goedkoop blijft.
+
+    :param filename: Pad naar de keywords CSV
+    :return: Tuple van sets (emotions, subjects, settings) zonder lege waarden
+    """
+    terms_emotion, terms_subject, terms_setting = set(), set(), set()
+    with open(filename, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            terms_emotion.add(row.get('Emotion') or '')
+            terms_subject.add(row.get('Subject') or '')
+            terms_setting.add(row.get('Setting') or '')
+
     for s in [terms_emotion, terms_subject, terms_setting]:
-        if '' in s:
-            s.remove('')
+        s.discard('')
+
+    return terms_emotion, terms_subject, terms_setting
+
+
+def read_csv(filename: str):
+    terms_emotion, terms_subject, terms_setting = read_terms(filename)
 
     all_queries = list(itertools.product(terms_emotion, terms_setting, terms_subject))
     random.shuffle(all_queries)
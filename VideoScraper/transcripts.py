@@ -0,0 +1,251 @@
+import gzip
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from config import LoggerConfig
+from metrics import REGISTRY, BYTES, ScraperStats
+from http_clients import get_session
+from blocking import COOLDOWNS, PlatformBlocked, ytdlp_extract
+
+if TYPE_CHECKING:
+    from credentials import CredentialPool
+
+_YOUTUBE_ID_RE = re.compile(r'(?:v=|youtu\.be/|/shorts/|/embed/)([A-Za-z0-9_-]{11})')
+
+
+def youtube_video_id(url_or_id: str) -> Optional[str]:
+    """Video ID uit een YouTube URL (of de ID zelf)"""
+    if re.fullmatch(r'[A-Za-z0-9_-]{11}', url_or_id or ''):
+        return url_or_id
+    match = _YOUTUBE_ID_RE.search(url_or_id or '')
+    return match.group(1) if match else None
+
+
+class TranscriptHarvester:
+    """
+    Aparte stage die ondertitels/transcripts ophaalt voor geaccepteerde video's
+
+    Loopt op een eigen begrensde worker pool, zodat discovery nooit op transcripts wacht. De scraper geeft
+    de ondertitel tracks mee uit de metadata die hij al heeft, dan wordt alleen het track bestand opgehaald;
+    zonder die info (CLI, losse URLs) vraagt de harvester de watch page zelf op via yt-dlp, met de cookie
+    pool en de YouTube cooldown net als de scraper.
+    Transcripts worden per video ID en taal gecached als gzip bestand naast de resultaten;
+    een video zonder ondertitels krijgt een .missing marker zodat hij niet opnieuw opgevraagd wordt.
+    """
+
+    def __init__(self, cache_dir: str = 'data/results/transcripts', max_workers: int = 3,
+                 languages: tuple = ('en', 'en-US', 'en-GB'), sub_format: str = 'vtt',
+                 include_automatic: bool = True, timeout: float = 30.0,
+                 cookies: Optional['CredentialPool'] = None):
+        """
+        :param cache_dir: Map voor de gecomprimeerde transcripts
+        :param max_workers: Maximaal aantal gelijktijdige transcript requests
+        :param languages: Talen in volgorde van voorkeur
+        :param sub_format: Gewenst ondertitel formaat (vtt, srv3, json3, ...)
+        :param include_automatic: Ook automatisch gegenereerde ondertitels gebruiken
+        :param timeout: Timeout voor het ophalen van het ondertitel bestand
+        :param cookies: Cookie profielen voor de yt-dlp fallback (default: YTDLP_COOKIES, niet gezet = zonder)
+        """
+        from credentials import cookie_pool_from_env
+
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.languages = languages
+        self.sub_format = sub_format
+        self.include_automatic = include_automatic
+        self.timeout = timeout
+        self.logger = LoggerConfig.setup_logger(__name__)
+        cookies = cookies if cookies is not None else cookie_pool_from_env('youtube')
+        self.cookies = cookies if len(cookies) else None
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='transcripts')
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        self.stats = ScraperStats('transcripts', [
+            "fetched",
+            "cached",
+            "missing",
+            "extracted",
+            "blocked",
+            "deferred",
+            "errors",
+        ])
+
+    def _cache_path(self, video_id: str, language: str) -> str:
+        return os.path.join(self.cache_dir, f"{video_id}.{language}.{self.sub_format}.gz")
+
+    def _missing_path(self, video_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{video_id}.missing")
+
+    def cached_transcript(self, video_id: str) -> Optional[str]:
+        """Pad van een gecachet transcript in de voorkeurstaal, None als het er niet is"""
+        for language in self.languages:
+            path = self._cache_path(video_id, language)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def read_transcript(self, video_id: str) -> Optional[str]:
+        path = self.cached_transcript(video_id)
+        if path is None:
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    def _get_session(self):
+        return get_session('transcripts', pool_maxsize=self.max_workers, timeout=self.timeout,
+                           allowed_methods=('GET',))
+
+    def pick_track(self, info: Dict) -> Optional[tuple]:
+        """Kies (taal, url) uit de handmatige ondertitels, daarna de automatische"""
+        sources = [info.get('subtitles') or {}]
+        if self.include_automatic:
+            sources.append(info.get('automatic_captions') or {})
+
+        for tracks in sources:
+            for language in self.languages:
+                formats = tracks.get(language) or []
+                for fmt in formats:
+                    if fmt.get('ext') == self.sub_format and fmt.get('url'):
+                        return language, fmt['url']
+        return None
+
+    def _extract_info(self, video_id: str) -> Optional[Dict]:
+        """
+        Fallback: de watch page via yt-dlp, met een cookie profiel uit de pool
+
+        :raises PlatformBlocked: Bot-check of 429 (het cookie profiel gaat dan in cooldown)
+        """
+        from credentials import youtube_dl
+
+        ydl_opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "skip_download": True,
+            "noplaylist": True,
+        }
+        with youtube_dl(ydl_opts, self.cookies) as ydl:
+            info = ytdlp_extract(ydl, f"https://www.youtube.com/watch?v={video_id}")
+        self.stats.inc("extracted")
+        return info
+
+    def fetch(self, video_id: str, info: Optional[Dict] = None) -> Optional[str]:
+        """
+        Haal het transcript van één video op (blokkerend), met cache
+
+        :param info: yt-dlp info dict van de video (of alleen 'subtitles'/'automatic_captions');
+            None = zelf opvragen
+        :return: Pad naar het gzip bestand, None als de video geen ondertitels heeft
+        :raises PlatformBlocked: De yt-dlp fallback werd geblokkeerd
+        """
+        cached = self.cached_transcript(video_id)
+        if cached is not None:
+            self.stats.inc("cached")
+            return cached
+        if os.path.exists(self._missing_path(video_id)):
+            self.stats.inc("cached")
+            return None
+
+        if info is None:
+            info = self._extract_info(video_id)
+
+        track = self.pick_track(info or {})
+        if track is None:
+            open(self._missing_path(video_id), 'w').close()
+            self.stats.inc("missing")
+            return None
+
+        language, url = track
+        resp = self._get_session().get(url, timeout=self.timeout)
+        resp.raise_for_status()
+        REGISTRY.inc(BYTES, len(resp.content), component='transcripts')
+
+        path = self._cache_path(video_id, language)
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            f.write(resp.text)
+        os.replace(tmp_path, path)
+
+        self.stats.inc("fetched")
+        return path
+
+    def _fetch_logged(self, video_id: str, info: Optional[Dict]) -> Optional[str]:
+        if info is None and COOLDOWNS.remaining('youtube') > 0:
+            # Tijdens een YouTube cooldown zou een extra watch page de blokkade alleen verlengen;
+            # zonder .missing marker, dus een volgende run probeert het opnieuw
+            self.stats.inc("deferred")
+            return None
+        try:
+            return self.fetch(video_id, info)
+        except PlatformBlocked as e:
+            self.stats.inc("blocked")
+            if self.cookies is None or not self.cookies.healthy():
+                COOLDOWNS.block('youtube', e.reason, e.retry_after)
+            return None
+        except Exception as e:
+            self.stats.inc("errors")
+            self.logger.warning(f"Transcript fetch failed for {video_id}: {e}")
+            return None
+
+    def submit(self, url_or_id: str, info: Optional[Dict] = None) -> Optional[Future]:
+        """
+        Zet een video in de wachtrij (non-blocking); een ID dat al in de wachtrij staat wordt niet nog eens
+        opgehaald (daarna zorgt de cache daarvoor)
+
+        :param info: Ondertitel info die de aanroeper al heeft (zie fetch), None = via yt-dlp opvragen
+        :return: Future met het pad van het transcript, None voor een onbekende URL
+        """
+        video_id = youtube_video_id(url_or_id)
+        if video_id is None:
+            return None
+        with self._lock:
+            future = self._pending.get(video_id)
+            if future is not None:
+                return future
+            future = self._pending[video_id] = self._executor.submit(self._fetch_logged, video_id, info)
+        # Buiten de lock: een future die al klaar is roept de callback direct aan
+        future.add_done_callback(lambda done: self._forget(video_id, done))
+        return future
+
+    def _forget(self, video_id: str, future: Future):
+        with self._lock:
+            if self._pending.get(video_id) is future:
+                del self._pending[video_id]
+
+    def submit_many(self, urls_or_ids: Iterable[str]) -> List[Future]:
+        return [f for f in (self.submit(u) for u in urls_or_ids) if f is not None]
+
+    def close(self, wait: bool = True):
+        """Wacht (optioneel) tot alle transcripts binnen zijn en stop de workers"""
+        self._executor.shutdown(wait=wait)
+        self.logger.info(
+            f"Transcripts: {self.stats['fetched']} fetched, {self.stats['cached']} cached, "
+            f"{self.stats['missing']} without subtitles, {self.stats['extracted']} extracted via yt-dlp, "
+            f"{self.stats['blocked']} blocked, {self.stats['deferred']} deferred, {self.stats['errors']} errors"
+        )
+
+
+def main():
+    import argparse
+    import csv
+
+    parser = argparse.ArgumentParser(description="Fetch transcripts for the accepted YouTube videos")
+    parser.add_argument("--input", default="data/results/youtube_videos_scraped.csv", help="Result CSV with a 'url' column")
+    parser.add_argument("--cache-dir", default="data/results/transcripts", help="Directory for the gzipped transcripts")
+    parser.add_argument("--workers", type=int, default=3, help="Concurrent transcript requests")
+    args = parser.parse_args()
+
+    harvester = TranscriptHarvester(cache_dir=args.cache_dir, max_workers=args.workers)
+    with open(args.input, newline='', encoding='utf-8') as f:
+        harvester.submit_many(row.get('url') or '' for row in csv.DictReader(f))
+    harvester.close()
+
+
+if __name__ == "__main__":
+    main()
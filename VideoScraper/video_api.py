@@ -1,11 +1,13 @@
-from yt_dlp import YoutubeDL
 import csv
 from tools import read_csv
+from sanitize import sanitize_records, sanitize_text
+from search_filters import VideoFilterSpec
+from blocking import ytdlp_extract
 from itertools import cycle
 import time
 
 class VideoAPI:
-    def __init__(self):
+    def __init__(self, filter_spec: VideoFilterSpec = None, cookies=None):
         # Example: 'ytsearch5:cute dogs'
         self.baseurl = "ytsearch"
 
@@ -15,24 +17,37 @@ class VideoAPI:
 
         }
 
+        # Default: alleen video's tot 3 minuten
+        self.filter_spec = filter_spec or VideoFilterSpec(max_duration=180)
+
         # Options passed to YoutubeDL
+        # match_filter wordt door yt-dlp ook op de flat search entries toegepast,
+        # dus afgewezen video's worden niet volledig geëxtraheerd
         self.ydl_opts = {
             "ignoreerrors": True,
             "verbose": True,
-            "writeautomaticsub": True,
-            "sub_langs": ["en", "en-US", "en-us"],
-            "match_filter": lambda i: ("skip" if i.get("duration", 0) > 180 else None),
+            "match_filter": self.filter_spec.yt_dlp_match_filter,
         }
 
+        # Cookie profielen (credentials.CredentialPool), per poging het minst belaste gezonde profiel;
+        # een bot-check zet dat profiel in cooldown en de volgende poging neemt een ander
+        if cookies is None:
+            from credentials import cookie_pool_from_env
+            cookies = cookie_pool_from_env('youtube')
+        self.cookies = cookies if len(cookies) else None
+
+        # Kolommen die via sanitize.sanitize_records opgeschoond worden
+        self.text_fields = ("Query", "Title", "VideoId", "URL", "Channel", "Description")
+
     @staticmethod
     def _clean_text(x):
         """Make text CSV-safe and avoid newline explosions."""
-        if x is None:
-            return ""
-        return str(x).replace("\r", " ").replace("\n", " ").strip()
+        return sanitize_text(x)
 
 
     def scrape(self, keywordsFile: str, topResults: int, output_csv: str = "scraped_videos.csv", proxyList=None):
+        from credentials import youtube_dl
+
         proxyList = proxyList or []
         proxy_cycle = cycle(proxyList) if proxyList else None
 
@@ -45,18 +60,19 @@ class VideoAPI:
 
             for emotion, setting, subject in shuffled_queries:
                 query = f"{emotion} {subject} {setting}"
-                search_query = f"{self.baseurl}{topResults}:{query}"
+                search_query = self.filter_spec.youtube_search_url(query, topResults)
 
                 # Rotate proxy for this query (if provided)
                 proxy = next(proxy_cycle) if proxy_cycle else None
 
                 # Build per-request options (important: new YoutubeDL instance)
                 per_request_opts = dict(self.ydl_opts)
+                per_request_opts["playlistend"] = topResults
                 if proxy:
                     per_request_opts["proxy"] = proxy
 
                 # Retry with different proxies on hard failure (recommended)
-                max_attempts = min(5, len(proxyList)) if proxyList else 1
+                max_attempts = min(5, max(len(proxyList), len(self.cookies or ()), 1))
                 last_err = None
 
                 for attempt in range(1, max_attempts + 1):
@@ -65,10 +81,11 @@ class VideoAPI:
                         per_request_opts["proxy"] = proxy
 
                     try:
-                        with YoutubeDL(per_request_opts) as ydl:
-                            info = ydl.extract_info(search_query, download=False)
+                        with youtube_dl(per_request_opts, self.cookies) as ydl:
+                            info = ytdlp_extract(ydl, search_query)
 
                         entries = (info or {}).get("entries") or []
+                        rows = []
                         for entry in entries:
                             if not entry:
                                 continue
@@ -80,18 +97,20 @@ class VideoAPI:
                                 or (f"https://www.youtube.com/watch?v={video_id}" if video_id else "")
                             )
 
-                            data = {
-                                "Query": self._clean_text(query),
-                                "Title": self._clean_text(entry.get("title")),
-                                "VideoId": self._clean_text(video_id),
-                                "URL": self._clean_text(url),
-                                "Channel": self._clean_text(entry.get("channel") or entry.get("uploader")),
+                            rows.append({
+                                "Query": query,
+                                "Title": entry.get("title"),
+                                "VideoId": video_id,
+                                "URL": url,
+                                "Channel": entry.get("channel") or entry.get("uploader"),
                                 "Duration": entry.get("duration") or 0,
-                                "Description": self._clean_text(entry.get("description")),
-                            }
+                                "Description": entry.get("description"),
+                            })
 
+                        sanitize_records(rows, fields=self.text_fields)
+                        for data in rows:
                             print(data)
-                            writer.writerow(data)
+                        writer.writerows(rows)
 
                         # success → break retry loop
                         break
@@ -1,4 +1,3 @@
-from bs4 import BeautifulSoup
 import requests
 from yt_dlp import YoutubeDL
 import csv
@@ -6,6 +5,8 @@ from tools import read_csv
 from itertools import cycle
 import time
 import logging
+from http_clients import get_session
+from link_extractor import extract_targets
 
 
 
@@ -20,8 +21,8 @@ class VideoAPI():
     #Expects a duckduckgo url
     def get_sources(self, url: str):
         '''
-        This method parses an URL using BeautifulSoup to extract all the links of the videos present in the HTML
-        It does this through finding all iframes, looping over them and extracting the 'src' tag inside each iframe
+        This method streams the HTML of an URL through link_extractor to extract all the links of the videos present in the HTML
+        It does this in a single pass over all iframes, extracting and normalizing the 'src' tag inside each iframe
         This can later be used to download video's using said link
         Returns empty list if an error (Network or unexpected error) occurs
         
@@ -34,20 +35,15 @@ class VideoAPI():
 
         self.logger.info("Started scraping: ", url)
         try:
-            response = requests.get(url)
-
-            #Parse HTML of the search query url
-            soup = BeautifulSoup(response.text, 'html.parser')
-            self.logger.info("Created the beautifulsoup instance using URL")
-
-            #Save a list of all iframes that are available through the parsed HTML
-            iframes = soup.find_all('iframe')
-            self.logger.info("Found all of the iframes in the HTML of URL")
-            #Loop over all iframes found in the HTML parses and extract the links to be passed to yt-dlp later
-            sources = []
-            for iframe in iframes:
-                sources.append(iframe.get('src'))
-            
+            response = get_session('video_api').get(url, stream=True)
+            response.encoding = response.encoding or 'utf-8'
+
+            #Stream the HTML and extract the normalized src of every iframe in a single pass
+            with response:
+                targets = extract_targets(response.iter_content(chunk_size=16384, decode_unicode=True),
+                                          base_url=url, tags=('iframe',))
+            sources = [target['url'] for target in targets]
+
             self.logger.info("Extracted all the src tags from the URL")
 
             return sources
@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional
+
+from config import LoggerConfig
+
+DEFAULT_STORE = 'data/compacted/videos.jsonl'
+DEFAULT_INDEX = 'data/compacted/videos.db'
+
+_VIDEO_COLUMNS = ('video_key', 'platform', 'url', 'page_url', 'title', 'description', 'uploader', 'upload_date',
+                  'duration', 'view_count', 'width', 'height', 'fps', 'file_type', 'thumbnail', 'first_seen')
+
+_SCHEMA = """
+CREATE TABLE videos (
+    id INTEGER PRIMARY KEY,
+    video_key TEXT NOT NULL UNIQUE,
+    platform TEXT NOT NULL,
+    url TEXT NOT NULL,
+    page_url TEXT,
+    title TEXT,
+    description TEXT,
+    uploader TEXT,
+    upload_date TEXT,
+    duration REAL,
+    view_count INTEGER,
+    width INTEGER,
+    height INTEGER,
+    fps REAL,
+    file_type TEXT,
+    thumbnail TEXT,
+    first_seen TEXT,
+    queries TEXT
+);
+CREATE TABLE terms (
+    video_id INTEGER NOT NULL REFERENCES videos(id),
+    emotion TEXT,
+    subject TEXT,
+    setting TEXT
+);
+CREATE VIRTUAL TABLE videos_fts USING fts5(
+    title, description, content='videos', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# Pas na de bulk insert aangemaakt: één sortering per index is veel sneller dan bijwerken per rij.
+# De terms indexes zijn covering (video_id zit erin), dus een filter op emotion + setting raakt de tabel niet;
+# idx_terms_video is covering voor de omgekeerde check (past deze video bij de termen?) in de tekst zoekopdracht
+_INDEXES = """
+CREATE INDEX idx_videos_platform ON videos(platform, duration);
+CREATE INDEX idx_videos_duration ON videos(duration);
+CREATE INDEX idx_terms_emotion ON terms(emotion, setting, subject, video_id);
+CREATE INDEX idx_terms_subject ON terms(subject, setting, video_id);
+CREATE INDEX idx_terms_setting ON terms(setting, video_id);
+CREATE INDEX idx_terms_video ON terms(video_id, emotion, subject, setting);
+"""
+
+
+def fts_query(text: str) -> str:
+    """Zoektekst als FTS5 query: elk woord als literal (AND), zodat '-' of ':' geen syntax fout geven"""
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class VideoIndex:
+    """
+    Geïndexeerde read path over de compacted store (zie compact_dataset.py)
+
+    SQLite met B-tree indexes op emotion/subject/setting (tabel terms, één rij per query combinatie
+    waar de video bij hoorde), platform en duration, plus een FTS5 index op titel en beschrijving.
+    Lookups zoals "guilt + beach + korter dan 60s" of een zoekwoord in de titels raken alleen de indexes
+    in plaats van alle CSV's/JSON's in pandas te laden. Filters op termen/platform/duur kosten milliseconden;
+    zoekwoorden zijn het langzame pad: elke FTS match die bekeken wordt kost een rank en de filter checks, dus
+    met veelvoorkomende woorden plus een selectieve filter (weinig matches voldoen) tientallen tot honderden ms
+    op miljoenen rijen. text_candidates begrenst (opt-in) hoeveel matches een rank krijgen.
+
+    De index wordt uit videos.jsonl opgebouwd in een tijdelijk bestand en daarna atomair vervangen,
+    zodat lezers tijdens een rebuild de vorige versie blijven zien.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX):
+        """
+        :param path: SQLite bestand van de index
+        """
+        self.path = path
+        self.logger = LoggerConfig.setup_logger(__name__)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(f"No index at {self.path}; run 'python video_index.py build' first")
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def is_stale(self, store_path: str = DEFAULT_STORE) -> bool:
+        """True als de store nieuwer is dan de index (of de index nog niet bestaat)"""
+        if not os.path.exists(self.path):
+            return True
+        return os.path.exists(store_path) and os.path.getmtime(store_path) > os.path.getmtime(self.path)
+
+    @staticmethod
+    def _read_store(store_path: str) -> Iterator[Dict]:
+        with open(store_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def build(self, store_path: str = DEFAULT_STORE, batch_size: int = 10000) -> int:
+        """
+        (Her)bouw de index uit de compacted store
+
+        :param store_path: videos.jsonl van de compactor
+        :param batch_size: Rijen per executemany
+        :return: Aantal geïndexeerde video's
+        """
+        start = time.perf_counter()
+        tmp_path = self.path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        conn = sqlite3.connect(tmp_path)
+        try:
+            # Bestand wordt pas na een geslaagde build in gebruik genomen, dus geen journal nodig
+            conn.execute('PRAGMA journal_mode=OFF')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.executescript(_SCHEMA)
+
+            insert_video = (f"INSERT INTO videos (id, {', '.join(_VIDEO_COLUMNS)}, queries) "
+                            f"VALUES ({', '.join('?' * (len(_VIDEO_COLUMNS) + 2))})")
+            insert_term = "INSERT INTO terms (video_id, emotion, subject, setting) VALUES (?, ?, ?, ?)"
+            videos, terms = [], []
+            count = 0
+            for count, record in enumerate(self._read_store(store_path), start=1):
+                videos.append((count, *(record.get(column) for column in _VIDEO_COLUMNS),
+                               '|'.join(record.get('queries') or [])))
+                combinations = record.get('terms') or [[emotion, None, None] for emotion in record.get('emotions') or []]
+                terms.extend((count, *combination) for combination in combinations)
+                if len(videos) >= batch_size:
+                    conn.executemany(insert_video, videos)
+                    conn.executemany(insert_term, terms)
+                    videos, terms = [], []
+            conn.executemany(insert_video, videos)
+            conn.executemany(insert_term, terms)
+
+            conn.executescript(_INDEXES)
+            conn.execute("INSERT INTO videos_fts(videos_fts) VALUES ('rebuild')")
+            conn.execute('ANALYZE')
+            conn.commit()
+        finally:
+            conn.close()
+
+        self.close()
+        os.replace(tmp_path, self.path)
+        self.logger.info(f"Indexed {count} videos into {self.path} in {time.perf_counter() - start:.1f}s")
+        return count
+
+    def search(self, emotion: Optional[str] = None, subject: Optional[str] = None, setting: Optional[str] = None,
+               platform: Optional[str] = None, min_duration: Optional[float] = None,
+               max_duration: Optional[float] = None, text: Optional[str] = None, limit: int = 100,
+               text_candidates: Optional[int] = None) -> List[Dict]:
+        """
+        Zoek video's; alle opgegeven filters moeten gelden
+
+        emotion/subject/setting moeten in dezelfde query combinatie voorkomen (guilt + beach betekent een
+        video die gevonden is voor een guilt query op het strand). max_duration is exclusief.
+
+        :param text: Zoekwoorden voor titel/beschrijving (alle woorden moeten voorkomen); sorteert op relevantie
+        :param text_candidates: Met text: rank alleen de eerste zoveel matches die aan de filters voldoen (in index
+            volgorde), sneller maar dan is het resultaat het beste van een willekeurige deelverzameling. Bij
+            veelvoorkomende woorden zijn dat er op miljoenen rijen tienduizenden en kost het ranken van allemaal ~1s;
+            None = alle matches ranken (default, juiste volgorde)
+        :return: Video's als dicts met de kolommen van de videos tabel
+        """
+        clauses, params = [], []
+        terms = {'emotion': emotion, 'subject': subject, 'setting': setting}
+        terms = {column: value for column, value in terms.items() if value is not None}
+        if platform is not None:
+            clauses.append("v.platform = ?")
+            params.append(platform)
+        if min_duration is not None:
+            clauses.append("v.duration >= ?")
+            params.append(min_duration)
+        if max_duration is not None:
+            clauses.append("v.duration < ?")
+            params.append(max_duration)
+        term_clause = ' AND '.join(f"t.{column} = ?" for column in terms)
+
+        if text and text.split():
+            # Per FTS match wordt de terms filter via idx_terms_video gecheckt. De LIMIT in de subquery begrenst
+            # hoeveel matches een rank krijgen; de buitenste query sorteert alleen die kandidaten
+            sql = ("SELECT v.*, f.rank AS fts_rank FROM videos_fts f JOIN videos v ON v.id = f.rowid "
+                   "WHERE videos_fts MATCH ?")
+            params.insert(0, fts_query(text))
+            if terms:
+                clauses.append(f"EXISTS (SELECT 1 FROM terms t WHERE t.video_id = v.id AND {term_clause})")
+                params.extend(terms.values())
+            sql += ''.join(f" AND {clause}" for clause in clauses)
+            if text_candidates is not None:
+                sql = f"SELECT * FROM ({sql} LIMIT ?)"
+                params.append(max(text_candidates, limit))
+            rows = self.conn.execute(sql + " ORDER BY fts_rank LIMIT ?", params + [limit])
+            return [{key: row[key] for key in row.keys() if key != 'fts_rank'} for row in rows]
+
+        if terms:
+            # Join vanuit de covering terms index zonder ORDER BY: SQLite stopt na `limit` rijen in plaats
+            # van eerst alle matches te verzamelen. Een video met meerdere passende combinaties komt
+            # meerdere keren langs, vandaar de dedup hieronder.
+            sql = f"SELECT v.* FROM terms t JOIN videos v ON v.id = t.video_id WHERE {term_clause}"
+            params = list(terms.values()) + params
+        else:
+            sql = "SELECT v.* FROM videos v WHERE 1"
+        sql += ''.join(f" AND {clause}" for clause in clauses)
+
+        rows, seen = [], set()
+        for row in self.conn.execute(sql, params):
+            if row['id'] in seen:
+                continue
+            seen.add(row['id'])
+            rows.append(dict(row))
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build or query the SQLite index over the compacted video store")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="SQLite index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="(Re)build the index from the compacted store")
+    build.add_argument("--store", default=DEFAULT_STORE, help="videos.jsonl written by compact_dataset.py")
+
+    query = commands.add_parser("query", help="Look up videos")
+    query.add_argument("--emotion")
+    query.add_argument("--subject")
+    query.add_argument("--setting")
+    query.add_argument("--platform")
+    query.add_argument("--min-duration", type=float, help="Minimum duration in seconds")
+    query.add_argument("--max-duration", type=float, help="Duration below this many seconds")
+    query.add_argument("--text", help="Keywords to find in titles and descriptions")
+    query.add_argument("--limit", type=int, default=20)
+    query.add_argument("--text-candidates", type=int, default=0,
+                       help="Rank only the first N text matches: faster on large indexes, but the best of an "
+                            "arbitrary subset (0 = rank all matches)")
+    query.add_argument("--json", action="store_true", help="Print full rows as JSON lines")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    index = VideoIndex(args.index)
+
+    if args.command == "build":
+        index.build(args.store)
+        return
+
+    start = time.perf_counter()
+    rows = index.search(emotion=args.emotion, subject=args.subject, setting=args.setting, platform=args.platform,
+                        min_duration=args.min_duration, max_duration=args.max_duration, text=args.text,
+                        limit=args.limit, text_candidates=args.text_candidates or None)
+    elapsed = (time.perf_counter() - start) * 1000
+    for row in rows:
+        if args.json:
+            print(json.dumps(row, ensure_ascii=False))
+        else:
+            duration = f"{row['duration']:.0f}s" if row['duration'] is not None else '-'
+            print(f"{row['platform']:<8}{duration:>7}  {row['url']}  {row['title'] or ''}")
+    print(f"{len(rows)} video(s) in {elapsed:.1f} ms")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
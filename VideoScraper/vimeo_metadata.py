@@ -0,0 +1,157 @@
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from config import LoggerConfig
+from metrics import REGISTRY, BYTES, ScraperStats
+from http_clients import get_session
+from sanitize import sanitize_records
+
+OEMBED_ENDPOINT = 'https://vimeo.com/api/oembed.json'
+
+_VIMEO_ID_RE = re.compile(r'vimeo\.com/(?:video/|channels/[^/]+/|groups/[^/]+/videos/|showcase/\d+/video/)?(\d{5,})(?:[/?#]|$)')
+
+
+def vimeo_video_id(url: str) -> Optional[str]:
+    """Numerieke video ID uit een Vimeo URL; None voor kanaal-, gebruiker- of zoekpagina's"""
+    match = _VIMEO_ID_RE.search(url or '')
+    return match.group(1) if match else None
+
+
+def oembed_to_record(data: Dict) -> Dict:
+    """
+    Zet een Vimeo oEmbed response om naar het schema van de YouTube rijen
+
+    upload_date wordt YYYYMMDD zoals bij yt-dlp; view_count geeft oEmbed niet.
+    """
+    upload_date = (data.get('upload_date') or '')[:10].replace('-', '')
+    return {
+        "title": data.get('title'),
+        "duration": data.get('duration'),
+        "uploader": data.get('author_name'),
+        "upload_date": upload_date or None,
+        "description": data.get('description'),
+        "thumbnail": data.get('thumbnail_url'),
+        "width": data.get('width'),
+        "height": data.get('height'),
+    }
+
+
+class VimeoMetadataEnricher:
+    """
+    Vult Vimeo zoekresultaten aan met metadata uit de oEmbed API
+
+    De DuckDuckGo resultaten bevatten alleen een URL en een paginatitel; deze stage haalt per video ID
+    concurrent de oEmbed metadata op, zodat Vimeo rijen dezelfde velden hebben als YouTube rijen en
+    op duur/datum gefilterd kunnen worden. Responses (ook 'niet beschikbaar') worden gecached in een
+    append-only JSONL bestand, dus elke video wordt maar één keer opgevraagd.
+    """
+
+    def __init__(self, cache_path: str = 'data/results/vimeo_oembed.jsonl', max_workers: int = 8,
+                 endpoint: str = OEMBED_ENDPOINT, timeout: float = 15.0):
+        """
+        :param cache_path: JSONL cache met de oEmbed responses per video ID
+        :param max_workers: Gelijktijdige oEmbed requests
+        :param endpoint: oEmbed endpoint (te vervangen door een lokale fake voor tests)
+        :param timeout: Timeout per request
+        """
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.logger = LoggerConfig.setup_logger(__name__)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='vimeo_oembed')
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Optional[Dict]] = {}
+        self._load_cache()
+
+        self.stats = ScraperStats('vimeo_oembed', [
+            "fetched",
+            "cached",
+            "unavailable",
+            "errors",
+        ])
+
+    def _load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return
+        with open(self.cache_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._cache[entry['video_id']] = entry.get('oembed')
+        self.logger.info(f"oEmbed cache loaded: {len(self._cache)} Vimeo videos")
+
+    def _store(self, video_id: str, data: Optional[Dict]):
+        with self._lock:
+            self._cache[video_id] = data
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            with open(self.cache_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'video_id': video_id, 'oembed': data}, ensure_ascii=False) + '\n')
+
+    def fetch(self, video_id: str) -> Optional[Dict]:
+        """
+        oEmbed metadata van één video (blokkerend), met cache
+
+        :return: oEmbed response, None als de video privé/verwijderd is of de request mislukt
+        """
+        if video_id in self._cache:
+            self.stats.inc("cached")
+            return self._cache[video_id]
+
+        session = get_session('vimeo_oembed', pool_maxsize=self.max_workers, timeout=self.timeout,
+                              allowed_methods=('GET',))
+        try:
+            resp = session.get(self.endpoint, params={'url': f"https://vimeo.com/{video_id}"}, timeout=self.timeout)
+            if resp.status_code in (403, 404):
+                # Privé, verwijderd of embedden uitgeschakeld: onthouden, niet opnieuw proberen
+                self._store(video_id, None)
+                self.stats.inc("unavailable")
+                return None
+            resp.raise_for_status()
+            data = resp.json()
+            REGISTRY.inc(BYTES, len(resp.content), component='vimeo_oembed')
+        except Exception as e:
+            self.stats.inc("errors")
+            self.logger.warning(f"oEmbed fetch failed for Vimeo video {video_id}: {e}")
+            return None
+
+        self._store(video_id, data)
+        self.stats.inc("fetched")
+        return data
+
+    def enrich(self, records: List[Dict]) -> List[Dict]:
+        """
+        Vul een batch Vimeo records aan (in place) met oEmbed metadata
+
+        Records zonder video ID of zonder oEmbed response blijven ongewijzigd.
+
+        :param records: Dicts met een 'url' veld
+        :return: Dezelfde records
+        """
+        ids = [vimeo_video_id(r.get('url')) for r in records]
+        unique_ids = list(dict.fromkeys(i for i in ids if i))
+        responses = dict(zip(unique_ids, self._executor.map(self.fetch, unique_ids)))
+
+        enriched = []
+        for record, video_id in zip(records, ids):
+            data = responses.get(video_id) if video_id else None
+            if data is None:
+                continue
+            record['video_id'] = video_id
+            record.update(oembed_to_record(data))
+            enriched.append(record)
+
+        sanitize_records(enriched)
+        return records
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.logger.info(
+            f"Vimeo oEmbed: {self.stats['fetched']} fetched, {self.stats['cached']} cached, "
+            f"{self.stats['unavailable']} unavailable, {self.stats['errors']} errors"
+        )
@@ -1,20 +1,27 @@
 import time
-import re
-from typing import List, Dict, Optional
-from urllib.parse import urlparse, parse_qs, unquote, quote_plus, urlencode
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-import yt_dlp
-from bs4 import BeautifulSoup
-import pandas as pd
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional
 from config import LoggerConfig
-import itertools
+from http_clients import get_session
+from link_extractor import extract_targets
+from tools import read_csv
+from sanitize import sanitize_records
+from relevance import RelevanceFilter
+from metrics import REGISTRY, ScraperStats
+from blocking import PlatformBlocked, call_with_cooldown, detect_ddg_captcha
+from records import VimeoVideo
 import random
-from urllib import request
+
+if TYPE_CHECKING:
+    from near_duplicates import NearDuplicateIndex
+    from search_filters import VideoFilterSpec
+    from vimeo_metadata import VimeoMetadataEnricher
 
 class VimeoScraper():
-    def __init__(self, rate_limit_delay: float = 30.0, to_scrape: str = 'vimeo.com', cookies_from_browser: Optional[tuple] = ('Firefox', ), use_selenium: bool = False):
+    def __init__(self, rate_limit_delay: float = 30.0, to_scrape: str = 'vimeo.com', cookies_from_browser: Optional[tuple] = ('Firefox', ), use_selenium: bool = False,
+                 relevance_threshold: Optional[float] = None, near_duplicates: Optional['NearDuplicateIndex'] = None,
+                 near_duplicate_mode: str = 'collapse', metadata: Optional['VimeoMetadataEnricher'] = None,
+                 filter_spec: Optional['VideoFilterSpec'] = None):
         """
         cookies_from_browser examples:
           None
@@ -22,62 +29,58 @@ class VimeoScraper():
           ("chrome", "Default")
           ("chrome", "Profile 1")
         use_selenium: Use Selenium with real browser to avoid detection (slower but more reliable)
+        relevance_threshold: Minimum relevance score (0-1) of the search result title, None disables the filter.
+          Off by default because DuckDuckGo titles ("... - Vimeo") rarely contain the query terms.
+        near_duplicates: Shared NearDuplicateIndex (can be shared with the other scrapers), None disables the check
+        near_duplicate_mode: 'collapse' drops near-duplicates, 'flag' adds a near_duplicate field
+        metadata: oEmbed enrichment stage that adds duration, uploader, upload_date and description,
+          None keeps the bare search results. With metadata the relevance filter also scores the description.
+        filter_spec: Duration/upload date filters, applied after enrichment (needs metadata)
         """
         self.rate_limit_delay = rate_limit_delay
         self.cookies_from_browser = cookies_from_browser
         self.use_selenium = use_selenium
         self.logger = LoggerConfig.setup_logger(__name__)
+        relevance_fields = ('title', 'description') if metadata is not None else ('title',)
+        self.relevance_filter = RelevanceFilter(relevance_threshold, fields=relevance_fields) if relevance_threshold is not None else None
+        self.metadata = metadata
+        self.filter_spec = filter_spec if filter_spec is not None and not filter_spec.is_empty() else None
+        self.near_duplicates = near_duplicates
+        self.near_duplicate_mode = near_duplicate_mode
         self.baseurl = 'https://lite.duckduckgo.com/lite/'
         self.to_scrape = to_scrape
         self.csv_file = 'data/Scraping_Part1_keywords_extended.csv'
         
-        self.stats = {
-            "queries_processed": 0,
-            "total_videos_found": 0,
-            "youtube_videos": 0,
-            "vimeo_videos": 0,
-            "errors": 0,
-        }
+        self.stats = ScraperStats('vimeo', [
+            "queries_processed",
+            "total_videos_found",
+            "youtube_videos",
+            "vimeo_videos",
+            "irrelevant_dropped",
+            "near_duplicates",
+            "filtered_out",
+            "errors",
+        ])
 
         self.start_urls = []
+        self.query_terms = {}
 
-        query_terms = pd.read_csv(self.csv_file)
-        query_terms.fillna('', inplace=True)
-        terms_emotion = set(query_terms.Emotion.unique())
-        terms_subject = set(query_terms.Subject.unique())
-        terms_setting = set(query_terms.Setting.unique())
-        for s in [terms_emotion, terms_subject, terms_setting]:
-            if '' in s:
-                s.remove('')
-
-        all_queries = list(itertools.product(terms_emotion, terms_setting, terms_subject))
-        random.shuffle(all_queries)
-
-        for p in all_queries:
+        for p in read_csv(self.csv_file):
             emo, setting, subj = p
             query = f"{emo} {subj} {setting}".strip()
             url_query = f"site:{self.to_scrape} {query}"
             self.start_urls.append(url_query)
+            self.query_terms[url_query] = {'emotion': emo, 'subject': subj, 'setting': setting}
 
         self.logger.info(f"Initialized VimeoScraper with {len(self.start_urls)} queries")
 
+    def get_stats(self):
+        """Momentopname van de tellers (thread-safe)"""
+        return self.stats.snapshot()
+
     def _get_session(self):
-        """Create a session with retry strategy and connection pooling"""
-        session = requests.Session()
-        
-        # Retry strategy voor tijdelijke fouten
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=2,  # Wait 2, 4, 8 seconds between retries
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST"]
-        )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        return session
+        """Gedeelde session met retry strategy en connection pooling"""
+        return get_session('vimeo')
 
     def _get_random_headers(self):
         """Generate random but realistic headers to avoid detection"""
@@ -111,90 +114,67 @@ class VimeoScraper():
             'Cache-Control': 'max-age=0',
         }
 
-    def _search_with_selenium(self, query_part, max_results=5):
-        """Use Selenium for browser automation to avoid CAPTCHA"""
+    def _make_driver(self):
+        """Firefox driver die zich als gewone gebruiker voordoet (los te vervangen voor offline benchmarks)"""
         from selenium import webdriver
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
         from selenium.webdriver.firefox.options import Options
-        
+
+        options = Options()
+        # Don't use headless mode - it's easier to detect
+        # options.add_argument('--headless')
+        options.set_preference("general.useragent.override",
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0")
+        return webdriver.Firefox(options=options)
+
+    def _search_with_selenium(self, query_part, max_results=5):
+        """Use Selenium for browser automation to avoid CAPTCHA"""
         videos = []
         
         try:
-            # Setup Firefox with options to look like real user
-            options = Options()
-            # Don't use headless mode - it's easier to detect
-            # options.add_argument('--headless')
-            options.set_preference("general.useragent.override", 
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0")
-            
-            driver = webdriver.Firefox(options=options)
+            driver = self._make_driver()
             
             try:
                 # Go to DuckDuckGo Lite (simpler, less likely to trigger CAPTCHA)
-                driver.get('https://lite.duckduckgo.com/lite/')
-                time.sleep(random.uniform(2, 4))
+                driver.get(self.baseurl)
+                REGISTRY.sleep(random.uniform(2, 4), platform='vimeo')
                 
-                # Find search box and enter query
-                search_box = driver.find_element(By.NAME, 'q')
+                # Find search box and enter query ('name' / 'css selector' zijn de waarden van By.NAME / By.CSS_SELECTOR)
+                search_box = driver.find_element('name', 'q')
                 
                 # Type like a human (character by character with delays)
                 for char in query_part:
                     search_box.send_keys(char)
-                    time.sleep(random.uniform(0.05, 0.15))
+                    REGISTRY.sleep(random.uniform(0.05, 0.15), platform='vimeo')
                 
-                time.sleep(random.uniform(0.5, 1.5))
+                REGISTRY.sleep(random.uniform(0.5, 1.5), platform='vimeo')
                 
                 # Submit search (find the submit button)
-                submit_button = driver.find_element(By.CSS_SELECTOR, 'input[type="submit"]')
+                submit_button = driver.find_element('css selector', 'input[type="submit"]')
                 submit_button.click()
                 
                 # Wait for results to load
-                time.sleep(random.uniform(3, 5))
-                
-                # DuckDuckGo Lite has simpler HTML structure
-                # Results are in table rows with links
-                result_links = driver.find_elements(By.CSS_SELECTOR, 'a.result-link')
-                
-                # If that doesn't work, try finding all links in the results area
-                if not result_links:
-                    result_links = driver.find_elements(By.XPATH, '//td[@class="result-snippet"]//a')
-                
-                # Fallback: find all links and filter for vimeo
-                if not result_links:
-                    all_links = driver.find_elements(By.TAG_NAME, 'a')
-                    result_links = [link for link in all_links if link.get_attribute('href')]
+                REGISTRY.sleep(random.uniform(3, 5), platform='vimeo')
+
+                captcha = detect_ddg_captcha(driver.page_source)
+                if captcha:
+                    raise PlatformBlocked('vimeo', captcha)
                 
+                # Eén pass over de pagina; DuckDuckGo redirects worden uitgepakt en embeds genormaliseerd
+                targets = extract_targets(driver.page_source, max_results=max_results,
+                                          base_url=driver.current_url, domain=self.to_scrape, tags=('a',))
+
                 videos_found = 0
-                for element in result_links:
-                    if videos_found >= max_results:
-                        break
-                    
-                    try:
-                        href = element.get_attribute('href')
-                        
-                        # Skip if not a real link
-                        if not href or href.startswith('javascript:') or href == '#':
-                            continue
-                        
-                        # Check if it's a Vimeo link
-                        if href and 'vimeo.com' in href:
-                            title = element.text or 'No title'
-                            
-                            videos.append({
-                                'url': href,
-                                'title': title,
-                                'query': query_part,
-                                'search_position': videos_found + 1,
-                                'scraped_at': pd.Timestamp.now()
-                            })
-                            videos_found += 1
-                            self.logger.info(f"  Found Vimeo video {videos_found}: {href}")
-                    except Exception as e:
-                        self.logger.debug(f"Error extracting link: {e}")
-                        continue
-                
+                for target in targets:
+                    videos.append(VimeoVideo(
+                        url=target['url'],
+                        title=target['title'] or 'No title',
+                        query=query_part,
+                        search_position=videos_found + 1,
+                        scraped_at=datetime.now().isoformat()  # JSON-serialiseerbaar voor de dataset builder
+                    ))
+                    videos_found += 1
+                    self.logger.debug(f"  Found Vimeo video {videos_found}: {target['url']}")
+
                 if videos_found == 0:
                     # Log the page source for debugging
                     self.logger.warning("No Vimeo videos found. Checking page structure...")
@@ -205,9 +185,49 @@ class VimeoScraper():
             finally:
                 driver.quit()
                 
+        except PlatformBlocked:
+            raise
         except Exception as e:
             self.logger.error(f"Selenium error: {e}")
+            self.stats.inc('errors')
         
+        return sanitize_records(videos)
+
+    def scrape_vimeo(self, query_part: str, max_results: int = 5, terms: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """
+        Eén zoekopdracht: DuckDuckGo resultaten, oEmbed metadata, filters en near-duplicate check
+
+        Zonder de pauzes tussen queries; die horen bij de aanroeper (search() of de platform registry).
+
+        :param query_part: Zoekopdracht inclusief site: prefix (zie self.start_urls)
+        :param max_results: Aantal Vimeo links uit de resultaten
+        :param terms: emotion/subject/setting termen voor de relevantie filter (default: uit de keywords CSV)
+        """
+        with REGISTRY.time(platform='vimeo', stage='search'):
+            videos = self._search_with_selenium(query_part, max_results)
+        if self.metadata is not None and videos:
+            with REGISTRY.time(platform='vimeo', stage='enrich'):
+                self.metadata.enrich(videos)
+        if self.filter_spec is not None and videos:
+            kept = [v for v in videos if self.filter_spec.check(v)[0]]
+            self.stats.inc('filtered_out', len(videos) - len(kept))
+            videos = kept
+        if self.relevance_filter is not None and videos:
+            terms = terms or self.query_terms.get(query_part) or RelevanceFilter.terms_from_query(
+                query_part.replace(f"site:{self.to_scrape}", '', 1))
+            relevant = self.relevance_filter.filter_batch(videos, terms)
+            self.stats.inc('irrelevant_dropped', len(videos) - len(relevant))
+            videos = relevant
+        if self.near_duplicates is not None and videos:
+            # Gedeelde index (dataset builder): tellen uit deze batch, niet uit het verschil van zijn teller
+            kept = self.near_duplicates.process_records(videos, self.near_duplicate_mode)
+            flagged = sum(1 for video in kept if video.get('near_duplicate'))
+            self.stats.inc('near_duplicates', flagged if self.near_duplicate_mode == 'flag' else len(videos) - len(kept))
+            videos = kept
+
+        self.stats.inc('queries_processed')
+        self.stats.inc('vimeo_videos', len(videos))
+        self.stats.inc('total_videos_found', len(videos))
         return videos
 
     def search(self, max_results=5):
@@ -218,34 +238,35 @@ class VimeoScraper():
         all_videos = []
         
         if self.use_selenium:
+            import pandas as pd
+
             self.logger.info("Using Selenium mode (slower but avoids CAPTCHA)")
             
             for idx, query_part in enumerate(self.start_urls):
                 self.logger.info(f"Processing query {idx+1}/{len(self.start_urls)}: {query_part}")
                 
-                # Longer pause each 5 queries
-                if idx > 0 and idx % 5 == 0:
-                    extra_delay = random.uniform(60, 120)
-                    self.logger.info(f"Taking extended break: {extra_delay:.1f} seconds")
-                    time.sleep(extra_delay)
-                
-                videos = self._search_with_selenium(query_part, max_results)
+                # Geen blinde pauze meer: alleen een echte CAPTCHA zet vimeo in cooldown (exponentiële backoff)
+                try:
+                    videos = call_with_cooldown('vimeo', self.scrape_vimeo, query_part, max_results)
+                except PlatformBlocked as e:
+                    self.logger.error(f"Giving up on query after repeated blocks: {e}")
+                    self.stats.inc('errors')
+                    continue
                 all_videos.extend(videos)
                 
-                self.stats['queries_processed'] += 1
-                self.stats['vimeo_videos'] += len(videos)
-                self.stats['total_videos_found'] += len(videos)
-                
                 # Longer delay between queries
                 delay = random.uniform(self.rate_limit_delay, self.rate_limit_delay * 1.5)
                 self.logger.info(f"Waiting {delay:.1f} seconds before next query...")
-                time.sleep(delay)
+                REGISTRY.sleep(delay, platform='vimeo')
                 
                 # Backup every 20 queries
                 if len(all_videos) > 0 and idx % 20 == 0 and idx > 0:
-                    df_temp = pd.DataFrame(all_videos)
-                    df_temp.to_csv('data/vimeo_videos_backup.csv', index=False)
+                    with REGISTRY.time(platform='vimeo', stage='sink'):
+                        df_temp = pd.DataFrame(all_videos)
+                        df_temp.to_csv('data/vimeo_videos_backup.csv', index=False)
                     self.logger.info(f"Backup saved: {len(all_videos)} videos")
+            if self.metadata is not None:
+                self.metadata.close()
         else:
             self.logger.error("Can only search with Selenium!!")
     
\ No newline at end of file
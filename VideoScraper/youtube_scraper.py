@@ -1,85 +1,94 @@
 import time
-import re
-from typing import List, Dict, Optional
-from urllib.parse import urlparse, parse_qs, unquote
-import requests
-import yt_dlp
-from bs4 import BeautifulSoup
-from urllib3.util.retry import Retry
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional
 from config import LoggerConfig
+from http_clients import get_session
+from tools import read_csv
+from sanitize import sanitize_records, sanitize_text
+from relevance import RelevanceFilter
+from metrics import REGISTRY, ScraperStats
+from blocking import PlatformBlocked, call_with_cooldown, ytdlp_extract
+from records import YouTubeVideo
+from credentials import CredentialPool, cookie_pool_from_env, next_credential_on_block, youtube_dl
 import random
-from requests.adapters import HTTPAdapter
-import pandas as pd
-import itertools
 import csv
-import cleantext
-from openpyxl import load_workbook, Workbook
 import os
 
+if TYPE_CHECKING:
+    from near_duplicates import NearDuplicateIndex
+    from search_filters import VideoFilterSpec
+    from transcripts import TranscriptHarvester
+    from thumbnails import ThumbnailDeduplicator
+
 class VideoScraper:
-    def __init__(self, rate_limit_delay: float = 2.0):
+    def __init__(self, rate_limit_delay: float = 2.0, relevance_threshold: Optional[float] = 0.3,
+                 near_duplicates: Optional['NearDuplicateIndex'] = None, near_duplicate_mode: str = 'collapse',
+                 filter_spec: Optional['VideoFilterSpec'] = None, transcripts: Optional['TranscriptHarvester'] = None,
+                 thumbnails: Optional['ThumbnailDeduplicator'] = None, cookies: Optional[CredentialPool] = None):
+        """
+        :param rate_limit_delay: Delay tussen requests
+        :param relevance_threshold: Minimale relevantie score (0-1) om een video te behouden, None = geen filter
+        :param near_duplicates: Gedeelde near-duplicate index (ook over platforms heen), None = geen check
+        :param near_duplicate_mode: 'collapse' (weglaten) of 'flag' (kolom near_duplicate)
+        :param filter_spec: Duur/datum/views/shorts filter, toegepast in de zoek URL en op de flat entries
+        :param transcripts: Transcript stage; geaccepteerde video's worden op de achtergrond ingepland
+        :param thumbnails: Thumbnail stage met perceptual-hash index voor visuele duplicates
+            (gebruikt dezelfde near_duplicate_mode)
+        :param cookies: Cookie profielen/bestanden voor yt-dlp; per request het minst belaste gezonde profiel
+            (default: YTDLP_COOKIES uit de omgeving, niet gezet = zonder cookies)
+        """
         self.rate_limit_delay = rate_limit_delay
         self.logger = LoggerConfig.setup_logger(__name__)
-
-
-        self.stats = {
-            "queries_processed": 0,
-            "total_videos_found": 0,
-            "youtube_videos": 0,
-            "errors": 0,
-        }
+        self.relevance_filter = RelevanceFilter(relevance_threshold) if relevance_threshold is not None else None
+        self.near_duplicates = near_duplicates
+        self.near_duplicate_mode = near_duplicate_mode
+        self.transcripts = transcripts
+        self.thumbnails = thumbnails
+        self.filter_spec = filter_spec if filter_spec is not None and not filter_spec.is_empty() else None
+        cookies = cookies if cookies is not None else cookie_pool_from_env('youtube')
+        self.cookies = cookies if len(cookies) else None
+        if transcripts is not None and self.cookies is not None:
+            # Eén pool voor beide, zodat gebruik en blokkades per profiel samen tellen
+            transcripts.cookies = self.cookies
 
         self.csv_file = 'data/Scraping_Part1_keywords_extended.csv'
-        
-        self.stats = {
-            "queries_processed": 0,
-            "total_videos_found": 0,
-            "youtube_videos": 0,
-            "vimeo_videos": 0,
-            "errors": 0,
-        }
+
+        self.stats = ScraperStats('youtube', [
+            "queries_processed",
+            "total_videos_found",
+            "youtube_videos",
+            "vimeo_videos",
+            "irrelevant_dropped",
+            "near_duplicates",
+            "visual_duplicates",
+            "filtered_out",
+            "errors",
+        ])
 
         self.queries = []
+        self.query_terms = {}
         self.scraped_urls = []
-        self.fieldnames= ['query', 'platform', 'url', 'title', 'duration', 'view_count', 'description', 'uploader', 'upload_date']
+        self.fieldnames= ['query', 'platform', 'url', 'title', 'duration', 'view_count', 'description', 'uploader', 'upload_date', 'thumbnail']
+        if near_duplicates is not None and near_duplicate_mode == 'flag':
+            self.fieldnames.append('near_duplicate')
+        if thumbnails is not None and near_duplicate_mode == 'flag':
+            self.fieldnames.append('visual_duplicate_of')
 
-        query_terms = pd.read_csv(self.csv_file)
-        query_terms.fillna('', inplace=True)
-        terms_emotion = set(query_terms.Emotion.unique())
-        terms_subject = set(query_terms.Subject.unique())
-        terms_setting = set(query_terms.Setting.unique())
-        for s in [terms_emotion, terms_subject, terms_setting]:
-            if '' in s:
-                s.remove('')
-
-        all_queries = list(itertools.product(terms_emotion, terms_setting, terms_subject))
-        random.shuffle(all_queries)
-
-        for p in all_queries:
+        for p in read_csv(self.csv_file):
             emo, setting, subj = p
             query = f"{emo} {subj} {setting}".strip()
             self.queries.append(query)
+            self.query_terms[query] = {'emotion': emo, 'subject': subj, 'setting': setting}
 
         self.logger.info(f"Initialized Youtube scraper with {len(self.queries)} queries")
 
 
-    def _get_session(self):
-
-        session = requests.Session()
-
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=2,
-            status_forcelist=[429, 500, 502, 503, 504], 
-            allowed_methods=['GET', 'POST']
-        )
+    def get_stats(self) -> Dict[str, float]:
+        """Momentopname van de tellers (thread-safe)"""
+        return self.stats.snapshot()
 
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
+    def _get_session(self):
+        return get_session('youtube')
 
-        return session
-    
     def _get_random_headers(self):
         user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -112,80 +121,235 @@ class VideoScraper:
         }
     
     def make_csv_safe(self, text):
-        return "".join(char for char in text if ord(char) <= 0xFFF)
-
-
-    def scrape_youtube(self, query: str, max_results: int = 10) -> List[Dict]:
-        """Scrape YouTube met yt-dlp"""
+        return sanitize_text(text)
+
+
+    def _filter_relevant(self, candidates: List[Dict], query: str, terms: Optional[Dict[str, str]]) -> List[Dict]:
+        """Drop kandidaten die onder de relevantie drempel vallen (één batch per aanroep)"""
+        if self.relevance_filter is None or not candidates:
+            return candidates
+
+        terms = terms or self.query_terms.get(query) or RelevanceFilter.terms_from_query(query)
+        relevant = self.relevance_filter.filter_batch(candidates, terms)
+
+        dropped = len(candidates) - len(relevant)
+        if dropped:
+            self.stats.inc("irrelevant_dropped", dropped)
+            self.logger.debug(f"   Relevance filter dropped {dropped}/{len(candidates)} candidates")
+        return relevant
+
+    def _apply_filter_spec(self, entries: List[Dict], complete: bool) -> List[Dict]:
+        """Drop entries die niet aan de filter spec voldoen (flat entries: alleen op velden die er al zijn)"""
+        if self.filter_spec is None:
+            return entries
+
+        accepted = []
+        for entry in entries:
+            ok, reason = self.filter_spec.check(entry, complete=complete)
+            if ok:
+                accepted.append(entry)
+            else:
+                self.stats.inc("filtered_out")
+                self.logger.debug(f"   Filtered out {entry.get('id') or entry.get('url')}: {reason}")
+        return accepted
+
+    def _extract_info(self, ydl, url: str) -> Optional[Dict]:
+        """ydl.extract_info, met bot-checks en 429's als PlatformBlocked"""
+        return ytdlp_extract(ydl, url)
+
+    def _youtube_dl(self, opts: Dict):
+        """yt_dlp.YoutubeDL met een cookie profiel uit de pool; een blokkade zet dat profiel in cooldown"""
+        return youtube_dl(opts, self.cookies)
+
+    def _next_profile_on_block(self, func: Callable, *args, **kwargs):
+        """func opnieuw zolang er na een geblokkeerd cookie profiel nog een gezond profiel over is"""
+        return next_credential_on_block(self.cookies, func, *args, **kwargs)
+
+    def search_entries(self, query: str, max_results: int = 10) -> Optional[List[Dict]]:
+        """
+        Flat YouTube search (alleen id/titel per resultaat), inclusief de rate-limit pauze
+
+        Een bot-check op één cookie profiel probeert het met het volgende; PlatformBlocked pas als
+        er geen gezond profiel meer is.
+
+        :param query: Zoekterm
+        :param max_results: Aantal zoekresultaten (met een filter spec 3x zoveel, een deel valt af)
+        :return: Flat entries, None als yt-dlp niets teruggeeft
+        """
+        return self._next_profile_on_block(self._search_entries, query, max_results)
+
+    def _search_entries(self, query: str, max_results: int = 10) -> Optional[List[Dict]]:
         self.logger.info(f"🔍 Starting YouTube search: '{query}'")
         self.logger.debug(f"   Max results: {max_results}")
 
+        search_opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "extract_flat": "in_playlist",  # alleen id/titel per zoekresultaat
+            "skip_download": True,
+            "noplaylist": True,
+        }
+        if self.filter_spec is not None:
+            # Extra resultaten ophalen omdat een deel al op de flat entries afvalt
+            search_opts["playlistend"] = max_results * 3
+
+        random_delay = random.uniform(1, 2)
+        fixed_delay = 3
+
+        print(f'Going to sleep for {fixed_delay + random_delay}')
+        REGISTRY.sleep(fixed_delay + random_delay, platform='youtube')
+        with self._youtube_dl(search_opts) as ydl, REGISTRY.time(platform='youtube', stage='search'):
+            if self.filter_spec is not None:
+                search_url = self.filter_spec.youtube_search_url(query, max_results * 3)
+            else:
+                search_url = f"ytsearch{max_results}:{query}"
+            self.logger.debug(f"Search URL: {search_url}")
+
+            results = self._extract_info(ydl, search_url)
+            if not results:
+                self.logger.warning("yt-dlp returned None results")
+                return None
+
+        entries = [e for e in (results.get("entries", []) or []) if e]
+        self.logger.debug(f"Found {len(entries)} entries from YouTube")
+        return entries
+
+    def select_entries(self, entries: List[Dict], query: str, max_results: int = 10,
+                       terms: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """Filter spec en relevantie filter op de flat entries; alleen wat overblijft krijgt volledige metadata"""
+        entries = self._apply_filter_spec(entries, complete=False)
+        return self._filter_relevant(entries, query, terms)[:max_results]
+
+    def fetch_metadata(self, entries: List[Dict], captions: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+        """
+        Volledige metadata extractie voor de geselecteerde flat entries
+
+        :param captions: Krijgt per video URL de ondertitel info uit dezelfde extractie, zodat de transcript
+            stage de watch page niet nog eens hoeft op te vragen
+        :return: Gesanitizede video rows (zonder 'query'); entries die de filter spec niet halen vallen af
+        """
+        return self._next_profile_on_block(self._fetch_metadata, entries, captions)
+
+    def _fetch_metadata(self, entries: List[Dict], captions: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+        from thumbnails import youtube_thumbnail
+
         ydl_opts = {
             "quiet": True,
             "no_warnings": True,
-            "extract_flat": False,  # attempt to fetch richer metadata in search results
             "skip_download": True,
             "noplaylist": True,
         }
 
-        try:
-            random_delay = random.uniform(1, 2)
-            fixed_delay = 3
+        videos: List[YouTubeVideo] = []
+        with self._youtube_dl(ydl_opts) as ydl, REGISTRY.time(platform='youtube', stage='enrich'):
+            for idx, flat_entry in enumerate(entries):
+                video_id = flat_entry.get("id")
+                video_url = f"https://www.youtube.com/watch?v={video_id}" if video_id else flat_entry.get("url")
 
-            print(f'Going to sleep for {fixed_delay + random_delay}')
-            time.sleep(fixed_delay + random_delay)
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                search_url = f"ytsearch{max_results}:{query}"
-                self.logger.debug(f"Search URL: {search_url}")
-
-                results = ydl.extract_info(search_url, download=True)
-                if not results:
-                    self.logger.warning("yt-dlp returned None results")
-                    return []
-
-                entries = results.get("entries", []) or []
-                self.logger.debug(f"Found {len(entries)} entries from YouTube")
-
-                videos: List[Dict] = []
-                for idx, entry in enumerate(entries):
-                    if not entry:
-                        continue
-
-                
-                    video_id = entry.get("id")
-                    title = entry.get("title", "N/A")
-                    duration = entry.get("duration", 0)
-                    description = entry.get("description") or ""  # may be None depending on extractor
-
-                    video_data = {
-                        "platform": "youtube",
-                        "url": f"https://www.youtube.com/watch?v={video_id}" if video_id else entry.get("webpage_url"),
-                        "title": self.make_csv_safe(title),
-                        "duration": duration or 0,
-                        "view_count": entry.get("view_count"),
-                        "description": self.make_csv_safe(description),
-                        "uploader": self.make_csv_safe(entry.get("uploader")),
-                        "upload_date": entry.get("upload_date"),
-                    }
-
-                    videos.append(video_data)
-                    desc_len = len(description) if description else 0
-                    self.logger.debug(f"   Video {idx + 1}: {title} ({duration}s) desc_len={desc_len}")
-
-                self.logger.info(f" YouTube search complete: {len(videos)}")
-
-                self.stats["youtube_videos"] += len(videos)
-                return videos
+                entry = self._extract_info(ydl, video_url)
+                if not entry or not self._apply_filter_spec([entry], complete=True):
+                    continue
 
+                title = entry.get("title", "N/A")
+                duration = entry.get("duration", 0)
+                description = entry.get("description") or ""  # may be None depending on extractor
+
+                video_data = YouTubeVideo(
+                    platform="youtube",
+                    url=video_url or entry.get("webpage_url"),
+                    title=title,
+                    duration=duration or 0,
+                    view_count=entry.get("view_count"),
+                    description=description,
+                    uploader=entry.get("uploader"),
+                    upload_date=entry.get("upload_date"),
+                    thumbnail=youtube_thumbnail(entry),
+                )
+
+                videos.append(video_data)
+                if captions is not None:
+                    captions[video_data['url']] = {'subtitles': entry.get('subtitles'),
+                                                   'automatic_captions': entry.get('automatic_captions')}
+                desc_len = len(description) if description else 0
+                self.logger.debug(f"   Video {idx + 1}: {title} ({duration}s) desc_len={desc_len}")
+
+        sanitize_records(videos)
+        self.logger.info(f" YouTube search complete: {len(videos)}")
+
+        self.stats.inc("queries_processed")
+        self.stats.inc("youtube_videos", len(videos))
+        self.stats.inc("total_videos_found", len(videos))
+        return videos
+
+    def scrape_youtube(self, query: str, max_results: int = 10, terms: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """
+        Scrape YouTube met yt-dlp
+
+        Eerst een flat search (alleen id/titel), dan de relevantie filter, en pas daarna
+        volledige metadata extractie voor de video's die overblijven. Daarna dezelfde dedupe en
+        transcript stages als in run_scraper (zie dedupe en submit_transcripts).
+        Bot detectie wordt niet als lege lijst gemaskeerd maar komt als PlatformBlocked naar boven.
+
+        :param query: Zoekterm
+        :param max_results: Aantal zoekresultaten
+        :param terms: emotion/subject/setting termen voor de relevantie filter (default: uit de keywords CSV)
+        """
+        try:
+            entries = self.search_entries(query, max_results)
+            if entries is None:
+                return []
+            captions = {} if self.transcripts is not None else None
+            videos = self.dedupe(self.fetch_metadata(self.select_entries(entries, query, max_results, terms), captions))
+            self.submit_transcripts(videos, captions)
+            return videos
+
+        except PlatformBlocked:
+            # De aanroeper beslist: cooldown uitwachten of ander werk oppakken
+            raise
         except Exception as e:
             self.logger.error(f"YouTube search failed: {e}", exc_info=True)
-            self.stats["errors"] += 1
+            self.stats.inc("errors")
             return []
         
+    def dedupe(self, videos: List[Dict]) -> List[Dict]:
+        """
+        Near-duplicate en thumbnail checks op de video's van één query (met near_duplicate_mode)
+
+        De indexes kunnen gedeeld zijn met andere platforms; de tellers komen daarom uit deze batch
+        en niet uit het verschil van de gedeelde tellers.
+        """
+        if self.near_duplicates is not None and videos:
+            kept = self.near_duplicates.process_records(videos, self.near_duplicate_mode)
+            flagged = sum(1 for video in kept if video.get('near_duplicate'))
+            self.stats.inc("near_duplicates", flagged if self.near_duplicate_mode == 'flag' else len(videos) - len(kept))
+            videos = kept
+
+        if self.thumbnails is not None and videos:
+            with REGISTRY.time(platform='youtube', stage='enrich'):
+                kept = self.thumbnails.process_records(videos, self.near_duplicate_mode)
+            flagged = sum(1 for video in kept if video.get('visual_duplicate_of'))
+            self.stats.inc("visual_duplicates", flagged if self.near_duplicate_mode == 'flag' else len(videos) - len(kept))
+            videos = kept
+        return videos
+
+    def submit_transcripts(self, videos: List[Dict], captions: Optional[Dict[str, Dict]]):
+        """
+        Plan de transcripts van geaccepteerde video's in (niet blokkerend)
+
+        Transcripts lopen op hun eigen worker pool; discovery wacht er niet op. De ondertitel info komt uit
+        de metadata extractie (captions van fetch_metadata), dus alleen het track bestand wordt nog opgehaald.
+        """
+        if self.transcripts is None:
+            return
+        for video in videos:
+            self.transcripts.submit(video.get('url') or '', (captions or {}).get(video.get('url')))
+
     def append_to_excel(self, file_path: str, rows: List[Dict]):
         if not rows:
             return
 
+        from openpyxl import load_workbook, Workbook
+
         # Zorg dat kolommen altijd in dezelfde volgorde komen
         def row_to_list(d: Dict):
             return [d.get(k) for k in self.fieldnames]
@@ -209,34 +373,74 @@ class VideoScraper:
         wb.save(file_path)
 
         
-    def run_scraper(self):
-        excel_path = "data/results/youtube_videos_scraped.xlsx"
-        csv_path = "data/results/youtube_videos_scraped.csv"
+    def run_scraper(self, excel_path: str = "data/results/youtube_videos_scraped.xlsx",
+                    csv_path: str = "data/results/youtube_videos_scraped.csv",
+                    search_workers: int = 1, enrich_workers: int = 2, queue_size: int = 8):
+        """
+        Scrape alle queries als pipeline: search -> filter -> enrich -> dedupe -> sink
+
+        Terwijl de sink naar Excel/CSV schrijft lopen de volgende searches en metadata extracties al;
+        de begrensde queues houden het geheugen vast als de sink achterloopt.
+
+        :param search_workers: Gelijktijdige flat searches (elke worker houdt zijn eigen rate-limit pauze aan)
+        :param enrich_workers: Gelijktijdige metadata extracties (elk voor de batch van één query)
+        :param queue_size: Maximaal aantal query batches tussen twee stages
+        """
+        from pipeline import Pipeline
+
+        max_results = 5
+
+        def search(query):
+            entries = call_with_cooldown('youtube', self.search_entries, query, max_results)
+            return None if entries is None else {'query': query, 'entries': entries}
+
+        def select(batch):
+            batch['entries'] = self.select_entries(batch['entries'], batch['query'], max_results)
+            return batch
+
+        def enrich(batch):
+            batch['captions'] = {} if self.transcripts is not None else None
+            batch['videos'] = call_with_cooldown('youtube', self.fetch_metadata, batch.pop('entries'),
+                                                 batch['captions'])
+            return batch if batch['videos'] else None
+
+        def dedupe(batch):
+            batch['videos'] = self.dedupe(batch['videos'])
+            return batch if batch['videos'] else None
 
         with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
             writer.writeheader()
 
-            for query in self.queries:
-                urls = self.scrape_youtube(query, 5)
-                self.logger.info("Successfully scraped Youtube for some links, try to save now")
-
-                if not urls:
-                    continue
-
+            def sink(batch):
                 enriched = []
-                for video in urls:
-                    video["query"] = query
-                    enriched.append(video)
+                with REGISTRY.time(platform='youtube', stage='sink'):
+                    for video in batch['videos']:
+                        video["query"] = batch['query']
+                        enriched.append(video)
 
-                    self.logger.info(f"Saving information for url: {video.get('url')}")
-                    writer.writerow(video)
+                        self.logger.debug(f"Saving information for url: {video.get('url')}")
+                        writer.writerow(video)
 
-                self.append_to_excel(excel_path, enriched)
+                    self.append_to_excel(excel_path, enriched)
                 self.logger.info("Video's saved in Excel and CSV format")
 
-
-    
-        
-
-        
\ No newline at end of file
+                self.submit_transcripts(enriched, batch['captions'])
+                return batch
+
+            # Stages met gedeelde state (relevantie cache, dedup indexen, writer) hebben één worker
+            pipeline = (
+                Pipeline('youtube', queue_size=queue_size, on_error=lambda stage, item, e: self.stats.inc("errors"))
+                .stage('search', search, workers=search_workers)
+                .stage('filter', select)
+                .stage('enrich', enrich, workers=enrich_workers)
+                .stage('dedupe', dedupe)
+                .stage('sink', sink)
+            )
+            pipeline_stats = pipeline.run(self.queries)
+            self.logger.info(f"YouTube pipeline finished: {pipeline_stats}")
+
+        if self.transcripts is not None:
+            self.transcripts.close()
+        if self.thumbnails is not None:
+            self.thumbnails.close()